@@ -0,0 +1,97 @@
+"""
+Command-line batch analysis of a feature backlog.
+
+Reads a JSONL file of AnalyzeRequest objects (each optionally with an ``id``),
+analyzes them with bounded concurrency and appends one result line per item to
+the output file as soon as it completes. Re-running with the same output file
+resumes the batch: items already recorded as ``ok`` are skipped and failed
+ones are retried.
+
+Usage (from the backend directory):
+    python batch.py backlog.jsonl -o results.jsonl --concurrency 4 --report report.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Set
+
+from config import settings
+from services.batch import BatchReport, BatchRunner, assign_ids, parse_batch_items
+from services.llm_service import get_llm_service
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """
+    Read the ids already completed successfully from a previous run's output.
+
+    Args:
+        path: Output file of the previous run
+
+    Returns:
+        Set[str]: Ids of items recorded with status ``ok``
+    """
+    completed: Set[str] = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run; the item is redone
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+    return completed
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the batch and return the number of failed items."""
+    with open(args.input, encoding="utf-8") as f:
+        items = assign_ids(parse_batch_items(f))
+    completed = load_checkpoint(args.output)
+    report = BatchReport(total=len(items), skipped=sum(1 for item in items if item.id in completed))
+    if report.skipped:
+        logger.info(f"Resuming: {report.skipped} of {len(items)} items already completed")
+
+    runner = BatchRunner(get_llm_service(), concurrency=args.concurrency, max_attempts=args.max_attempts)
+    with open(args.output, "a", encoding="utf-8") as out:
+        async for record in runner.run(items, report, completed):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            logger.info(f"{record['id']}: {record['status']} in {record['latency_s']}s")
+
+    summary = report.to_dict()
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    print(json.dumps({key: value for key, value in summary.items() if key != "latencies_s"}, indent=2))
+    return summary["failed"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file with one AnalyzeRequest per line")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY,
+                        help="Maximum number of items analyzed at once")
+    parser.add_argument("--max-attempts", type=int, default=settings.BATCH_MAX_ATTEMPTS,
+                        help="Attempts per item before it is reported as failed")
+    parser.add_argument("--report", help="Write the full report, with per-item latencies, to this JSON file")
+    args = parser.parse_args()
+
+    settings.validate()
+    failures = asyncio.run(run(args))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Offline end-to-end benchmark of /api/analyze against the fake model backend.
+
+For every worker count a uvicorn server is started with MODEL_BACKEND=fake, so
+responses are replayed from benchmarks/corpus/recordings.jsonl (clean,
+malformed and truncated) with a fixed latency instead of calling Gemini. Each
+concurrency level then sends the same number of requests with unique
+descriptions and ``Cache-Control: no-store``, and the run records throughput,
+latency percentiles and server memory growth per request.
+
+The report is written as JSON. Passing a previous report as ``--baseline``
+compares throughput and p95 latency and exits non-zero on a regression.
+
+Usage (from the backend directory):
+    python benchmarks/benchmark.py --workers 1 2 --concurrency 1 8 32 --requests 200 \\
+        --latency 0.2 --output report.json --baseline previous.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    """Pick an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(pid: int) -> List[int]:
+    """The pid and all its descendants (Linux /proc only)."""
+    pids = [pid]
+    for current in pids:
+        try:
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process tree in MB, or None where /proc is unavailable."""
+    total_kb = 0
+    found = False
+    for current in process_tree(pid):
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        found = True
+        except OSError:
+            continue
+    return round(total_kb / 1024, 2) if found else None
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Server:
+    """A uvicorn server running the app with the fake model backend."""
+
+    def __init__(self, workers: int, latency: float, tokens_per_second: float, verbose: bool = False):
+        self.workers = workers
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        env = dict(
+            os.environ,
+            MODEL_BACKEND="fake",
+            FAKE_MODEL_LATENCY=str(latency),
+            FAKE_MODEL_TOKENS_PER_SECOND=str(tokens_per_second),
+            # Benchmark the pipeline, not the limiter or the job store
+            UPSTREAM_REQUESTS_PER_MINUTE="0",
+            UPSTREAM_TOKENS_PER_MINUTE="0",
+            JOB_STORE="memory",
+        )
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+            # Application logs are per request; keep them out of the report unless asked for
+            stdout=None if verbose else subprocess.DEVNULL,
+            stderr=None if verbose else subprocess.DEVNULL,
+        )
+
+    async def wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    raise RuntimeError("Server exited during startup (rerun with --verbose for its logs)")
+                try:
+                    if (await client.get(f"{self.url}/api/health")).status_code == 200:
+                        return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.2)
+        raise RuntimeError("Server did not become ready")
+
+    def stop(self) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+async def run_level(server: Server, concurrency: int, total: int, run_id: str) -> Dict:
+    """Send ``total`` analyses with at most ``concurrency`` in flight."""
+    limiter = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=server.url, timeout=120, limits=limits) as client:
+        async def one(index: int):
+            # Unique descriptions so neither the cache nor single-flight merging applies
+            body = {"feature_description": f"Build a login system with JWT and roles ({run_id}-{concurrency}-{index})."}
+            async with limiter:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/api/analyze", json=body, headers={"Cache-Control": "no-store"})
+                    outcome = str(response.status_code)
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                elapsed = time.perf_counter() - start
+            if outcome == "200":
+                latencies.append(elapsed)
+            else:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+        rss_before = rss_mb(server.process.pid)
+        start = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(total)))
+        wall = time.perf_counter() - start
+        rss_after = rss_mb(server.process.pid)
+
+    memory_per_request_kb = None
+    if rss_before is not None and rss_after is not None:
+        memory_per_request_kb = round((rss_after - rss_before) * 1024 / total, 2)
+    return {
+        "workers": server.workers,
+        "concurrency": concurrency,
+        "requests": total,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "wall_time_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "latency_p50_ms": round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        "latency_p90_ms": round(percentile(latencies, 0.90) * 1000, 1) if latencies else None,
+        "latency_p95_ms": round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        "latency_max_ms": round(max(latencies) * 1000, 1) if latencies else None,
+        "rss_before_mb": rss_before,
+        "rss_after_mb": rss_after,
+        "rss_growth_per_request_kb": memory_per_request_kb,
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List regressions of throughput or p95 latency beyond ``tolerance`` (a fraction)."""
+    previous = {(r["workers"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["workers"], result["concurrency"]))
+        if before is None:
+            continue
+        label = f"workers={result['workers']} concurrency={result['concurrency']}"
+        if before["throughput_rps"] and result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {result['throughput_rps']} rps < {before['throughput_rps']} rps")
+        if before["latency_p95_ms"] and result["latency_p95_ms"] and \
+                result["latency_p95_ms"] > before["latency_p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {result['latency_p95_ms']} ms > {before['latency_p95_ms']} ms")
+    return regressions
+
+
+async def main(args) -> int:
+    run_id = str(int(time.time()))
+    results = []
+    for workers in args.workers:
+        server = Server(workers, args.latency, args.tokens_per_second, args.verbose)
+        try:
+            await server.wait_ready()
+            for concurrency in args.concurrency:
+                result = await run_level(server, concurrency, args.requests, run_id)
+                results.append(result)
+                print(json.dumps(result))
+        finally:
+            server.stop()
+
+    report = {
+        "config": {
+            "latency_s": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "requests_per_level": args.requests,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="uvicorn worker counts to test")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels to test")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake model latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Fake model generation speed (0 for instant generation)")
+    parser.add_argument("--verbose", action="store_true", help="Show the server logs")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative regression before failing (default 0.15)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,60 @@
+"""
+Benchmark of services.ddl_parser on large multi-table scripts.
+
+Generates PostgreSQL-style scripts with the given numbers of tables (each with
+columns, a foreign key to the previous table and two indexes) and reports the
+parse time per table and per KB, which stays flat as scripts grow if parsing
+is linear.
+
+Usage (from the backend directory):
+    python benchmarks/ddl_parser_bench.py --tables 100 1000 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ddl_parser import parse_ddl  # noqa: E402
+
+
+def build_script(tables: int) -> str:
+    """A script defining ``tables`` tables chained by foreign keys."""
+    statements = []
+    for number in range(tables):
+        reference = f",\n    parent_id UUID REFERENCES table_{number - 1}(id) ON DELETE CASCADE" if number else ""
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS table_{number} (\n"
+            f"    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),\n"
+            f"    name VARCHAR(255) NOT NULL UNIQUE,\n"
+            f"    amount DECIMAL(10, 2) DEFAULT 0.00 CHECK (amount >= 0),\n"
+            f"    note TEXT DEFAULT 'n/a; pending',\n"
+            f"    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP{reference}\n"
+            f");\n"
+            f"CREATE INDEX idx_table_{number}_name ON table_{number} (name);\n"
+            f"CREATE INDEX idx_table_{number}_created ON table_{number} USING btree (created_at DESC);"
+        )
+    return "\n\n".join(statements)
+
+
+def main(args) -> None:
+    for tables in args.tables:
+        script = build_script(tables)
+        best = float("inf")
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            schema = parse_ddl(script)
+            best = min(best, time.perf_counter() - start)
+        if len(schema.tables) != tables or schema.errors:
+            raise SystemExit(f"Unexpected parse result: {len(schema.tables)} tables, errors {schema.errors[:3]}")
+        print(f"{tables:>6} tables  {len(script) / 1024:>8.0f} KB  {best * 1e3:>9.1f} ms  "
+              f"{best / tables * 1e6:>6.1f} us/table  {best / (len(script) / 1024) * 1e6:>6.1f} us/KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, nargs="+", default=[100, 1000, 10000], help="Script sizes in tables")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per size; the fastest is reported")
+    main(parser.parse_args())
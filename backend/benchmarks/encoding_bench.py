@@ -0,0 +1,69 @@
+"""
+Benchmark of response encoding for large specifications.
+
+Builds an AnalyzeResponse with the given number of items per section and
+times FastAPI's default serialization (re-validating the returned model, then
+jsonable_encoder and json.dumps) against serializing the model directly with
+model_dump_json, then reports the body size under each content encoding.
+
+Usage (from the backend directory):
+    python benchmarks/encoding_bench.py --items 50 200 --runs 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from benchmarks.spec_validator_bench import build_spec  # noqa: E402
+from models.schemas import AnalyzeResponse  # noqa: E402
+from services.encoding import compress, encode_json, etag_for, supported_encodings  # noqa: E402
+
+
+def fastapi_default(model: AnalyzeResponse) -> bytes:
+    """What FastAPI does with a returned model when no Response is built."""
+    validated = AnalyzeResponse.model_validate(model.model_dump())
+    content = jsonable_encoder(validated)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def best_of(fn, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args) -> None:
+    for items in args.items:
+        model = AnalyzeResponse(**build_spec(items))
+        body = encode_json(model)
+        print(f"{items} items per section, {len(body) / 1024:.0f} KB of JSON")
+        for label, fn in (
+            ("FastAPI default", lambda: fastapi_default(model)),
+            ("model_dump_json", lambda: encode_json(model)),
+            ("ETag", lambda: etag_for(body)),
+        ):
+            print(f"  {label:>16}: {best_of(fn, args.runs) * 1e3:8.2f} ms")
+        for encoding in supported_encodings():
+            start = time.perf_counter()
+            compressed = compress(body, encoding, args.gzip_level, args.brotli_quality)
+            elapsed = time.perf_counter() - start
+            print(f"  {encoding:>16}: {len(compressed) / 1024:8.1f} KB  "
+                  f"({len(compressed) / len(body):.1%}, {elapsed * 1e3:.2f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[50, 200], help="Items per list section")
+    parser.add_argument("--runs", type=int, default=50, help="Runs per serializer; the fastest is reported")
+    parser.add_argument("--gzip-level", type=int, default=6, help="gzip compression level")
+    parser.add_argument("--brotli-quality", type=int, default=5, help="Brotli quality")
+    main(parser.parse_args())
@@ -0,0 +1,201 @@
+"""
+Corpus check, fuzzer and benchmark for services.json_extractor.
+
+1. Corpus: every file in corpus/malformed must parse with the repairs and
+   truncation flag recorded in its manifest.
+2. Fuzz: random mutations (truncation, trailing commas, comments, prose and
+   fences) of a large specification must either parse or raise
+   JSONExtractionError, and non-truncating mutations must round-trip exactly.
+3. Benchmark: extraction time on a large specification against the previous
+   split/find/rfind cleanup.
+
+Usage (from the backend directory):
+    python benchmarks/json_extractor_bench.py --fuzz 2000 --iterations 200
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.json_extractor import JSONExtractionError, extract_json  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "malformed")
+
+
+def legacy_parse(content: str):
+    """The cleanup used before the extractor: split on fences, then find/rfind."""
+    content = content.strip()
+    if "```json" in content:
+        content = content.split("```json")[1]
+        if "```" in content:
+            content = content.split("```")[0]
+    elif "```" in content:
+        content = content.split("```")[1]
+        if "```" in content:
+            content = content.split("```")[0]
+    content = content.strip()
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return json.loads(content[content.find("{"):content.rfind("}") + 1])
+
+
+def large_spec(items: int) -> dict:
+    """Build a specification with ``items`` entries per section."""
+    return {
+        "requirements": [
+            {"id": f"REQ-{i:03d}", "category": "Functional",
+             "description": f"Requirement {i}: users can manage resource {i} with audit logging", "priority": "High"}
+            for i in range(items)
+        ],
+        "api_design": [
+            {"method": "GET", "path": f"/api/resources/{i}", "description": f"Fetch resource {i}",
+             "request_body": None, "response": {"id": "string", "fields": ["a", "b"]}, "authentication": True}
+            for i in range(items)
+        ],
+        "database_schema": [
+            {"table_name": f"table_{i}",
+             "columns": [{"name": "id", "type": "UUID", "constraints": "PRIMARY KEY"}],
+             "indexes": [f"idx_table_{i}_id"], "relationships": []}
+            for i in range(items)
+        ],
+        "database_schema_sql": "\n".join(f"CREATE TABLE table_{i} (id UUID PRIMARY KEY);" for i in range(items)),
+        "sprint_tasks": [
+            {"task_id": f"TASK-{i:03d}", "title": f"Task {i}", "description": f"Implement resource {i}",
+             "story_points": 3, "dependencies": [f"TASK-{i - 1:03d}"] if i else [], "sprint": 1 + i % 3}
+            for i in range(items)
+        ],
+    }
+
+
+def check_corpus() -> int:
+    """Verify every corpus file against the manifest. Returns the number of failures."""
+    with open(os.path.join(CORPUS_DIR, "manifest.json")) as f:
+        manifest = json.load(f)
+    failures = 0
+    for name, expected in sorted(manifest.items()):
+        with open(os.path.join(CORPUS_DIR, name)) as f:
+            text = f.read()
+        try:
+            result = extract_json(text)
+            ok = (result.truncated == expected["truncated"]
+                  and set(result.repairs) == set(expected["repairs"])
+                  and isinstance(result.value, dict))
+            detail = ", ".join(result.repairs) or "clean"
+        except JSONExtractionError as e:
+            ok, detail = False, str(e)
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+    return failures
+
+
+def mutate(rng: random.Random, text: str):
+    """Apply one random defect. Returns (mutated text, whether it truncates)."""
+    kind = rng.choice(["truncate", "trailing_comma", "comment", "prose", "fence"])
+    if kind == "truncate":
+        return text[:rng.randrange(1, len(text))], True
+    if kind == "trailing_comma":
+        closers = [i for i, c in enumerate(text) if c in "}]" and text[i - 1] != "\\"]
+        # Only structural closers: skip ones inside strings by checking the JSON still decodes
+        for _ in range(10):
+            i = rng.choice(closers)
+            candidate = text[:i] + "," + text[i:]
+            try:
+                json.loads(candidate)
+            except json.JSONDecodeError:
+                if extract_is_structural(text, i):
+                    return candidate, False
+        return text, False
+    if kind == "comment":
+        commas = [i for i, c in enumerate(text) if c == ","]
+        for _ in range(10):
+            i = rng.choice(commas)
+            if extract_is_structural(text, i):
+                return text[:i + 1] + " // note\n" + text[i + 1:], False
+        return text, False
+    if kind == "prose":
+        return "Sure! Here is the JSON:\n" + text + "\nHope this helps.", False
+    return "```json\n" + text + "\n```", False
+
+
+def extract_is_structural(text: str, index: int) -> bool:
+    """Whether ``text[index]`` lies outside any JSON string."""
+    in_string = escape = False
+    for char in text[:index]:
+        if escape:
+            escape = False
+        elif char == "\\":
+            escape = True
+        elif char == '"':
+            in_string = not in_string
+    return not in_string
+
+
+def fuzz(cases: int, seed: int) -> int:
+    """Run random mutations through the extractor. Returns the number of failures."""
+    rng = random.Random(seed)
+    spec = large_spec(8)
+    text = json.dumps(spec, indent=2)
+    failures = 0
+    for _ in range(cases):
+        mutated, truncates = mutate(rng, text)
+        try:
+            result = extract_json(mutated)
+        except JSONExtractionError:
+            if not truncates:
+                failures += 1
+                print(f"FAIL non-truncating mutation rejected: {mutated[:80]!r}")
+            continue
+        except Exception as e:  # any other exception is a bug
+            failures += 1
+            print(f"FAIL {type(e).__name__}: {e}")
+            continue
+        if not truncates and result.value != spec:
+            failures += 1
+            print(f"FAIL round-trip mismatch ({', '.join(result.repairs)})")
+    print(f"fuzz: {cases} cases, {failures} failures")
+    return failures
+
+
+def benchmark(iterations: int) -> dict:
+    """Time the extractor and the legacy cleanup on large payloads."""
+    spec = large_spec(150)
+    clean = json.dumps(spec, indent=2)
+    fenced = "Here you go:\n```json\n" + clean + "\n```\n"
+    trailing = clean.replace('"High"\n    }', '"High",\n    }')
+    report = {"payload_bytes": len(clean)}
+    for label, payload, fn in [
+        ("legacy_clean", clean, legacy_parse),
+        ("extract_clean", clean, extract_json),
+        ("legacy_fenced", fenced, legacy_parse),
+        ("extract_fenced", fenced, extract_json),
+        ("extract_trailing_commas", trailing, extract_json),
+        ("extract_truncated", clean[:len(clean) // 2], extract_json),
+    ]:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn(payload)
+        report[f"{label}_ms"] = round((time.perf_counter() - start) / iterations * 1000, 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuzz", type=int, default=2000, help="Number of fuzz cases")
+    parser.add_argument("--seed", type=int, default=1234, help="Fuzz random seed")
+    parser.add_argument("--iterations", type=int, default=200, help="Benchmark iterations per payload")
+    args = parser.parse_args()
+
+    failures = check_corpus()
+    failures += fuzz(args.fuzz, args.seed)
+    print(json.dumps(benchmark(args.iterations), indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Load test for the /api/analyze endpoint against a stubbed Gemini model.
+
+The real model is replaced by a stub that sleeps for a fixed latency and
+returns a canned specification, so the test measures how many analyses a
+single worker keeps in flight rather than network or provider behaviour.
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py --latency 0.5 --requests 64 --concurrency 1 4 16 64
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "load-test")
+
+from main import app  # noqa: E402
+from services.llm_service import get_llm_service  # noqa: E402
+
+
+SAMPLE_SPEC = {
+    "requirements": [
+        {"id": "REQ-001", "category": "Functional",
+         "description": "User can log in with email and password", "priority": "High"}
+    ],
+    "api_design": [
+        {"method": "POST", "path": "/api/auth/login", "description": "Log in",
+         "request_body": {"email": "string", "password": "string"},
+         "response": {"token": "string"}, "authentication": False}
+    ],
+    "database_schema": [
+        {"table_name": "users",
+         "columns": [{"name": "id", "type": "UUID", "constraints": "PRIMARY KEY"}],
+         "indexes": [], "relationships": []}
+    ],
+    "database_schema_sql": "CREATE TABLE users (id UUID PRIMARY KEY);",
+    "sprint_tasks": [
+        {"task_id": "TASK-001", "title": "Create users table", "description": "Schema migration",
+         "story_points": 2, "dependencies": [], "sprint": 1}
+    ],
+}
+
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Stand-in for ``genai.GenerativeModel`` with a fixed generation latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.payload = json.dumps(SAMPLE_SPEC)
+
+    async def generate_content_async(self, prompt, generation_config=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return _StubResponse(self.payload)
+
+
+async def asgi_request(method: str, path: str, body: bytes = b"", headers=None):
+    """Issue a single request directly against the ASGI app and return the status code."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())] + list(headers or []),
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    sent = False
+    status_code = None
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def run_level(concurrency: int, total: int) -> dict:
+    """Run ``total`` analyses with at most ``concurrency`` in flight and probe health latency."""
+    limiter = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one(index: int):
+        nonlocal failures
+        # Distinct descriptions so single-flight does not merge the requests
+        body = json.dumps({"feature_description": f"Build a login system with JWT and roles ({index})."}).encode()
+        async with limiter:
+            # Bypass the response cache so every request reaches the stubbed model
+            status_code = await asgi_request("POST", "/api/analyze", body, [(b"cache-control", b"no-store")])
+            if status_code != 200:
+                failures += 1
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(one(index)) for index in range(total)]
+
+    # Health checks must stay responsive while analyses are in flight
+    await asyncio.sleep(0)
+    health_start = time.perf_counter()
+    await asgi_request("GET", "/api/health")
+    health_latency = time.perf_counter() - health_start
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+        "health_latency_ms": round(health_latency * 1000, 2),
+    }
+
+
+async def main(args):
+    logging.disable(logging.INFO)
+    for route in get_llm_service().router.routes:
+        route.backend = StubModel(args.latency)
+    results = []
+    for level in args.concurrency:
+        result = await run_level(level, args.requests)
+        results.append(result)
+        print(json.dumps(result))
+
+    baseline = results[0]["throughput_rps"]
+    for result in results[1:]:
+        speedup = result["throughput_rps"] / baseline if baseline else 0.0
+        print(f"concurrency={result['concurrency']}: {speedup:.1f}x throughput vs concurrency={results[0]['concurrency']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="Stubbed generation latency in seconds")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64],
+                        help="Concurrency levels to test")
+    asyncio.run(main(parser.parse_args()))
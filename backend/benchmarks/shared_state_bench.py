@@ -0,0 +1,98 @@
+"""
+Benchmark of the upstream request budget with several worker processes.
+
+Starts the given number of processes that each take request tokens as fast as
+they can for a few seconds, once with a token bucket per process and once with
+the bucket in shared state, and reports the calls let through against the
+budget and the time one acquire() takes. With a bucket per process every
+worker spends the whole budget, so the server exceeds it by the worker count.
+
+Usage (from the backend directory):
+    python benchmarks/shared_state_bench.py --workers 4 --per-minute 600 --seconds 3
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.shared_state import SharedState  # noqa: E402
+from services.upstream import SharedTokenBucket, TokenBucket  # noqa: E402
+
+
+async def drain(bucket, seconds: float) -> tuple:
+    """Acquire one token at a time until the deadline; returns (calls let through, seconds in acquire())."""
+    deadline = time.monotonic() + seconds
+    calls = 0
+    spent = 0.0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        await bucket.acquire(1)
+        spent += time.perf_counter() - start
+        if time.monotonic() < deadline:
+            calls += 1
+    return calls, spent
+
+
+def worker(db_path, per_minute: int, seconds: float, start_at: float, results) -> None:
+    if db_path is None:
+        bucket = TokenBucket(per_minute)
+    else:
+        bucket = SharedTokenBucket(SharedState(db_path), "bench", per_minute)
+    time.sleep(max(0.0, start_at - time.time()))
+    results.put(asyncio.run(drain(bucket, seconds)))
+
+
+def run(db_path, args) -> int:
+    """Calls let through by every worker together; ``db_path`` None gives each worker its own bucket."""
+    results = multiprocessing.Queue()
+    start_at = time.time() + 1.0
+    processes = [
+        multiprocessing.Process(target=worker, args=(db_path, args.per_minute, args.seconds, start_at, results))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(calls for calls, _ in outcomes)
+
+
+def acquire_cost(bucket, runs: int) -> float:
+    """Mean seconds of an acquire() that does not wait."""
+    async def measure():
+        start = time.perf_counter()
+        for _ in range(runs):
+            await bucket.acquire(1)
+        return (time.perf_counter() - start) / runs
+    return asyncio.run(measure())
+
+
+def main(args) -> None:
+    budget = args.per_minute + args.per_minute / 60 * args.seconds
+    print(f"{args.workers} workers, {args.per_minute}/min budget, {args.seconds:.0f}s: "
+          f"the budget allows {budget:.0f} calls")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, db_path in (("bucket per process", None), ("shared bucket", os.path.join(directory, "state.db"))):
+            calls = run(db_path, args)
+            print(f"  {label:>20}: {calls:6d} calls let through ({calls / budget:.1f}x the budget)")
+
+        unlimited = 10 ** 9
+        local = acquire_cost(TokenBucket(unlimited), args.runs)
+        shared = acquire_cost(SharedTokenBucket(SharedState(os.path.join(directory, "cost.db")), "cost", unlimited), args.runs)
+        print(f"  acquire() per process: {local * 1e6:8.1f} us  shared: {shared * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    parser.add_argument("--per-minute", type=int, default=600, help="Request budget per minute")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Seconds each worker takes tokens")
+    parser.add_argument("--runs", type=int, default=2000, help="Calls timed for the acquire() cost")
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+"""
+Benchmark of services.similarity at production index sizes.
+
+Fills a SimilarityIndex with synthetic feature descriptions, then measures
+insert and query latency and how often a paraphrase (shuffled clauses, a
+dropped word, stop words added) finds its original above the threshold.
+
+Usage (from the backend directory):
+    python benchmarks/similarity_bench.py --entries 100000 --queries 2000 --threshold 0.5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.similarity import SimilarityIndex  # noqa: E402
+
+SUBJECTS = ["user", "admin", "customer", "vendor", "team", "project", "invoice", "order", "product",
+            "ticket", "report", "document", "message", "payment", "subscription", "booking", "course"]
+ACTIONS = ["login", "signup", "search", "export", "import", "upload", "approve", "schedule", "notify",
+           "archive", "share", "comment", "rate", "refund", "track", "assign", "audit", "sync"]
+QUALIFIERS = ["jwt", "oauth", "roles", "email", "sms", "csv", "pdf", "stripe", "webhooks", "realtime",
+              "offline", "mobile", "dashboard", "analytics", "filters", "pagination", "i18n", "2fa"]
+
+
+def description(rng: random.Random) -> str:
+    """A random description of a few clauses."""
+    clauses = [
+        f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} with {rng.choice(QUALIFIERS)} and {rng.choice(QUALIFIERS)}"
+        for _ in range(rng.randint(2, 4))
+    ]
+    return f"Build a feature where {', '.join(clauses)} ({rng.randrange(10 ** 6)})"
+
+
+def paraphrase(text: str, rng: random.Random) -> str:
+    """Reorder clauses, drop one content word and add filler."""
+    body, tag = text[len("Build a feature where "):].rsplit(" (", 1)
+    clauses = body.split(", ")
+    rng.shuffle(clauses)
+    words = " ".join(clauses).split()
+    del words[rng.randrange(len(words))]
+    return f"We need to implement {' '.join(words)} ({tag}"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    index = SimilarityIndex(args.entries)
+    texts = [description(rng) for _ in range(args.entries)]
+
+    start = time.perf_counter()
+    for number, text in enumerate(texts):
+        index.add(f"key-{number}", text)
+    insert_us = (time.perf_counter() - start) / len(texts) * 1e6
+
+    latencies = []
+    found = 0
+    for _ in range(args.queries):
+        number = rng.randrange(len(texts))
+        query = paraphrase(texts[number], rng)
+        start = time.perf_counter()
+        matches = index.query(query, limit=args.limit, threshold=args.threshold)
+        latencies.append(time.perf_counter() - start)
+        found += any(match.key == f"key-{number}" for match in matches)
+
+    print(f"entries: {len(index)}")
+    print(f"insert: {insert_us:.1f} us/entry")
+    print(f"query p50: {percentile(latencies, 0.5) * 1e6:.1f} us  "
+          f"p99: {percentile(latencies, 0.99) * 1e6:.1f} us  max: {max(latencies) * 1e6:.1f} us")
+    print(f"paraphrase recall at {args.threshold}: {found / args.queries:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000, help="Descriptions indexed")
+    parser.add_argument("--queries", type=int, default=2000, help="Paraphrase queries timed")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Minimum similarity of a match")
+    parser.add_argument("--limit", type=int, default=3, help="Matches returned per query")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    main(parser.parse_args())
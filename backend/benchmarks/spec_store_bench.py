@@ -0,0 +1,94 @@
+"""
+Benchmark of services.spec_store.
+
+Fills a temporary store with the given number of specifications and reports:
+the time save() adds to a request with the background writer running, against
+committing each write on its own; the time to fetch a page at the start and
+the end of the listing with keyset cursors, against OFFSET; and the latency of
+full-text searches.
+
+Usage (from the backend directory):
+    python benchmarks/spec_store_bench.py --specs 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.spec_validator_bench import build_spec  # noqa: E402
+from services.spec_store import SpecStore, StoredSpec, encode_cursor  # noqa: E402
+
+WORDS = ("login", "invoice", "cart", "upload", "search", "billing", "report", "notification", "profile", "export")
+
+
+def record(number: int, spec) -> StoredSpec:
+    words = " ".join(WORDS[(number * step) % len(WORDS)] for step in (1, 3, 7))
+    return StoredSpec(id=f"spec-{number}", description=f"Feature {number}: {words}", spec=spec, model="bench")
+
+
+def best_of(fn, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def fill(store: SpecStore, count: int, spec, rate: float) -> float:
+    """Save ``count`` specs through the background writer at ``rate`` per second; returns the mean save() time."""
+    await store.start()
+    elapsed = 0.0
+    for number in range(count):
+        start = time.perf_counter()
+        store.save(record(number, spec))
+        elapsed += time.perf_counter() - start
+        # Yield to the writer between saves, as the event loop does between requests
+        await asyncio.sleep(1 / rate)
+    await store.stop()
+    return elapsed / count
+
+
+def main(args) -> None:
+    spec = build_spec(args.items)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SpecStore(os.path.join(directory, "specs.db"), batch_size=args.batch_size)
+        mean_save = asyncio.run(fill(store, args.specs, spec, args.rate))
+        print(f"{args.specs} specs of {args.items} items per section, saved at {args.rate:.0f}/s")
+        print(f"  save() with background writer: {mean_save * 1e6:8.1f} us per spec on the request path")
+
+        direct = SpecStore(os.path.join(directory, "direct.db"))
+        runs = min(200, args.specs)
+        start = time.perf_counter()
+        for number in range(runs):
+            direct.save(record(number, spec))
+        print(f"  save() committing each write:  {(time.perf_counter() - start) / runs * 1e6:8.1f} us per spec")
+
+        last = store.list(limit=1)[0][0]
+        print(f"  stored: {store.stats()['stored']}, flushes: {store.flushes}")
+        for label, fn in (
+            ("first page", lambda: store.list(limit=20)),
+            ("last page, keyset cursor", lambda: store.list(limit=20, cursor=encode_cursor(21))),
+            ("last page, OFFSET", lambda: store._reader.execute(
+                "SELECT seq, id FROM specs ORDER BY seq DESC LIMIT 20 OFFSET ?", (args.specs - 20,)).fetchall()),
+            ("search one word", lambda: store.search("invoice", limit=20)),
+            ("search two words", lambda: store.search("login cart", limit=20)),
+            ("search requirement text", lambda: store.search("resource 42", limit=20)),
+            ("get by id", lambda: store.get(last["id"])),
+        ):
+            print(f"  {label:>30}: {best_of(fn, args.runs) * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--specs", type=int, default=20000, help="Specifications stored")
+    parser.add_argument("--items", type=int, default=10, help="Items per list section of each specification")
+    parser.add_argument("--rate", type=float, default=2000, help="Specs saved per second while filling")
+    parser.add_argument("--batch-size", type=int, default=50, help="Writes per background flush")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per query; the fastest is reported")
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+"""
+Benchmark of services.spec_validator on large specifications.
+
+Builds a synthetic specification with the given number of items per section,
+with chained task dependencies and a matching SQL script, then times
+validate_spec, with and without the SQL script's parse already cached, against
+constructing the AnalyzeResponse model from it.
+
+Usage (from the backend directory):
+    python benchmarks/spec_validator_bench.py --items 1000 --runs 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.schemas import AnalyzeResponse  # noqa: E402
+from services.ddl_parser import cached_schema  # noqa: E402
+from services.spec_validator import validate_spec  # noqa: E402
+
+POINTS = (1, 2, 3, 5, 8, 13)
+
+
+def build_spec(items: int):
+    """A valid specification with ``items`` entries in every list section."""
+    tables = [f"table_{number}" for number in range(items)]
+    return {
+        "requirements": [
+            {"id": f"REQ-{number:04d}", "category": "Functional",
+             "description": f"Requirement {number}", "priority": "High"}
+            for number in range(items)
+        ],
+        "api_design": [
+            {"method": "GET", "path": f"/api/resources/{number}", "description": f"Read resource {number}",
+             "request_body": None, "response": {"id": "string"}, "authentication": True}
+            for number in range(items)
+        ],
+        "database_schema": [
+            {"table_name": name, "columns": [{"name": "id", "type": "UUID"}, {"name": "name", "type": "TEXT"}],
+             "indexes": [f"idx_{name}_name"], "relationships": []}
+            for name in tables
+        ],
+        "database_schema_sql": "\n".join(f"CREATE TABLE {name} (id UUID PRIMARY KEY, name TEXT);" for name in tables),
+        "sprint_tasks": [
+            {"task_id": f"TASK-{number:04d}", "title": f"Task {number}", "description": f"Implement part {number}",
+             "story_points": POINTS[number % len(POINTS)],
+             "dependencies": [f"TASK-{dependency:04d}" for dependency in range(max(0, number - 3), number)],
+             "sprint": number // 50 + 1}
+            for number in range(items)
+        ],
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def timed(fn, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main(args) -> None:
+    spec = build_spec(args.items)
+    issues = validate_spec(spec)
+    if issues:
+        raise SystemExit(f"Synthetic spec is not clean: {issues[:3]}")
+
+    for label, fn in (
+        ("validate_spec", lambda: (cached_schema.cache_clear(), validate_spec(spec))),
+        ("validate_spec, SQL cached", lambda: validate_spec(spec)),
+        ("AnalyzeResponse", lambda: AnalyzeResponse(**spec)),
+    ):
+        latencies = timed(fn, args.runs)
+        print(f"{label:>26}: p50 {percentile(latencies, 0.5) * 1e3:.2f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000, help="Items per list section")
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs per validator")
+    main(parser.parse_args())
@@ -0,0 +1,82 @@
+"""
+Benchmark of application cold start with the Gemini backend.
+
+Starts fresh interpreters that import ``main`` and run the application
+lifespan, and reports, from process start:
+
+- import: ``import main``
+- ready: the lifespan has started and the server would accept requests
+- client: creating the Gemini client afterwards, which the background warm-up
+  does while requests are already being served
+
+Before the client was created lazily, importing ``main`` built it, so a
+worker was ready only after ready + client. No request is sent upstream.
+
+Usage (from the backend directory):
+    python benchmarks/startup_bench.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        backend = main.get_llm_service().router.default.backend
+        await asyncio.to_thread(lambda: backend.model)
+        return ready, time.perf_counter()
+
+ready, client = asyncio.run(run())
+print(json.dumps({"import": imported - start, "ready": ready - start, "client": client - ready}))
+"""
+
+
+def measure(directory: str) -> dict:
+    """Timings of one cold start, in seconds."""
+    env = {
+        **os.environ,
+        "MODEL_BACKEND": "gemini",
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY") or "startup-benchmark",
+        "WARMUP_ENABLED": "false",
+        "MODEL_RECORD_PATH": "",
+        "SPEC_STORE_DB_PATH": os.path.join(directory, "specs.db"),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        # The first start also compiles bytecode; it is not counted
+        measure(directory)
+        runs = [measure(directory) for _ in range(args.runs)]
+    for key, label in (("import", "import main"), ("ready", "ready to serve"), ("client", "Gemini client")):
+        values = [run[key] for run in runs]
+        print(f"{label:>16}: median {statistics.median(values) * 1e3:7.0f} ms  best {min(values) * 1e3:7.0f} ms")
+    eager = statistics.median(run["ready"] + run["client"] for run in runs)
+    ready = statistics.median(run["ready"] for run in runs)
+    print(f"{'eager client':>16}: median {eager * 1e3:7.0f} ms  (ready to serve when the client was built at import)")
+    print(f"Cold start to ready is {eager / ready:.1f}x faster with the client created in the background")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts measured")
+    main(parser.parse_args())
@@ -17,6 +17,28 @@ class Settings:
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
     
+    # Model Backend Configuration
+    # "gemini" for the real API or "fake" to replay recorded responses offline
+    MODEL_BACKEND: str = os.getenv("MODEL_BACKEND", "gemini")
+    FAKE_MODEL_RECORDINGS: str = os.getenv(
+        "FAKE_MODEL_RECORDINGS",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "corpus", "recordings.jsonl")
+    )
+    # Seconds before the fake model responds, plus optional simulated generation speed
+    FAKE_MODEL_LATENCY: float = float(os.getenv("FAKE_MODEL_LATENCY", "0.5"))
+    FAKE_MODEL_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_MODEL_TOKENS_PER_SECOND", "0"))
+    # JSONL file every model response is appended to; leave empty to disable recording
+    MODEL_RECORD_PATH: str = os.getenv("MODEL_RECORD_PATH", "")
+    
+    # Model Routing Configuration
+    # Comma-separated name=model[:max_input_tokens] routes, lightest first; empty uses GEMINI_MODEL only
+    MODEL_ROUTES: str = os.getenv("MODEL_ROUTES", "")
+    # Hedge a call with a second request once it is slower than this latency percentile of its route
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "1.0"))
+    
     # API Configuration
     API_TITLE: str = "AI Requirements Analyzer API"
     API_VERSION: str = "1.0.0"
@@ -29,13 +51,119 @@ class Settings:
     ]
     CORS_ORIGIN_REGEX: str = r"https://.*\.vercel\.app"
     
+    # Response Compression Configuration (Brotli needs the optional brotli package)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "5"))
+    
     # LLM Configuration
     MAX_TOKENS: int = 16384
     TEMPERATURE: float = 0.7
+    # Size max_output_tokens to the description instead of always using MAX_TOKENS
+    ADAPTIVE_OUTPUT_BUDGET: bool = os.getenv("ADAPTIVE_OUTPUT_BUDGET", "true").lower() == "true"
+    OUTPUT_TOKENS_MIN: int = int(os.getenv("OUTPUT_TOKENS_MIN", "4096"))
+    OUTPUT_TOKENS_PER_INPUT_TOKEN: int = int(os.getenv("OUTPUT_TOKENS_PER_INPUT_TOKEN", "12"))
+    # Send the static instructions as a system instruction, optionally through a Gemini context cache
+    SYSTEM_INSTRUCTION_ENABLED: bool = os.getenv("SYSTEM_INSTRUCTION_ENABLED", "true").lower() == "true"
+    CONTEXT_CACHE_ENABLED: bool = os.getenv("CONTEXT_CACHE_ENABLED", "false").lower() == "true"
+    CONTEXT_CACHE_TTL_SECONDS: int = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "3600"))
+    # USD per million tokens, used for cost estimates in logs and /api/health
+    INPUT_TOKEN_PRICE: float = float(os.getenv("INPUT_TOKEN_PRICE", "0.30"))
+    CACHED_INPUT_TOKEN_PRICE: float = float(os.getenv("CACHED_INPUT_TOKEN_PRICE", "0.075"))
+    OUTPUT_TOKEN_PRICE: float = float(os.getenv("OUTPUT_TOKEN_PRICE", "2.50"))
+    # Default analysis mode: "single" prompt or "parallel" per-section prompts
+    ANALYSIS_MODE: str = os.getenv("ANALYSIS_MODE", "single")
+    # Rounds of section-level repair before giving up on a defective section
+    MAX_REPAIR_ROUNDS: int = int(os.getenv("MAX_REPAIR_ROUNDS", "2"))
+    # Also regenerate sections whose only issues are warnings (e.g. non-Fibonacci story points)
+    REPAIR_WARNINGS: bool = os.getenv("REPAIR_WARNINGS", "false").lower() == "true"
+    # Continuation requests allowed for one truncated response
+    MAX_CONTINUATIONS: int = int(os.getenv("MAX_CONTINUATIONS", "2"))
+    # Rebuild database_schema entries from the tables, indexes and foreign keys parsed from database_schema_sql
+    SCHEMA_RECONCILE_ENABLED: bool = os.getenv("SCHEMA_RECONCILE_ENABLED", "true").lower() == "true"
+    # Seconds /api/schema/inspect may spend running a script on SQLite
+    SCHEMA_SQLITE_TIMEOUT_SECONDS: float = float(os.getenv("SCHEMA_SQLITE_TIMEOUT_SECONDS", "2.0"))
+    
+    # Concurrency Configuration
+    # Maximum number of Gemini calls in flight per worker process
+    MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "32"))
+    
+    # Upstream Rate Limiting Configuration (0 disables a limit)
+    UPSTREAM_REQUESTS_PER_MINUTE: int = int(os.getenv("UPSTREAM_REQUESTS_PER_MINUTE", "1000"))
+    UPSTREAM_TOKENS_PER_MINUTE: int = int(os.getenv("UPSTREAM_TOKENS_PER_MINUTE", "1000000"))
+    # Attempts per upstream call for throttled or unavailable responses
+    UPSTREAM_MAX_ATTEMPTS: int = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "4"))
+    UPSTREAM_BACKOFF_BASE: float = float(os.getenv("UPSTREAM_BACKOFF_BASE", "1.0"))
+    UPSTREAM_BACKOFF_MAX: float = float(os.getenv("UPSTREAM_BACKOFF_MAX", "30.0"))
+    # Consecutive upstream failures that open the circuit, and how long it stays open
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    
+    # Startup Configuration
+    # Create the model clients and open their connections in the background at startup
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    
+    # Production Server Configuration (serve.py)
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    # Worker processes; 0 starts one per available CPU core
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "0"))
+    # Seconds in-flight requests, then running jobs, may take to finish on shutdown
+    SHUTDOWN_GRACE_SECONDS: float = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "30"))
+    
+    # Shared State Configuration (rate limits, metrics and cache shared by worker processes)
+    # SQLite file shared by the workers of one server; leave empty to keep this state per process
+    SHARED_STATE_DB_PATH: str = os.getenv("SHARED_STATE_DB_PATH", "")
+    # Seconds between publications of a worker's metrics for /metrics on the other workers
+    SHARED_METRICS_INTERVAL_SECONDS: float = float(os.getenv("SHARED_METRICS_INTERVAL_SECONDS", "5"))
+    
+    # Response Cache Configuration
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "86400"))
+    # SQLite file for the persistent cache tier; leave empty for memory only, or the shared state file if set
+    CACHE_DB_PATH: str = os.getenv("CACHE_DB_PATH", "")
+    
+    # Spec Store Configuration (SQLite with FTS5 search; writes are batched in the background)
+    SPEC_STORE_ENABLED: bool = os.getenv("SPEC_STORE_ENABLED", "true").lower() == "true"
+    SPEC_STORE_DB_PATH: str = os.getenv("SPEC_STORE_DB_PATH", "specs.db")
+    SPEC_STORE_BATCH_SIZE: int = int(os.getenv("SPEC_STORE_BATCH_SIZE", "50"))
+    SPEC_STORE_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("SPEC_STORE_FLUSH_INTERVAL_SECONDS", "1.0"))
+    # Pending writes held before the oldest are dropped
+    SPEC_STORE_MAX_PENDING: int = int(os.getenv("SPEC_STORE_MAX_PENDING", "1000"))
+    # Age after which stored specifications are deleted; 0 keeps them forever
+    SPEC_STORE_RETENTION_SECONDS: int = int(os.getenv("SPEC_STORE_RETENTION_SECONDS", "2592000"))
+    
+    # Near-Duplicate Lookup Configuration (needs the response cache)
+    SIMILARITY_ENABLED: bool = os.getenv("SIMILARITY_ENABLED", "true").lower() == "true"
+    SIMILARITY_MAX_ENTRIES: int = int(os.getenv("SIMILARITY_MAX_ENTRIES", "100000"))
+    # Serve a cached analysis of a description at least this similar (above 1 disables)
+    SIMILARITY_SERVE_THRESHOLD: float = float(os.getenv("SIMILARITY_SERVE_THRESHOLD", "0.9"))
+    # Similar prior specs listed next to an analysis
+    SIMILAR_SPECS_THRESHOLD: float = float(os.getenv("SIMILAR_SPECS_THRESHOLD", "0.4"))
+    SIMILAR_SPECS_LIMIT: int = int(os.getenv("SIMILAR_SPECS_LIMIT", "3"))
+    
+    # Job Queue Configuration
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+    # "memory" or "sqlite"; SQLite keeps job results across restarts
+    JOB_STORE: str = os.getenv("JOB_STORE", "memory")
+    JOB_DB_PATH: str = os.getenv("JOB_DB_PATH", "jobs.db")
+    JOB_RETENTION_SECONDS: int = int(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+    # Seconds between checks of a SQLite job store for jobs cancelled, left queued or abandoned by other processes;
+    # a running job's lease lapses after five missed checks
+    JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+    
+    # Batch Analysis Configuration
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    # Attempts per batch item before it is reported as failed
+    BATCH_MAX_ATTEMPTS: int = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
     
     def validate(self):
         """Validate that required settings are present."""
-        if not self.GEMINI_API_KEY:
+        if self.MODEL_BACKEND == "gemini" and not self.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         return True
 
@@ -3,21 +3,119 @@ FastAPI backend for AI Requirements Analyzer.
 Main application entry point with API routes and middleware configuration.
 """
 
-from fastapi import FastAPI, HTTPException, status
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import json
+from typing import Dict, Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 import logging
 
 from config import settings
-from models.schemas import AnalyzeRequest, AnalyzeResponse, ErrorResponse
-from services.llm_service import llm_service
+from models.schemas import (
+    AnalyzeRequest,
+    AnalyzeResponse,
+    BatchRequest,
+    ErrorResponse,
+    JobResponse,
+    ReanalyzeRequest,
+    ReanalyzeResponse,
+    SchemaInspectRequest,
+    SchemaInspectResponse,
+    SECTION_ITEM_MODELS,
+    SimilarSpec,
+    SpecListResponse,
+    StreamEventResponse,
+)
+from services.batch import BatchReport, BatchRunner, assign_ids, parse_batch_items
+from services.cache_service import parse_cache_control
+from services.ddl_parser import check_sqlite, parse_ddl, reconcile_tables
+from services.encoding import CompressionMiddleware, EncodedCache, encode_json, json_response
+from services.job_queue import FINISHED_STATUSES, Job, JobQueue, QueueFullError, get_job_queue
+from services.llm_service import LLMService, get_llm_service
+from services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, STAGE_DURATION, registry
+from services.shared_state import get_shared_state, publish_metrics
+from services.upstream import UpstreamError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build the services and start their background tasks; stop them on shutdown.
+    
+    Model clients are created and connected by a background warm-up task, so
+    the server accepts requests without waiting for them. With shared state,
+    this worker's metrics are published for the other workers. On shutdown
+    running jobs get ``SHUTDOWN_GRACE_SECONDS`` to finish, which serve.py sets
+    to what its grace period leaves after in-flight requests, and the rest are
+    re-queued; the spec store then flushes its pending writes.
+    """
+    try:
+        settings.validate()
+    except ValueError as e:
+        logger.error(f"Configuration error: {str(e)}")
+        raise
+    state = get_shared_state()
+    service = get_llm_service()
+    jobs = get_job_queue()
+    logger.info(f"Using model routes: {', '.join(f'{r.name}={r.model_name}' for r in service.router.routes)}")
+    # Workers sharing state share the job store too; serve.py recovers its running jobs
+    await jobs.start(recover=state is None)
+    if service.spec_store is not None:
+        await service.spec_store.start()
+    warm_up = asyncio.create_task(service.warm_up()) if settings.WARMUP_ENABLED else None
+    publisher = (
+        asyncio.create_task(publish_metrics(state, settings.SHARED_METRICS_INTERVAL_SECONDS))
+        if state is not None else None
+    )
+    logger.info("Application started successfully")
+    try:
+        yield
+    finally:
+        for task in (warm_up, publisher):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        await jobs.stop(grace=settings.SHUTDOWN_GRACE_SECONDS)
+        if service.spec_store is not None:
+            await service.spec_store.stop()
+        if state is not None:
+            await asyncio.to_thread(state.publish_metrics, registry.snapshot(gauges=False))
+
+
+async def current_llm_service() -> LLMService:
+    """
+    Dependency providing the shared LLM service.
+    
+    A coroutine, so FastAPI resolves it on the event loop rather than in its
+    thread pool.
+    
+    Returns:
+        LLMService: The process-wide service, created if the lifespan has not run
+    """
+    return get_llm_service()
+
+
+async def current_job_queue() -> JobQueue:
+    """
+    Dependency providing the shared job queue.
+    
+    Returns:
+        JobQueue: The process-wide job queue
+    """
+    return get_job_queue()
+
+
 # Initialize FastAPI application
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.API_TITLE,
     version=settings.API_VERSION,
     description=settings.API_DESCRIPTION,
@@ -33,19 +131,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Spec-Id", "ETag"],
 )
 
+# Compress response bodies with the best encoding the client accepts
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.GZIP_LEVEL,
+        brotli_quality=settings.BROTLI_QUALITY,
+    )
 
-@app.on_event("startup")
-async def startup_event():
-    """Validate configuration on startup."""
-    try:
-        settings.validate()
-        logger.info("Application started successfully")
-        logger.info(f"Using Gemini model: {settings.GEMINI_MODEL}")
-    except ValueError as e:
-        logger.error(f"Configuration error: {str(e)}")
-        raise
+# Record request counts, latency and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Encoded bodies of finished jobs, which no longer change between polls
+finished_job_bodies = EncodedCache()
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """
+    Format per-stage timings as a ``Server-Timing`` header value.
+    
+    Args:
+        timings: Seconds spent per stage
+        
+    Returns:
+        str: Header value with durations in milliseconds
+    """
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
 
 
 @app.get("/", tags=["Health"])
@@ -65,31 +180,79 @@ async def root():
 
 
 @app.get("/api/health", tags=["Health"])
-async def health_check():
+async def health_check(
+    service: LLMService = Depends(current_llm_service),
+    jobs: JobQueue = Depends(current_job_queue)
+):
     """
     Health check endpoint for monitoring.
     
+    Reports numbers this worker keeps in memory and reads no database, so a
+    busy shared store cannot make the health check slow.
+    
+    Args:
+        service: Shared LLM service
+        jobs: Shared job queue
+        
     Returns:
         dict: Detailed health status
     """
+    state = get_shared_state()
     return {
         "status": "healthy",
-        "model": settings.GEMINI_MODEL,
-        "api_configured": bool(settings.GEMINI_API_KEY)
+        "model": service.router.default.model_name,
+        "api_configured": bool(settings.GEMINI_API_KEY),
+        "cache": service.cache.stats() if service.cache is not None else None,
+        "singleflight": service.singleflight.stats(),
+        "repair": service.repair_stats.stats(),
+        "upstream": service.upstream.stats(),
+        "prompt_budget": service.prompt_budget.stats(),
+        "similarity": service.similarity.stats() if service.similarity is not None else None,
+        "routes": service.router.stats(),
+        "jobs": jobs.stats(),
+        "spec_store": service.spec_store.stats() if service.spec_store is not None else None,
+        "shared_state": state.stats() if state is not None else None
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+    
+    With shared state the metrics of every worker process are summed, so a
+    scrape answered by any worker reports the whole server.
+    
+    Returns:
+        PlainTextResponse: Request, pipeline stage, upstream, token and cache
+        metrics in the Prometheus text exposition format
+    """
+    state = get_shared_state()
+    if state is None:
+        return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+    snapshots = await asyncio.to_thread(
+        state.collect_metrics, registry.snapshot(), 3 * settings.SHARED_METRICS_INTERVAL_SECONDS
+    )
+    return PlainTextResponse(registry.render(snapshots), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.post(
     "/api/analyze",
     response_model=AnalyzeResponse,
     responses={
         200: {"description": "Successful analysis"},
         400: {"model": ErrorResponse, "description": "Invalid request"},
-        500: {"model": ErrorResponse, "description": "Server error"}
+        500: {"model": ErrorResponse, "description": "Server error"},
+        503: {"model": ErrorResponse, "description": "Upstream throttled or unavailable; retry after the Retry-After delay"}
     },
     tags=["Analysis"]
 )
-async def analyze_feature(request: AnalyzeRequest):
+async def analyze_feature(
+    request: AnalyzeRequest,
+    http_request: Request,
+    cache_control: Optional[str] = Header(None),
+    service: LLMService = Depends(current_llm_service)
+):
     """
     Analyze a feature description and generate structured technical specifications.
     
@@ -99,11 +262,24 @@ async def analyze_feature(request: AnalyzeRequest):
     - Database schema with SQL
     - Sprint tasks with estimates
     
+    Identical and near-identical descriptions are served from the response
+    cache, and similar earlier analyses are listed in ``similar_specs``. Send
+    ``Cache-Control: no-cache`` to force a fresh generation, or
+    ``Cache-Control: no-store`` to also keep the result out of the cache.
+    
+    With ``mode: "parallel"`` the sections are generated by concurrent
+    section-specific prompts. Per-stage durations are reported in the
+    ``Server-Timing`` response header, and the ``ETag`` header holds a hash
+    of the response body.
+    
     Args:
         request: AnalyzeRequest containing the feature description
+        http_request: Incoming HTTP request
+        cache_control: Optional Cache-Control request header
+        service: Shared LLM service
         
     Returns:
-        AnalyzeResponse: Structured analysis results
+        Response: Structured analysis results as AnalyzeResponse JSON
         
     Raises:
         HTTPException: If analysis fails or validation errors occur
@@ -112,15 +288,37 @@ async def analyze_feature(request: AnalyzeRequest):
         logger.info(f"Received analysis request for feature: {request.feature_description[:100]}...")
         
         # Call LLM service to analyze the feature
-        result = llm_service.analyze_feature(request.feature_description)
+        use_cache, store_in_cache = parse_cache_control(cache_control)
+        timings: Dict[str, float] = {}
+        # Looked up before generating, so the new analysis does not list itself
+        similar = service.similar_specs(request.feature_description)
+        result = await service.analyze_feature(
+            request.feature_description,
+            use_cache=use_cache,
+            store_in_cache=store_in_cache,
+            mode=request.mode,
+            timings=timings,
+            tier=request.tier
+        )
+        headers = {"Server-Timing": format_server_timing(timings)}
+        if service.keeps_specs and store_in_cache:
+            headers["X-Spec-Id"] = service.spec_id(request.feature_description, request.mode, request.tier)
+        logger.info(f"Analysis timings: {format_server_timing(timings)}")
         
         # Validate the response structure
-        llm_service.validate_response(result)
+        with STAGE_DURATION.time(stage="validate"):
+            service.validate_response(result)
         
         logger.info("Analysis completed successfully")
         
         # Return structured response
-        return AnalyzeResponse(**result)
+        with STAGE_DURATION.time(stage="response_model"):
+            return json_response(AnalyzeResponse(**{
+                **result,
+                "similar_specs": [
+                    SimilarSpec(description=match.description, similarity=match.score) for match in similar
+                ],
+            }), http_request, headers=headers)
         
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
@@ -128,6 +326,18 @@ async def analyze_feature(request: AnalyzeRequest):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except UpstreamError as e:
+        logger.error(f"Upstream error: {str(e)}")
+        if e.retry_after is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to analyze feature: {str(e)}"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
         raise HTTPException(
@@ -136,6 +346,576 @@ async def analyze_feature(request: AnalyzeRequest):
         )
 
 
+@app.post(
+    "/api/analyze/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "Newline-delimited StreamEventResponse objects"
+        }
+    },
+    tags=["Analysis"]
+)
+async def analyze_feature_stream(
+    request: AnalyzeRequest,
+    cache_control: Optional[str] = Header(None),
+    service: LLMService = Depends(current_llm_service)
+):
+    """
+    Stream the analysis of a feature description as newline-delimited JSON.
+    
+    Each requirement, API endpoint, database table and sprint task is emitted
+    as soon as the model has finished generating it, validated against its own
+    schema model. The stream ends with a ``done`` event, or an ``error`` event
+    if generation fails part-way.
+    
+    Args:
+        request: AnalyzeRequest containing the feature description
+        cache_control: Optional Cache-Control request header
+        service: Shared LLM service
+        
+    Returns:
+        StreamingResponse: NDJSON stream of StreamEventResponse objects
+    """
+    logger.info(f"Received streaming analysis request for feature: {request.feature_description[:100]}...")
+    use_cache, store_in_cache = parse_cache_control(cache_control)
+
+    def encode(**fields) -> str:
+        return StreamEventResponse(**fields).model_dump_json(exclude_none=True) + "\n"
+
+    async def event_stream():
+        counts = {}
+        try:
+            async for event in service.stream_analysis(
+                request.feature_description,
+                use_cache=use_cache,
+                store_in_cache=store_in_cache,
+                tier=request.tier
+            ):
+                if event.kind == "item":
+                    index = counts.get(event.section, 0)
+                    counts[event.section] = index + 1
+                    item_model = SECTION_ITEM_MODELS.get(event.section)
+                    try:
+                        data = item_model(**event.value).model_dump() if item_model else event.value
+                    except (ValidationError, TypeError) as e:
+                        logger.warning(f"Invalid {event.section} item {index}: {str(e)}")
+                        yield encode(type="error", section=event.section, index=index, detail=str(e))
+                        continue
+                    yield encode(type="item", section=event.section, index=index, data=data)
+                elif event.kind == "section_end":
+                    yield encode(type="section", section=event.section, data={"count": event.value})
+                else:
+                    yield encode(type="field", section=event.section, data=event.value)
+            logger.info("Streaming analysis completed successfully")
+            yield encode(type="done")
+        except Exception as e:
+            logger.error(f"Streaming analysis error: {str(e)}")
+            yield encode(type="error", detail=f"Failed to analyze feature: {str(e)}")
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+@app.post(
+    "/api/analyze/delta",
+    response_model=ReanalyzeResponse,
+    responses={
+        200: {"description": "Updated specification and structured diff"},
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        404: {"model": ErrorResponse, "description": "Unknown or expired previous_id"},
+        500: {"model": ErrorResponse, "description": "Server error"},
+        503: {"model": ErrorResponse, "description": "Upstream throttled or unavailable; retry after the Retry-After delay"}
+    },
+    tags=["Analysis"]
+)
+async def reanalyze_feature(
+    request: ReanalyzeRequest,
+    http_request: Request,
+    cache_control: Optional[str] = Header(None),
+    service: LLMService = Depends(current_llm_service)
+):
+    """
+    Update a specification for an edited feature description.
+    
+    Takes the previous specification, or the ``X-Spec-Id`` of a cached
+    analysis, plus the edited description. The model generates only the
+    added, changed and removed items, which are applied to the previous
+    specification; the response holds the new specification and a structured
+    diff. The new specification is cached under the edited description and
+    its id returned in ``X-Spec-Id``, so edits can be chained.
+    
+    Args:
+        request: ReanalyzeRequest with the edited description and previous specification
+        http_request: Incoming HTTP request
+        cache_control: Optional Cache-Control request header
+        service: Shared LLM service
+        
+    Returns:
+        Response: New specification, diff and token usage as ReanalyzeResponse JSON
+        
+    Raises:
+        HTTPException: If the previous spec id is unknown or re-analysis fails
+    """
+    if request.previous_spec is not None:
+        previous = request.previous_spec.model_dump(exclude={"similar_specs"})
+    else:
+        previous = await service.get_spec(request.previous_id)
+        if previous is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Unknown or expired previous_id; send previous_spec instead"
+            )
+    _, store_in_cache = parse_cache_control(cache_control)
+    try:
+        logger.info(f"Received re-analysis request for feature: {request.feature_description[:100]}...")
+        result = await service.reanalyze(
+            request.feature_description,
+            previous,
+            previous_description=request.previous_description,
+            tier=request.tier,
+            store_in_cache=store_in_cache
+        )
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UpstreamError as e:
+        logger.error(f"Upstream error: {str(e)}")
+        if e.retry_after is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to re-analyze feature: {str(e)}"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        logger.error(f"Re-analysis error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to re-analyze feature: {str(e)}"
+        )
+
+    headers = {"X-Spec-Id": result["spec_id"]} if result["spec_id"] is not None else None
+    logger.info(
+        f"Re-analysis completed ({result['strategy']}): {result['output_tokens']} output tokens "
+        f"for a ~{result['estimated_full_output_tokens']} token specification"
+    )
+    return json_response(ReanalyzeResponse(
+        spec=AnalyzeResponse(**result["spec"]),
+        diff=result["diff"],
+        strategy=result["strategy"],
+        output_tokens=result["output_tokens"],
+        estimated_full_output_tokens=result["estimated_full_output_tokens"]
+    ), http_request, headers=headers)
+
+
+def _spec_page(page) -> SpecListResponse:
+    """
+    Build a page of the spec store listing.
+    
+    Args:
+        page: Summaries and next cursor returned by the spec store
+        
+    Returns:
+        SpecListResponse: The page, with timestamps as datetimes
+    """
+    items, next_cursor = page
+    for item in items:
+        item["created_at"] = datetime.fromtimestamp(item["created_at"], tz=timezone.utc)
+    return SpecListResponse(items=items, next_cursor=next_cursor)
+
+
+@app.get(
+    "/api/specs",
+    response_model=SpecListResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid cursor"},
+        404: {"model": ErrorResponse, "description": "Spec store disabled"}
+    },
+    tags=["Specs"]
+)
+async def list_specs(
+    limit: int = Query(20, ge=1, le=100, description="Specifications per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    service: LLMService = Depends(current_llm_service)
+):
+    """
+    List stored specifications, newest first.
+    
+    Pages are keyset-paginated: pass the ``next_cursor`` of a page to get the
+    next one. Specifications stored meanwhile do not shift later pages.
+    
+    Args:
+        limit: Specifications per page
+        cursor: Cursor of the previous page
+        service: Shared LLM service
+        
+    Returns:
+        SpecListResponse: Summaries and the next page's cursor
+        
+    Raises:
+        HTTPException: If the cursor is invalid or the spec store is disabled
+    """
+    if service.spec_store is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Spec store is disabled")
+    try:
+        page = await asyncio.to_thread(service.spec_store.list, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _spec_page(page)
+
+
+@app.get(
+    "/api/specs/search",
+    response_model=SpecListResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Query without words, or invalid cursor"},
+        404: {"model": ErrorResponse, "description": "Spec store disabled"}
+    },
+    tags=["Specs"]
+)
+async def search_specs(
+    q: str = Query(..., min_length=1, max_length=500, description="Words to search for"),
+    limit: int = Query(20, ge=1, le=100, description="Specifications per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    service: LLMService = Depends(current_llm_service)
+):
+    """
+    Search stored specifications by their description, requirements and sprint tasks.
+    
+    Every word must match the start of a word in the specification. Results
+    are newest first and keyset-paginated like ``GET /api/specs``, each with
+    a snippet of the matching text.
+    
+    Args:
+        q: Words to search for
+        limit: Specifications per page
+        cursor: Cursor of the previous page
+        service: Shared LLM service
+        
+    Returns:
+        SpecListResponse: Matching summaries and the next page's cursor
+        
+    Raises:
+        HTTPException: If the query or cursor is invalid or the spec store is disabled
+    """
+    if service.spec_store is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Spec store is disabled")
+    try:
+        page = await asyncio.to_thread(service.spec_store.search, q, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _spec_page(page)
+
+
+@app.get(
+    "/api/specs/{spec_id}",
+    response_model=AnalyzeResponse,
+    responses={
+        200: {"description": "Cached analysis"},
+        304: {"description": "The client's copy, named in If-None-Match, is current"},
+        404: {"model": ErrorResponse, "description": "Unknown or expired spec_id"}
+    },
+    tags=["Specs"]
+)
+async def get_spec(spec_id: str, request: Request, service: LLMService = Depends(current_llm_service)):
+    """
+    Fetch a cached or stored analysis by the ``X-Spec-Id`` returned with it.
+    
+    The response carries an ``ETag``; re-fetching with ``If-None-Match``
+    returns 304 Not Modified while the analysis is unchanged.
+    
+    Args:
+        spec_id: Identifier from the ``X-Spec-Id`` header of an analysis
+        request: Incoming HTTP request
+        service: Shared LLM service
+        
+    Returns:
+        Response: The analysis as AnalyzeResponse JSON, or 304 Not Modified
+        
+    Raises:
+        HTTPException: If the spec id is unknown or expired
+    """
+    spec = await service.get_spec(spec_id)
+    if spec is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired spec_id")
+    return json_response(AnalyzeResponse(**spec), request)
+
+
+@app.post(
+    "/api/schema/inspect",
+    response_model=SchemaInspectResponse,
+    responses={
+        200: {"description": "Parsed schema, reconciled database_schema and SQLite check"},
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        404: {"model": ErrorResponse, "description": "Unknown or expired spec_id"}
+    },
+    tags=["Schema"]
+)
+async def inspect_schema(request: SchemaInspectRequest, service: LLMService = Depends(current_llm_service)):
+    """
+    Parse a SQL schema script into tables, columns, foreign keys and indexes.
+    
+    The script is given directly or as the ``X-Spec-Id`` of a cached
+    analysis. ``database_schema`` entries are reconciled with the parsed
+    tables, and the script is optionally run on an in-memory SQLite database
+    to check that it executes.
+    
+    Args:
+        request: SchemaInspectRequest with the script or spec id
+        service: Shared LLM service
+        
+    Returns:
+        SchemaInspectResponse: Normalized schema and checks
+        
+    Raises:
+        HTTPException: If the spec id is unknown or its analysis has no SQL
+    """
+    sql = request.sql
+    entries = request.database_schema
+    if request.spec_id is not None:
+        spec = await service.get_spec(request.spec_id)
+        if spec is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired spec_id")
+        sql = spec.get("database_schema_sql")
+        if not isinstance(sql, str) or not sql.strip():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Analysis has no database_schema_sql")
+        if entries is None:
+            entries = spec.get("database_schema")
+
+    def inspect() -> Dict:
+        # Parsing and the SQLite check are CPU-bound, so they run off the event loop
+        schema = parse_ddl(sql)
+        result = {**schema.to_dict(), "database_schema": reconcile_tables(schema, entries or [])}
+        if request.check_sqlite:
+            statements, errors = check_sqlite(sql, timeout=settings.SCHEMA_SQLITE_TIMEOUT_SECONDS)
+            result["sqlite"] = {
+                "ok": not errors,
+                "statements": statements,
+                "errors": [error._asdict() for error in errors],
+            }
+        return result
+
+    with STAGE_DURATION.time(stage="schema_inspect"):
+        result = await asyncio.to_thread(inspect)
+    logger.info(
+        f"Inspected schema: {len(result['tables'])} table(s), {len(result['indexes'])} index(es), "
+        f"{len(result['errors'])} parse error(s)"
+    )
+    return SchemaInspectResponse(**result)
+
+
+@app.post(
+    "/api/analyze/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "One result line per item in completion order, then a report line"
+        },
+        400: {"model": ErrorResponse, "description": "Invalid batch"}
+    },
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": BatchRequest.model_json_schema()},
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            },
+            "required": True
+        }
+    },
+    tags=["Analysis"]
+)
+async def analyze_batch(request: Request, service: LLMService = Depends(current_llm_service)):
+    """
+    Analyze a backlog of feature descriptions.
+    
+    The body is a ``BatchRequest``, a JSON array of ``AnalyzeRequest`` objects,
+    or (with ``Content-Type: application/x-ndjson``) one request per line. Items
+    run with bounded concurrency and are retried individually; rate-limit errors
+    pause the whole batch. Results stream back as NDJSON in completion order,
+    each tagged with its item ``id``, followed by a final ``report`` line with
+    per-item latency and failures. To resume an interrupted batch, resend it
+    with the ids of the items already received in ``completed_ids``.
+    
+    Args:
+        request: Incoming request with the batch body
+        service: Shared LLM service
+        
+    Returns:
+        StreamingResponse: NDJSON stream of result records and the report
+        
+    Raises:
+        HTTPException: If the batch body is invalid or too large
+    """
+    body = (await request.body()).decode("utf-8")
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            batch = BatchRequest(items=parse_batch_items(body.splitlines()))
+        else:
+            payload = json.loads(body)
+            batch = BatchRequest(items=payload) if isinstance(payload, list) else BatchRequest(**payload)
+        assign_ids(batch.items)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if len(batch.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch has {len(batch.items)} items; the limit is {settings.BATCH_MAX_ITEMS}"
+        )
+
+    completed = set(batch.completed_ids)
+    runner = BatchRunner(
+        service,
+        concurrency=batch.concurrency or settings.BATCH_CONCURRENCY,
+        max_attempts=settings.BATCH_MAX_ATTEMPTS
+    )
+    report = BatchReport(
+        total=len(batch.items),
+        skipped=sum(1 for item in batch.items if item.id in completed)
+    )
+    logger.info(f"Received batch of {len(batch.items)} items ({report.skipped} already completed)")
+
+    async def result_stream():
+        async for record in runner.run(batch.items, report, completed):
+            yield json.dumps({"type": "result", **record}) + "\n"
+        summary = report.to_dict()
+        logger.info(f"Batch finished: {summary['succeeded']} succeeded, {summary['failed']} failed")
+        yield json.dumps({"type": "report", **summary}) + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+def _job_response(job: Job) -> JobResponse:
+    """
+    Convert a job record into its API representation.
+    
+    Args:
+        job: Job record
+        
+    Returns:
+        JobResponse: Job status with timestamps and outcome
+    """
+    def timestamp(value: Optional[float]) -> Optional[datetime]:
+        return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+    return JobResponse(
+        job_id=job.id,
+        status=job.status.value,
+        created_at=timestamp(job.created_at),
+        started_at=timestamp(job.started_at),
+        finished_at=timestamp(job.finished_at),
+        result=job.result,
+        error=job.error
+    )
+
+
+@app.post(
+    "/api/jobs",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        202: {"description": "Job accepted"},
+        400: {"model": ErrorResponse, "description": "Unknown model tier"},
+        429: {"model": ErrorResponse, "description": "Job queue is full; retry after the Retry-After delay"}
+    },
+    tags=["Jobs"]
+)
+async def create_job(request: AnalyzeRequest, jobs: JobQueue = Depends(current_job_queue)):
+    """
+    Submit a feature description for analysis in the background.
+    
+    Returns immediately with a job id; poll ``GET /api/jobs/{job_id}`` for the result.
+    
+    Args:
+        request: AnalyzeRequest containing the feature description
+        jobs: Shared job queue
+        
+    Returns:
+        JobResponse: The queued job
+        
+    Raises:
+        HTTPException: 400 for an unknown tier, 429 with a Retry-After header if the queue is full
+    """
+    try:
+        job = await jobs.submit(request.feature_description, mode=request.mode, tier=request.tier)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except QueueFullError as e:
+        logger.warning(f"Rejecting job, queue full (retry after {e.retry_after}s)")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    logger.info(f"Queued job {job.id} for feature: {request.feature_description[:100]}...")
+    return _job_response(job)
+
+
+@app.get(
+    "/api/jobs/{job_id}",
+    response_model=JobResponse,
+    responses={404: {"model": ErrorResponse, "description": "Unknown job"}},
+    tags=["Jobs"]
+)
+async def get_job(job_id: str, request: Request, jobs: JobQueue = Depends(current_job_queue)):
+    """
+    Get the status of a job, including its result once it has succeeded.
+    
+    The response carries an ``ETag``; polling with ``If-None-Match`` returns
+    304 Not Modified while the job is unchanged. Finished jobs are serialized
+    once and their body reused for later polls.
+    
+    Args:
+        job_id: Job identifier returned by ``POST /api/jobs``
+        request: Incoming HTTP request
+        jobs: Shared job queue
+        
+    Returns:
+        Response: Current job state as JobResponse JSON, or 304 Not Modified
+    """
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    body = finished_job_bodies.get(job_id) if job.status in FINISHED_STATUSES else None
+    if body is None:
+        body = encode_json(_job_response(job))
+        if job.status in FINISHED_STATUSES:
+            finished_job_bodies.set(job_id, body)
+    return json_response(body, request)
+
+
+@app.delete(
+    "/api/jobs/{job_id}",
+    response_model=JobResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "Unknown job"},
+        409: {"model": ErrorResponse, "description": "Job already finished"}
+    },
+    tags=["Jobs"]
+)
+async def cancel_job(job_id: str, jobs: JobQueue = Depends(current_job_queue)):
+    """
+    Cancel a queued or running job.
+    
+    Args:
+        job_id: Job identifier returned by ``POST /api/jobs``
+        jobs: Shared job queue
+        
+    Returns:
+        JobResponse: The cancelled job
+    """
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {job.status.value}")
+    return _job_response(await jobs.cancel(job_id))
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """
@@ -156,6 +936,7 @@ async def global_exception_handler(request, exc):
 
 
 if __name__ == "__main__":
+    # Development server with auto-reload; run serve.py in production
     import uvicorn
     uvicorn.run(
         "main:app",
@@ -3,8 +3,9 @@ Pydantic models for request/response validation.
 Defines the structure of API inputs and outputs.
 """
 
-from typing import List, Optional, Union, Any
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Dict, List, Literal, Optional, Union, Any
+from pydantic import BaseModel, Field, model_validator
 
 
 class AnalyzeRequest(BaseModel):
@@ -17,6 +18,40 @@ class AnalyzeRequest(BaseModel):
         description="Natural language description of the feature to analyze",
         example="Build a login system with JWT, role-based access, email verification, and forgot password."
     )
+    mode: Optional[Literal["single", "parallel"]] = Field(
+        None,
+        description="Analysis mode: one prompt for the whole spec, or concurrent per-section prompts (defaults to server setting)"
+    )
+    tier: Optional[str] = Field(
+        None,
+        description="Model route to use, by name (defaults to routing by description size)"
+    )
+
+
+class BatchItem(AnalyzeRequest):
+    """A single feature description within a batch."""
+    
+    id: Optional[str] = Field(
+        None,
+        max_length=200,
+        description="Caller-chosen item identifier echoed in the results (defaults to the item position)"
+    )
+
+
+class BatchRequest(BaseModel):
+    """Request model for batch analysis."""
+    
+    items: List[BatchItem] = Field(..., min_length=1, description="Feature descriptions to analyze")
+    concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        le=32,
+        description="Maximum number of items analyzed at once (defaults to server setting)"
+    )
+    completed_ids: List[str] = Field(
+        default_factory=list,
+        description="Ids finished by a previous run, which are skipped when resuming"
+    )
 
 
 class Requirement(BaseModel):
@@ -59,6 +94,13 @@ class SprintTask(BaseModel):
     sprint: int = Field(..., description="Sprint number")
 
 
+class SimilarSpec(BaseModel):
+    """A previously analyzed feature similar to the requested one."""
+    
+    description: str = Field(..., description="Feature description of the prior analysis")
+    similarity: float = Field(..., ge=0, le=1, description="Estimated similarity of the two descriptions")
+
+
 class AnalyzeResponse(BaseModel):
     """Response model containing structured analysis results."""
     
@@ -67,6 +109,10 @@ class AnalyzeResponse(BaseModel):
     database_schema: List[DatabaseTable] = Field(..., description="Database table definitions")
     database_schema_sql: str = Field(..., description="Complete SQL schema creation script")
     sprint_tasks: List[SprintTask] = Field(..., description="Organized sprint tasks")
+    similar_specs: List[SimilarSpec] = Field(
+        default_factory=list,
+        description="Previously analyzed features with similar descriptions"
+    )
     
     class Config:
         json_schema_extra = {
@@ -115,8 +161,241 @@ class AnalyzeResponse(BaseModel):
         }
 
 
+class ReanalyzeRequest(BaseModel):
+    """Request model for re-analyzing an edited feature description."""
+    
+    feature_description: str = Field(
+        ...,
+        min_length=10,
+        max_length=5000,
+        description="Edited natural language description of the feature"
+    )
+    previous_description: Optional[str] = Field(
+        None,
+        max_length=5000,
+        description="Description the previous specification was generated for, if known"
+    )
+    previous_spec: Optional[AnalyzeResponse] = Field(None, description="Previous specification")
+    previous_id: Optional[str] = Field(
+        None,
+        max_length=128,
+        description="X-Spec-Id of a previous analysis, instead of previous_spec"
+    )
+    tier: Optional[str] = Field(
+        None,
+        description="Model route to use, by name (defaults to routing by description size)"
+    )
+
+    @model_validator(mode="after")
+    def check_previous(self) -> "ReanalyzeRequest":
+        """Require exactly one of previous_spec and previous_id."""
+        if (self.previous_spec is None) == (self.previous_id is None):
+            raise ValueError("Provide exactly one of previous_spec and previous_id")
+        return self
+
+
+class ChangedItem(BaseModel):
+    """An item present in both specifications with different content."""
+    
+    key: str = Field(..., description="Item identifier, e.g. REQ-001, POST /api/login, users or TASK-001")
+    fields: List[str] = Field(..., description="Fields whose values changed")
+    before: Dict[str, Any] = Field(..., description="Item in the previous specification")
+    after: Dict[str, Any] = Field(..., description="Item in the new specification")
+
+
+class SectionDiff(BaseModel):
+    """Changes to one list section of a specification."""
+    
+    added: List[Dict[str, Any]] = Field(default_factory=list, description="New items")
+    changed: List[ChangedItem] = Field(default_factory=list, description="Modified items")
+    removed: List[Dict[str, Any]] = Field(default_factory=list, description="Items no longer present")
+
+
+class SpecDiff(BaseModel):
+    """Structured difference between two specifications."""
+    
+    requirements: SectionDiff
+    api_design: SectionDiff
+    database_schema: SectionDiff
+    sprint_tasks: SectionDiff
+    database_schema_sql_changed: bool = Field(..., description="Whether the SQL schema script changed")
+
+
+class ReanalyzeResponse(BaseModel):
+    """Updated specification and its difference from the previous one."""
+    
+    spec: AnalyzeResponse = Field(..., description="Specification for the edited description")
+    diff: SpecDiff = Field(..., description="Changes from the previous specification")
+    strategy: Literal["delta", "full"] = Field(
+        ...,
+        description="Whether only the changes were generated, or the spec was regenerated in full"
+    )
+    output_tokens: int = Field(..., description="Output tokens spent on the re-analysis")
+    estimated_full_output_tokens: int = Field(..., description="Estimated output tokens of the whole specification")
+
+
+class SpecCounts(BaseModel):
+    """Number of items in each list section of a stored specification."""
+    
+    requirements: int
+    api_design: int
+    database_schema: int
+    sprint_tasks: int
+
+
+class SpecSummary(BaseModel):
+    """A stored specification as listed by the spec store endpoints."""
+    
+    id: str = Field(..., description="Spec id, usable with GET /api/specs/{spec_id}")
+    description: str = Field(..., description="Feature description the specification was generated for")
+    mode: Optional[str] = Field(None, description="Analysis mode")
+    tier: Optional[str] = Field(None, description="Model route that generated it")
+    model: Optional[str] = Field(None, description="Model that generated it")
+    created_at: datetime = Field(..., description="When the specification was generated")
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent per generation stage")
+    counts: SpecCounts
+    snippet: Optional[str] = Field(None, description="Matching text with the search terms in [brackets], for searches")
+
+
+class SpecListResponse(BaseModel):
+    """A page of stored specifications."""
+    
+    items: List[SpecSummary]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page; absent on the last page")
+
+
+class SchemaInspectRequest(BaseModel):
+    """Request model for inspecting a SQL schema script."""
+    
+    sql: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=1_000_000,
+        description="SQL DDL script to inspect"
+    )
+    spec_id: Optional[str] = Field(
+        None,
+        max_length=128,
+        description="X-Spec-Id of a previous analysis whose database_schema_sql to inspect, instead of sql"
+    )
+    database_schema: Optional[List[Dict[str, Any]]] = Field(
+        None,
+        description="database_schema entries to reconcile with the script (defaults to the analysis' own with spec_id)"
+    )
+    check_sqlite: bool = Field(True, description="Whether to run the script on an in-memory SQLite database")
+
+    @model_validator(mode="after")
+    def check_source(self) -> "SchemaInspectRequest":
+        """Require exactly one of sql and spec_id."""
+        if (self.sql is None) == (self.spec_id is None):
+            raise ValueError("Provide exactly one of sql and spec_id")
+        return self
+
+
+class SchemaColumn(BaseModel):
+    """A column parsed from a CREATE TABLE statement."""
+    
+    name: str
+    type: str = Field(..., description="Column type as written, e.g. VARCHAR(255)")
+    nullable: bool
+    primary_key: bool
+    unique: bool
+    default: Optional[str] = Field(None, description="Default expression as written")
+
+
+class SchemaForeignKey(BaseModel):
+    """A foreign key constraint."""
+    
+    columns: List[str]
+    ref_table: str
+    ref_columns: List[str]
+    name: Optional[str] = None
+    on_delete: Optional[str] = None
+    on_update: Optional[str] = None
+
+
+class SchemaTable(BaseModel):
+    """A table parsed from the script."""
+    
+    name: str
+    columns: List[SchemaColumn]
+    primary_key: List[str]
+    foreign_keys: List[SchemaForeignKey]
+    indexes: List[str] = Field(..., description="Names of the indexes on the table")
+    referenced_by: List[str] = Field(..., description="Tables with foreign keys to this table")
+
+
+class SchemaIndex(BaseModel):
+    """An index parsed from the script."""
+    
+    name: str
+    table: str
+    columns: List[str] = Field(..., description="Indexed columns, or the expression as written")
+    unique: bool
+
+
+class SQLiteStatementError(BaseModel):
+    """A statement SQLite rejected."""
+    
+    statement: int = Field(..., description="Position of the statement in the script, from 1")
+    sql: str
+    error: str
+
+
+class SQLiteCheck(BaseModel):
+    """Outcome of running the script on an in-memory SQLite database."""
+    
+    ok: bool = Field(..., description="Whether every statement ran")
+    statements: int
+    errors: List[SQLiteStatementError]
+
+
+class SchemaInspectResponse(BaseModel):
+    """Normalized schema parsed from a SQL script."""
+    
+    tables: List[SchemaTable]
+    indexes: List[SchemaIndex]
+    statements: int = Field(..., description="Statements in the script")
+    skipped_statements: List[str] = Field(..., description="Statements that define no table or index, e.g. CREATE EXTENSION")
+    errors: List[str] = Field(..., description="Statements that could not be parsed")
+    dangling_foreign_keys: List[str] = Field(..., description="Foreign keys to tables or columns the script does not define")
+    database_schema: List[Dict[str, Any]] = Field(..., description="database_schema entries reconciled with the script")
+    sqlite: Optional[SQLiteCheck] = Field(None, description="SQLite check, if requested")
+
+
+class JobResponse(BaseModel):
+    """Status and, once finished, outcome of an analysis job."""
+    
+    job_id: str = Field(..., description="Unique job identifier")
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"] = Field(..., description="Current job status")
+    created_at: datetime = Field(..., description="When the job was submitted")
+    started_at: Optional[datetime] = Field(None, description="When a worker picked up the job")
+    finished_at: Optional[datetime] = Field(None, description="When the job reached a final status")
+    result: Optional[AnalyzeResponse] = Field(None, description="Analysis results, once succeeded")
+    error: Optional[str] = Field(None, description="Failure details, once failed")
+
+
 class ErrorResponse(BaseModel):
     """Error response model."""
     
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
+
+
+class StreamEventResponse(BaseModel):
+    """A single NDJSON line emitted by the streaming analysis endpoint."""
+    
+    type: str = Field(..., description="Event type: item, field, section, error or done")
+    section: Optional[str] = Field(None, description="Specification section the event belongs to")
+    index: Optional[int] = Field(None, description="Position of the item within its section")
+    data: Optional[Any] = Field(None, description="Validated item, field value or summary")
+    detail: Optional[str] = Field(None, description="Error details for error events")
+
+
+# Schema model used to validate each streamed item, keyed by section
+SECTION_ITEM_MODELS = {
+    "requirements": Requirement,
+    "api_design": APIEndpoint,
+    "database_schema": DatabaseTable,
+    "sprint_tasks": SprintTask,
+}
@@ -0,0 +1,118 @@
+"""
+Production server for the AI Requirements Analyzer backend.
+Runs the API in several uvicorn worker processes, one per available CPU core by
+default. The workers share upstream rate limits, metrics, the response cache
+and the job store through SQLite files, so no external service is needed. On
+shutdown each worker stops accepting connections, lets in-flight analyses and
+running jobs finish, and flushes its pending writes before exiting.
+
+Usage (from the backend directory):
+    python serve.py
+    python serve.py --workers 4 --port 8080
+"""
+
+import argparse
+import logging
+import os
+
+import uvicorn
+
+from config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shared state file used when several workers run and SHARED_STATE_DB_PATH is unset
+DEFAULT_SHARED_STATE_DB_PATH = "state.db"
+
+
+def available_cores() -> int:
+    """
+    Number of CPU cores this process may run on.
+
+    Returns:
+        int: Cores in the process's CPU affinity mask, or all cores where it is unknown
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS and Windows
+        return os.cpu_count() or 1
+
+
+def _set(name: str, value: str) -> None:
+    """Change a setting here and, through the environment, in the worker processes."""
+    setattr(settings, name, type(getattr(settings, name))(value))
+    os.environ[name] = value
+
+
+def prepare_shared_state(workers: int) -> None:
+    """
+    Point the workers at stores they can share and reset what a previous run left.
+
+    With several workers, state kept per process would be wrong: each worker
+    would spend the whole upstream budget and jobs submitted to one would be
+    unknown to the others. The shared state file defaults to
+    ``DEFAULT_SHARED_STATE_DB_PATH`` and the job store to SQLite.
+
+    Args:
+        workers: Number of worker processes
+    """
+    if workers > 1:
+        if not settings.SHARED_STATE_DB_PATH:
+            _set("SHARED_STATE_DB_PATH", DEFAULT_SHARED_STATE_DB_PATH)
+        if settings.JOB_STORE != "sqlite":
+            logger.warning(f"JOB_STORE={settings.JOB_STORE} is per process; using sqlite at {settings.JOB_DB_PATH}")
+            _set("JOB_STORE", "sqlite")
+    if not settings.SHARED_STATE_DB_PATH:
+        return
+
+    from services.job_queue import SQLiteJobStore
+    from services.shared_state import SharedState
+
+    SharedState(settings.SHARED_STATE_DB_PATH).reset()
+    if settings.JOB_STORE == "sqlite":
+        # The workers leave running jobs alone, as they may belong to a live worker
+        requeued = SQLiteJobStore(settings.JOB_DB_PATH).requeue_running()
+        if requeued:
+            logger.info(f"Re-queued {requeued} jobs interrupted by the previous shutdown")
+    logger.info(f"Workers share state through {settings.SHARED_STATE_DB_PATH}")
+
+
+def main(args) -> None:
+    try:
+        settings.validate()
+    except ValueError as e:
+        logger.error(f"Configuration error: {str(e)}")
+        raise SystemExit(1)
+    workers = args.workers or available_cores()
+    # One budget for the whole shutdown: uvicorn gives in-flight requests the first
+    # half, then each worker's lifespan gives running jobs the rest. Jobs keep running
+    # while requests drain, so they get between half and all of the grace period.
+    request_grace = args.grace / 2
+    _set("SHUTDOWN_GRACE_SECONDS", str(args.grace - request_grace))
+    prepare_shared_state(workers)
+    logger.info(f"Starting {workers} workers on {args.host}:{args.port}")
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_graceful_shutdown=request_grace,
+        log_level="info"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.SERVER_HOST, help="Interface to bind")
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT, help="Port to bind")
+    parser.add_argument(
+        "--workers", type=int, default=settings.SERVER_WORKERS,
+        help="Worker processes; 0 starts one per available CPU core"
+    )
+    parser.add_argument(
+        "--grace", type=float, default=settings.SHUTDOWN_GRACE_SECONDS,
+        help="Seconds the whole shutdown may take: half for in-flight requests, the rest for running jobs"
+    )
+    main(parser.parse_args())
@@ -0,0 +1,384 @@
+"""
+Model backends for the LLM service.
+The service talks to the model through ``generate_content_async`` only, so the
+Gemini client can be swapped for a local fake that replays recorded responses
+(including malformed and truncated ones) with configurable latency, for
+offline benchmarks and load tests.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marker of prompts built by repair.build_continuation_prompt
+CONTINUATION_MARKER = "Your previous response was cut off before the JSON object was complete."
+
+# Size of the chunks a fake streaming response is split into
+STREAM_CHUNK_CHARS = 256
+
+
+class ModelBackend(ABC):
+    """Interface of a generative model, mirroring ``genai.GenerativeModel``."""
+
+    name = ""
+
+    @abstractmethod
+    async def generate_content_async(
+        self,
+        prompt: str,
+        generation_config: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        system_instruction: Optional[str] = None
+    ) -> Any:
+        """
+        Generate a response for a prompt.
+
+        Args:
+            prompt: Prompt to send (the request-specific part if a system instruction is given)
+            generation_config: Temperature, token limit and response MIME type
+            stream: Whether to return an async iterator of chunks
+            system_instruction: Static instructions sent separately from the prompt
+
+        Returns:
+            A response exposing ``text``, ``candidates[0].finish_reason`` and
+            ``usage_metadata``, or an async iterator of such chunks when streaming
+        """
+
+    async def warm_up(self) -> None:
+        """Prepare the backend before the first request; a no-op unless overridden."""
+
+
+class GeminiBackend(ModelBackend):
+    """Google Gemini through the ``google-generativeai`` client."""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str, api_key: str, context_cache_ttl: Optional[int] = None):
+        """
+        Keep the Gemini configuration; the client is created on first use.
+
+        Args:
+            model_name: Gemini model to call
+            api_key: Google API key
+            context_cache_ttl: If set, system instructions are uploaded once as
+                a context cache with this lifetime in seconds
+        """
+        self.model_name = model_name
+        self.api_key = api_key
+        self.context_cache_ttl = context_cache_ttl
+        self._genai: Any = None
+        self._model: Any = None
+        self._client_lock = threading.Lock()
+        # Client per system instruction: (model, expiry time of its context cache or None)
+        self._models: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._cache_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def model(self) -> Any:
+        """
+        Client without a system instruction.
+
+        ``google.generativeai`` takes most of a second to import, so it is
+        imported and configured here, on first use, rather than at startup.
+        """
+        if self._model is None:
+            with self._client_lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self.api_key)
+                    self._genai = genai
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    async def warm_up(self) -> None:
+        """Create the client off the event loop and open its connection with a token count, which is free."""
+        model = await asyncio.to_thread(lambda: self.model)
+        await model.count_tokens_async("warm-up")
+        logger.info(f"Gemini client for {self.model_name} ready")
+
+    async def _model_for(self, system_instruction: Optional[str]) -> Any:
+        """Client for a system instruction, creating its context cache if enabled."""
+        if self._model is None:
+            # First call without warm-up: keep the import off the event loop
+            await asyncio.to_thread(lambda: self.model)
+        if system_instruction is None:
+            return self.model
+        entry = self._models.get(system_instruction)
+        # Renew a context cache a minute before the provider expires it
+        if entry is not None and (entry[1] is None or entry[1] - 60 > time.time()):
+            return entry[0]
+
+        if self._cache_lock is None:
+            self._cache_lock = asyncio.Lock()
+        async with self._cache_lock:
+            entry = self._models.get(system_instruction)
+            if entry is not None and (entry[1] is None or entry[1] - 60 > time.time()):
+                return entry[0]
+            model, expires = None, None
+            if self.context_cache_ttl:
+                try:
+                    cached = await asyncio.to_thread(
+                        self._genai.caching.CachedContent.create,
+                        model=self.model_name,
+                        system_instruction=system_instruction,
+                        ttl=datetime.timedelta(seconds=self.context_cache_ttl),
+                    )
+                    model = self._genai.GenerativeModel.from_cached_content(cached_content=cached)
+                    expires = time.time() + self.context_cache_ttl
+                    logger.info(f"Created context cache {cached.name} for system instruction")
+                except Exception as e:
+                    # Models without caching, or instructions below the minimum cacheable size
+                    logger.warning(f"Context cache unavailable, sending system instruction inline: {str(e)}")
+            if model is None:
+                model = self._genai.GenerativeModel(self.model_name, system_instruction=system_instruction)
+            self._models[system_instruction] = (model, expires)
+            return model
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False, system_instruction=None):
+        model = await self._model_for(system_instruction)
+        return await model.generate_content_async(
+            prompt,
+            generation_config=generation_config,
+            stream=stream
+        )
+
+
+class Recording(NamedTuple):
+    """A recorded model response."""
+
+    text: str
+    finish_reason: str = "STOP"
+    truncate_at: Optional[int] = None
+    """If set, the first reply stops here with ``MAX_TOKENS`` and the rest is
+    returned to the continuation prompt."""
+
+
+def load_recordings(path: str) -> List[Recording]:
+    """
+    Load recorded responses from a JSONL file.
+
+    Each line is an object with ``text`` and optionally ``finish_reason`` and
+    ``truncate_at``.
+
+    Args:
+        path: JSONL file of recordings
+
+    Returns:
+        List[Recording]: Recordings in file order
+
+    Raises:
+        ValueError: If the file holds no recordings
+    """
+    recordings = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                recordings.append(Recording(
+                    text=data["text"],
+                    finish_reason=data.get("finish_reason") or "STOP",
+                    truncate_at=data.get("truncate_at"),
+                ))
+    if not recordings:
+        raise ValueError(f"No recordings in {path}")
+    return recordings
+
+
+class _FinishReason:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class _Candidate:
+    def __init__(self, finish_reason: Optional[str]):
+        self.finish_reason = _FinishReason(finish_reason) if finish_reason else None
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, output_tokens: int, cached_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.cached_content_token_count = cached_tokens
+
+
+class FakeResponse:
+    """Response object shaped like the Gemini client's."""
+
+    def __init__(self, text: str, finish_reason: Optional[str], prompt_tokens: int = 0, cached_tokens: int = 0):
+        self.text = text
+        self.candidates = [_Candidate(finish_reason)]
+        self.usage_metadata = _Usage(prompt_tokens, max(1, len(text) // 4), cached_tokens)
+
+
+class FakeBackend(ModelBackend):
+    """
+    Offline model that replays recorded responses.
+
+    Responses are served in recording order, cycling, so a run of N calls
+    always sees the same mix of clean, malformed and truncated outputs.
+    Continuation prompts receive the remainder of the truncated recording
+    they continue. Latency is a fixed delay plus an optional per-token
+    generation time. A system instruction seen before is reported as cached
+    prompt tokens, like the provider's implicit prefix caching.
+    """
+
+    name = "fake"
+
+    def __init__(self, recordings: List[Recording], latency: float = 0.0, tokens_per_second: float = 0.0):
+        """
+        Initialize the fake.
+
+        Args:
+            recordings: Responses to replay
+            latency: Seconds before the first token of every response
+            tokens_per_second: Simulated generation speed; 0 returns the whole
+                response right after ``latency``
+        """
+        self.recordings = recordings
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+        self._seen_instructions = set()
+        self._lock = threading.Lock()
+
+    def _next_recording(self) -> Recording:
+        with self._lock:
+            recording = self.recordings[self.calls % len(self.recordings)]
+            self.calls += 1
+        return recording
+
+    def _reply(self, prompt: str, system_instruction: Optional[str]) -> FakeResponse:
+        """Pick the response for a prompt."""
+        prompt_tokens = max(1, len(prompt) // 4)
+        cached_tokens = 0
+        if system_instruction:
+            prompt_tokens += len(system_instruction) // 4
+            with self._lock:
+                if system_instruction in self._seen_instructions:
+                    cached_tokens = len(system_instruction) // 4
+                self._seen_instructions.add(system_instruction)
+        if CONTINUATION_MARKER in prompt:
+            for recording in self.recordings:
+                if recording.truncate_at and recording.text[:recording.truncate_at] in prompt:
+                    return FakeResponse(recording.text[recording.truncate_at:], "STOP", prompt_tokens, cached_tokens)
+        recording = self._next_recording()
+        if recording.truncate_at:
+            return FakeResponse(recording.text[:recording.truncate_at], "MAX_TOKENS", prompt_tokens, cached_tokens)
+        return FakeResponse(recording.text, recording.finish_reason, prompt_tokens, cached_tokens)
+
+    def _generation_time(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return (len(text) / 4) / self.tokens_per_second
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False, system_instruction=None):
+        reply = self._reply(prompt, system_instruction)
+        await asyncio.sleep(self.latency)
+        if stream:
+            return self._stream(reply)
+        await asyncio.sleep(self._generation_time(reply.text))
+        return reply
+
+    async def _stream(self, reply: FakeResponse) -> AsyncIterator[FakeResponse]:
+        """Yield the reply in chunks paced by the simulated generation speed."""
+        text = reply.text
+        for start in range(0, len(text), STREAM_CHUNK_CHARS):
+            chunk = text[start:start + STREAM_CHUNK_CHARS]
+            await asyncio.sleep(self._generation_time(chunk))
+            last = start + STREAM_CHUNK_CHARS >= len(text)
+            yield FakeResponse(chunk, reply.candidates[0].finish_reason.name if last else None)
+
+
+# Shared by every recorder, since each model route wraps its own backend
+_record_lock = threading.Lock()
+
+
+class RecordingBackend(ModelBackend):
+    """Wraps another backend and appends every non-streamed response to a JSONL file."""
+
+    def __init__(self, backend: ModelBackend, path: str):
+        """
+        Initialize the recorder.
+
+        Args:
+            backend: Backend whose responses are recorded
+            path: JSONL file the recordings are appended to
+        """
+        self.backend = backend
+        self.path = path
+        self.name = backend.name
+
+    async def warm_up(self) -> None:
+        await self.backend.warm_up()
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False, system_instruction=None):
+        response = await self.backend.generate_content_async(
+            prompt,
+            generation_config=generation_config,
+            stream=stream,
+            system_instruction=system_instruction
+        )
+        if not stream:
+            try:
+                reason = response.candidates[0].finish_reason
+                finish_reason = getattr(reason, "name", str(reason))
+            except (AttributeError, IndexError, TypeError):
+                finish_reason = None
+            record = {
+                "prompt_sha256": hashlib.sha256(f"{system_instruction or ''}{prompt}".encode("utf-8")).hexdigest(),
+                "text": response.text,
+                "finish_reason": finish_reason,
+            }
+            with _record_lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        return response
+
+
+def create_backend(model_name: Optional[str] = None) -> ModelBackend:
+    """
+    Build the model backend selected by ``settings.MODEL_BACKEND``.
+
+    Args:
+        model_name: Model to call; defaults to ``settings.GEMINI_MODEL``
+
+    Returns:
+        ModelBackend: Gemini or fake backend, recording responses if
+        ``settings.MODEL_RECORD_PATH`` is set
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if settings.MODEL_BACKEND == "gemini":
+        backend: ModelBackend = GeminiBackend(
+            model_name or settings.GEMINI_MODEL,
+            settings.GEMINI_API_KEY,
+            context_cache_ttl=settings.CONTEXT_CACHE_TTL_SECONDS if settings.CONTEXT_CACHE_ENABLED else None,
+        )
+    elif settings.MODEL_BACKEND == "fake":
+        recordings = load_recordings(settings.FAKE_MODEL_RECORDINGS)
+        backend = FakeBackend(
+            recordings,
+            latency=settings.FAKE_MODEL_LATENCY,
+            tokens_per_second=settings.FAKE_MODEL_TOKENS_PER_SECOND,
+        )
+        logger.info(f"Using fake model backend with {len(recordings)} recordings from {settings.FAKE_MODEL_RECORDINGS}")
+    else:
+        raise ValueError(f"Unknown model backend: {settings.MODEL_BACKEND}")
+
+    if settings.MODEL_RECORD_PATH:
+        logger.info(f"Recording model responses to {settings.MODEL_RECORD_PATH}")
+        backend = RecordingBackend(backend, settings.MODEL_RECORD_PATH)
+    return backend
@@ -0,0 +1,265 @@
+"""
+Bulk analysis of feature backlogs.
+Runs many analyses with bounded concurrency and per-item retry, backing off
+globally when the upstream API reports rate limiting, and reports each result
+as soon as it completes.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from models.schemas import AnalyzeResponse, BatchItem
+from services.llm_service import LLMService
+from services.upstream import ErrorKind, classify_error
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Base delay before retrying a failed item; doubled on every attempt
+RETRY_BASE_DELAY = 1.0
+# Pause applied to every worker after a rate-limit error; doubled while limits persist
+RATE_LIMIT_BASE_DELAY = 5.0
+RATE_LIMIT_MAX_DELAY = 60.0
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """
+    Whether an error means the upstream API is throttling requests.
+
+    Args:
+        error: Exception raised by an analysis
+
+    Returns:
+        bool: True for rate-limit errors and an open circuit breaker
+    """
+    return classify_error(error) in (ErrorKind.RATE_LIMITED, ErrorKind.CIRCUIT_OPEN)
+
+
+def parse_batch_items(lines: Iterable[str]) -> List[BatchItem]:
+    """
+    Parse a JSONL backlog into batch items.
+
+    Items without an ``id`` are numbered by their line, so re-reading the same
+    file yields the same ids and a run can be resumed from its output.
+
+    Args:
+        lines: JSONL lines, each an AnalyzeRequest object with an optional ``id``
+
+    Returns:
+        List[BatchItem]: Parsed items in input order
+
+    Raises:
+        ValueError: If a line is not valid JSON, not an object or not a valid request
+    """
+    items = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number} is not valid JSON: {e}")
+        if not isinstance(data, dict):
+            raise ValueError(f"Line {number} is not a JSON object")
+        data.setdefault("id", f"item-{number}")
+        items.append(BatchItem(**data))
+    return items
+
+
+def assign_ids(items: List[BatchItem]) -> List[BatchItem]:
+    """
+    Give every item without an ``id`` one based on its position.
+
+    Args:
+        items: Batch items in input order
+
+    Returns:
+        List[BatchItem]: Items with ids, in the same order
+
+    Raises:
+        ValueError: If two items share an id
+    """
+    seen: Set[str] = set()
+    for index, item in enumerate(items, start=1):
+        if item.id is None:
+            item.id = f"item-{index}"
+        if item.id in seen:
+            raise ValueError(f"Duplicate batch item id: {item.id}")
+        seen.add(item.id)
+    return items
+
+
+class BatchReport:
+    """Summary of a batch run: counts, per-item latency and failures."""
+
+    def __init__(self, total: int, skipped: int = 0):
+        """
+        Initialize an empty report.
+
+        Args:
+            total: Number of items in the batch, including skipped ones
+            skipped: Items skipped because a previous run completed them
+        """
+        self.total = total
+        self.skipped = skipped
+        self.started = time.perf_counter()
+        self.latencies: Dict[str, float] = {}
+        self.failures: Dict[str, str] = {}
+        self.retries = 0
+        self.rate_limited = 0
+
+    def record(self, record: Dict[str, Any]) -> None:
+        """Add one item result to the report."""
+        self.latencies[record["id"]] = record["latency_s"]
+        self.retries += record["attempts"] - 1
+        if record["status"] != "ok":
+            self.failures[record["id"]] = record["error"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Render the report.
+
+        Returns:
+            dict: Counts, latency percentiles, per-item latencies and failures
+        """
+        latencies = sorted(self.latencies.values())
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "succeeded": len(self.latencies) - len(self.failures),
+            "failed": len(self.failures),
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "wall_time_s": round(time.perf_counter() - self.started, 3),
+            "latency_p50_s": percentile(0.5),
+            "latency_p95_s": percentile(0.95),
+            "latency_max_s": latencies[-1] if latencies else None,
+            "latencies_s": self.latencies,
+            "failures": self.failures,
+        }
+
+
+class BatchRunner:
+    """Runs a list of analyses with bounded concurrency and per-item retry."""
+
+    def __init__(self, service: LLMService, concurrency: int, max_attempts: int):
+        """
+        Initialize the runner.
+
+        Args:
+            service: LLM service that performs the analyses
+            concurrency: Maximum number of items analyzed at once
+            max_attempts: Attempts per item before it is reported as failed
+        """
+        self.service = service
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self._resume_at = 0.0
+        self._rate_limit_delay = RATE_LIMIT_BASE_DELAY
+
+    async def run(
+        self,
+        items: List[BatchItem],
+        report: BatchReport,
+        completed: Optional[Set[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze every item and yield results in completion order.
+
+        Args:
+            items: Items to analyze, each with an id
+            report: Report updated as results arrive
+            completed: Ids finished by a previous run, which are skipped
+
+        Yields:
+            dict: One result record per item, with id, status, attempts,
+            latency and either the analysis result or the error
+        """
+        pending: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            if completed and item.id in completed:
+                continue
+            pending.put_nowait(item)
+        results: asyncio.Queue = asyncio.Queue()
+        remaining = pending.qsize()
+        logger.info(f"Starting batch of {remaining} items with concurrency {self.concurrency}")
+
+        async def worker():
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await results.put(await self._run_item(item, report))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, remaining))]
+        try:
+            for _ in range(remaining):
+                record = await results.get()
+                report.record(record)
+                yield record
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _run_item(self, item: BatchItem, report: BatchReport) -> Dict[str, Any]:
+        """Analyze one item, retrying failures with exponential backoff."""
+        started = time.perf_counter()
+        error: Optional[Exception] = None
+        for attempt in range(1, self.max_attempts + 1):
+            await self._wait_for_rate_limit()
+            try:
+                result = await self.service.analyze_feature(item.feature_description, mode=item.mode, tier=item.tier)
+                self.service.validate_response(result)
+                self._rate_limit_delay = RATE_LIMIT_BASE_DELAY
+                return {
+                    "id": item.id,
+                    "status": "ok",
+                    "attempts": attempt,
+                    "latency_s": round(time.perf_counter() - started, 3),
+                    "result": AnalyzeResponse(**result).model_dump(),
+                }
+            except Exception as e:
+                error = e
+                if is_rate_limited(e):
+                    report.rate_limited += 1
+                    self._pause_for_rate_limit(getattr(e, "retry_after", None))
+                    logger.warning(f"Batch item {item.id} rate limited (attempt {attempt})")
+                else:
+                    logger.warning(f"Batch item {item.id} failed (attempt {attempt}): {str(e)}")
+                    if attempt < self.max_attempts:
+                        delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                        await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+        return {
+            "id": item.id,
+            "status": "error",
+            "attempts": self.max_attempts,
+            "latency_s": round(time.perf_counter() - started, 3),
+            "error": str(error),
+        }
+
+    def _pause_for_rate_limit(self, retry_after: Optional[float] = None) -> None:
+        """Hold back every worker until the rate-limit pause (at least ``retry_after``) has passed."""
+        resume_at = time.monotonic() + max(self._rate_limit_delay, retry_after or 0)
+        if resume_at > self._resume_at:
+            self._resume_at = resume_at
+            self._rate_limit_delay = min(RATE_LIMIT_MAX_DELAY, self._rate_limit_delay * 2)
+
+    async def _wait_for_rate_limit(self) -> None:
+        """Sleep while a rate-limit pause is in effect."""
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,242 @@
+"""
+Response cache for LLM analyses.
+Content-addressed two-tier cache: an in-memory LRU with TTL eviction in front of
+an optional SQLite store that survives restarts and is shared by the worker
+processes that open the same file. The event loop reads and writes the memory
+tier directly and the SQLite tier in a worker thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_description(feature_description: str) -> str:
+    """
+    Normalize a feature description for cache keying.
+
+    Collapses whitespace and case so that trivially different submissions of the
+    same description (re-pastes, trailing newlines) share a cache entry.
+    """
+    return " ".join(feature_description.split()).casefold()
+
+
+def make_cache_key(feature_description: str, model: str, temperature: float, prompt_version: str) -> str:
+    """
+    Build the content address for an analysis.
+
+    Args:
+        feature_description: Raw feature description
+        model: Gemini model name
+        temperature: Sampling temperature
+        prompt_version: Version of the prompt template
+
+    Returns:
+        str: Hex SHA-256 digest identifying the analysis
+    """
+    material = "\x1f".join([
+        normalize_description(feature_description),
+        model,
+        repr(float(temperature)),
+        prompt_version,
+    ])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def parse_cache_control(header: Optional[str]) -> Tuple[bool, bool]:
+    """
+    Interpret a request ``Cache-Control`` header.
+
+    ``no-cache`` skips the lookup but still stores the fresh result;
+    ``no-store`` skips both the lookup and the store.
+
+    Returns:
+        Tuple[bool, bool]: (read from cache, write to cache)
+    """
+    if not header:
+        return True, True
+    directives = {part.strip().lower() for part in header.split(",")}
+    if "no-store" in directives:
+        return False, False
+    if "no-cache" in directives:
+        return False, True
+    return True, True
+
+
+class ResponseCache:
+    """In-memory LRU + TTL cache with an optional persistent SQLite tier."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum entries held in memory before LRU eviction
+            ttl_seconds: Time-to-live for every entry, in seconds
+            db_path: SQLite file for the persistent tier, or None to disable it
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Separate from the memory tier's lock, so a slow disk read never holds up the event loop
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes_since_purge = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            # WAL lets other worker processes read while one of them writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            logger.info(f"Persistent response cache enabled at {db_path}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis.
+
+        Returns:
+            Optional[Dict]: A fresh copy of the cached result, or None on a miss
+        """
+        now = time.time()
+        value = self._from_memory(key, now)
+        if value is None and self._db is not None:
+            value = self._from_disk(key, now)
+        return self._found(value)
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        ``get`` for the event loop: only the SQLite tier is read in a worker thread.
+
+        Returns:
+            Optional[Dict]: A fresh copy of the cached result, or None on a miss
+        """
+        now = time.time()
+        value = self._from_memory(key, now)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._from_disk, key, now)
+        return self._found(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store an analysis in every enabled tier."""
+        expires_at, serialized = self._to_memory(key, value)
+        if self._db is not None:
+            self._to_disk(key, serialized, expires_at)
+
+    async def set_async(self, key: str, value: Dict[str, Any]) -> None:
+        """``set`` for the event loop: only the SQLite tier is written in a worker thread."""
+        expires_at, serialized = self._to_memory(key, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._to_disk, key, serialized, expires_at)
+
+    def _from_memory(self, key: str, now: float) -> Optional[str]:
+        """Serialized entry from the memory tier, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            return None
+
+    def _from_disk(self, key: str, now: float) -> Optional[str]:
+        """Serialized entry from the SQLite tier, or None; a hit is promoted to the memory tier."""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        with self._lock:
+            self._remember(key, row[1], row[0])
+            self.hits += 1
+            self.disk_hits += 1
+        return row[0]
+
+    def _found(self, value: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Decode a looked up entry, counting a miss if there was none."""
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        return json.loads(value)
+
+    def _to_memory(self, key: str, value: Dict[str, Any]) -> Tuple[float, str]:
+        """Insert into the memory tier; returns the expiry and serialized value for the SQLite tier."""
+        expires_at = time.time() + self.ttl_seconds
+        serialized = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            self._remember(key, expires_at, serialized)
+            self.stores += 1
+        return expires_at, serialized
+
+    def _to_disk(self, key: str, serialized: str, expires_at: float) -> None:
+        """Write to the SQLite tier, purging expired rows every 100 writes."""
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, serialized, expires_at),
+            )
+            self._writes_since_purge += 1
+            if self._writes_since_purge >= 100:
+                self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+                self._writes_since_purge = 0
+            self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, serialized: str) -> None:
+        """Insert into the memory tier, evicting least recently used entries. Caller holds the lock."""
+        self._entries[key] = (expires_at, serialized)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached entry from all tiers."""
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache counters.
+
+        Returns:
+            dict: Hit/miss counters and current memory occupancy
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,733 @@
+"""
+Lightweight SQL DDL parser.
+Turns the CREATE TABLE, CREATE INDEX and ALTER TABLE ... ADD statements of a
+generated schema script into a normalized in-memory schema with lookup maps for
+tables, columns, foreign keys and indexes, reconciles the ``database_schema``
+section with it, and checks that the script runs on SQLite.
+"""
+
+import functools
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One alternative per token kind; every character of the script belongs to exactly one token
+_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+    |(?P<word>[A-Za-z_][\w$]*)
+    |(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+    |(?P<string>'[^']*(?:''[^']*)*'?)
+    |(?P<dollar>\$(?P<tag>[A-Za-z_]*)\$.*?(?:\$(?P=tag)\$|\Z))
+    |(?P<quoted>"[^"]*(?:""[^"]*)*"?|`[^`]*`?|\[[^\]]*\]?)
+    |(?P<number>\d+(?:\.\d*)?)
+    |(?P<punct>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Words that end a column's type and start its constraints
+_COLUMN_CONSTRAINTS = frozenset((
+    "CONSTRAINT", "PRIMARY", "NOT", "NULL", "UNIQUE", "DEFAULT", "REFERENCES", "CHECK", "COLLATE",
+    "GENERATED", "AUTO_INCREMENT", "AUTOINCREMENT", "IDENTITY", "ON", "COMMENT", "AS",
+))
+
+# Words that start a table constraint instead of a column definition
+_TABLE_CONSTRAINTS = frozenset((
+    "CONSTRAINT", "PRIMARY", "FOREIGN", "UNIQUE", "CHECK", "EXCLUDE", "KEY", "INDEX", "FULLTEXT", "SPATIAL",
+))
+
+# Referential actions a foreign key may take ON DELETE or ON UPDATE
+_FK_ACTIONS = (("CASCADE",), ("RESTRICT",), ("SET", "NULL"), ("SET", "DEFAULT"), ("NO", "ACTION"))
+
+
+class _Token(NamedTuple):
+    kind: str
+    text: str
+    """Identifier with quotes removed, upper-cased keyword, or the raw text of other tokens."""
+    start: int
+    end: int
+
+
+class _ParseError(Exception):
+    """Raised for a statement the parser cannot follow."""
+
+
+def _tokenize(sql: str) -> List[List[_Token]]:
+    """Split a script into statements of tokens, dropping whitespace and comments."""
+    statements: List[List[_Token]] = []
+    current: List[_Token] = []
+    make = _Token._make
+    for match in _TOKEN.finditer(sql):
+        kind = match.lastgroup
+        if kind == "space" or kind == "comment":
+            continue
+        text = match.group()
+        if kind == "word":
+            text = text.upper()
+        elif kind == "punct":
+            if text == ";":
+                if current:
+                    statements.append(current)
+                    current = []
+                continue
+        elif kind == "quoted":
+            text = text[1:-1] if len(text) > 1 and text[-1] in "\"`]" else text[1:]
+            text = text.replace('""', '"')
+        elif kind == "tag":
+            kind = "dollar"
+        current.append(make((kind, text, match.start(), match.end())))
+    if current:
+        statements.append(current)
+    return statements
+
+
+def normalize_name(name: str) -> str:
+    """
+    Lookup key of a table, column or index name.
+
+    Args:
+        name: Name as written, possibly quoted or schema-qualified
+
+    Returns:
+        str: Unqualified, unquoted, lower-case name
+    """
+    name = name.strip()
+    if "." in name and not name.startswith(('"', "`", "[")):
+        name = name.rsplit(".", 1)[1]
+    return name.strip("\"`[] ").lower()
+
+
+@dataclass
+class ForeignKey:
+    """A foreign key constraint."""
+
+    columns: List[str]
+    ref_table: str
+    ref_columns: List[str]
+    name: Optional[str] = None
+    on_delete: Optional[str] = None
+    on_update: Optional[str] = None
+
+    def describe(self) -> str:
+        """Relationship in the ``column -> table(column)`` form used by ``database_schema``."""
+        return f"{', '.join(self.columns)} -> {self.ref_table}({', '.join(self.ref_columns)})"
+
+
+@dataclass
+class Column:
+    """A table column."""
+
+    name: str
+    type: str = ""
+    nullable: bool = True
+    primary_key: bool = False
+    unique: bool = False
+    default: Optional[str] = None
+    references: Optional[ForeignKey] = None
+
+    def constraints(self) -> str:
+        """Column constraints in the form used by ``database_schema``."""
+        parts = []
+        if self.primary_key:
+            parts.append("PRIMARY KEY")
+        elif not self.nullable:
+            parts.append("NOT NULL")
+        if self.unique and not self.primary_key:
+            parts.append("UNIQUE")
+        if self.default is not None:
+            parts.append(f"DEFAULT {self.default}")
+        if self.references is not None:
+            ref = self.references
+            parts.append(f"REFERENCES {ref.ref_table}({', '.join(ref.ref_columns)})")
+        return " ".join(parts)
+
+
+@dataclass
+class Index:
+    """An index on a table."""
+
+    name: str
+    table: str
+    columns: List[str]
+    unique: bool = False
+
+
+@dataclass
+class Table:
+    """A table with its columns and constraints."""
+
+    name: str
+    columns: Dict[str, Column] = field(default_factory=dict)
+    """Columns by normalized name, in definition order."""
+    primary_key: List[str] = field(default_factory=list)
+    foreign_keys: List[ForeignKey] = field(default_factory=list)
+    unique: List[List[str]] = field(default_factory=list)
+    indexes: List[str] = field(default_factory=list)
+    """Names of the indexes on the table."""
+
+    def column(self, name: str) -> Optional[Column]:
+        """Look up a column by name."""
+        return self.columns.get(normalize_name(name))
+
+
+@dataclass
+class Schema:
+    """Tables and indexes defined by a DDL script, with lookup maps."""
+
+    tables: Dict[str, Table] = field(default_factory=dict)
+    """Tables by normalized name, in definition order."""
+    indexes: Dict[str, Index] = field(default_factory=dict)
+    """Indexes by normalized name."""
+    referenced_by: Dict[str, List[Tuple[str, ForeignKey]]] = field(default_factory=dict)
+    """Foreign keys pointing at each table (by normalized name), with the table that holds them."""
+    statements: int = 0
+    skipped: List[str] = field(default_factory=list)
+    """Statements that define no table or index, e.g. ``CREATE EXTENSION``."""
+    errors: List[str] = field(default_factory=list)
+    """Statements that could not be parsed, or contradicted earlier ones."""
+
+    def table(self, name: str) -> Optional[Table]:
+        """Look up a table by name."""
+        return self.tables.get(normalize_name(name))
+
+    def column(self, table: str, column: str) -> Optional[Column]:
+        """Look up a column by table and column name."""
+        found = self.table(table)
+        return found.column(column) if found is not None else None
+
+    def index(self, name: str) -> Optional[Index]:
+        """Look up an index by name."""
+        return self.indexes.get(normalize_name(name))
+
+    def dangling_foreign_keys(self) -> List[Tuple[str, ForeignKey]]:
+        """Foreign keys referencing a table or column the script does not define."""
+        dangling = []
+        for table in self.tables.values():
+            for foreign_key in table.foreign_keys:
+                target = self.table(foreign_key.ref_table)
+                if target is None or any(target.column(column) is None for column in foreign_key.ref_columns):
+                    dangling.append((table.name, foreign_key))
+        return dangling
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Plain representation of the schema.
+
+        Returns:
+            dict: Tables, indexes, statement counts, skipped statements,
+            parse errors and dangling foreign keys
+        """
+        def foreign_key(fk: ForeignKey) -> Dict[str, Any]:
+            return {
+                "columns": fk.columns,
+                "ref_table": fk.ref_table,
+                "ref_columns": fk.ref_columns,
+                "name": fk.name,
+                "on_delete": fk.on_delete,
+                "on_update": fk.on_update,
+            }
+
+        return {
+            "tables": [
+                {
+                    "name": table.name,
+                    "columns": [
+                        {
+                            "name": column.name,
+                            "type": column.type,
+                            "nullable": column.nullable,
+                            "primary_key": column.primary_key,
+                            "unique": column.unique,
+                            "default": column.default,
+                        }
+                        for column in table.columns.values()
+                    ],
+                    "primary_key": table.primary_key,
+                    "foreign_keys": [foreign_key(fk) for fk in table.foreign_keys],
+                    "indexes": table.indexes,
+                    "referenced_by": sorted({name for name, _ in self.referenced_by.get(key, ())}),
+                }
+                for key, table in self.tables.items()
+            ],
+            "indexes": [
+                {"name": index.name, "table": index.table, "columns": index.columns, "unique": index.unique}
+                for index in self.indexes.values()
+            ],
+            "statements": self.statements,
+            "skipped_statements": self.skipped,
+            "errors": self.errors,
+            "dangling_foreign_keys": [f"{table}.{fk.describe()}" for table, fk in self.dangling_foreign_keys()],
+        }
+
+
+class _StatementParser:
+    """Recursive-descent parser over the tokens of one statement."""
+
+    def __init__(self, sql: str, tokens: List[_Token], schema: Schema):
+        self.sql = sql
+        self.tokens = tokens
+        self.end = len(tokens)
+        self.schema = schema
+        self.pos = 0
+
+    # Token helpers
+
+    def peek(self, offset: int = 0) -> Optional[_Token]:
+        index = self.pos + offset
+        return self.tokens[index] if index < self.end else None
+
+    def at(self, *words: str) -> bool:
+        """Whether the next tokens are the given keywords or punctuation."""
+        pos = self.pos
+        if pos + len(words) > self.end:
+            return False
+        for token, word in zip(self.tokens[pos:pos + len(words)], words):
+            if token.text != word or token.kind == "quoted":
+                return False
+        return True
+
+    def accept(self, *words: str) -> bool:
+        """Consume the given keywords or punctuation if they come next."""
+        if self.at(*words):
+            self.pos += len(words)
+            return True
+        return False
+
+    def expect(self, word: str) -> None:
+        if not self.accept(word):
+            token = self.peek()
+            raise _ParseError(f"expected '{word}', found {token.text if token else 'end of statement'}")
+
+    def ident(self) -> str:
+        """Consume a possibly qualified name and return its last part as written."""
+        name = self._name_part()
+        while self.at(".") and self.peek(1) is not None and self.peek(1).kind in ("word", "quoted"):
+            self.pos += 1
+            name = self._name_part()
+        return name
+
+    def _name_part(self) -> str:
+        token = self.peek()
+        if token is None or token.kind not in ("word", "quoted"):
+            raise _ParseError(f"expected a name, found {token.text if token else 'end of statement'}")
+        self.pos += 1
+        return token.text if token.kind == "quoted" else self.sql[token.start:token.end]
+
+    def at_boundary(self) -> bool:
+        """Whether the next token ends a list element."""
+        if self.pos >= self.end:
+            return True
+        token = self.tokens[self.pos]
+        return token.kind == "punct" and token.text in (",", ")")
+
+    def skip_group(self) -> None:
+        """Consume a parenthesized group, including nested groups."""
+        self.expect("(")
+        depth = 1
+        while depth:
+            token = self.peek()
+            if token is None:
+                raise _ParseError("unbalanced parentheses")
+            self.pos += 1
+            if token.kind == "punct":
+                if token.text == "(":
+                    depth += 1
+                elif token.text == ")":
+                    depth -= 1
+
+    def skip_term(self) -> None:
+        """Consume one token, and the group that follows it as a call or type argument."""
+        if self.at("("):
+            self.skip_group()
+            return
+        self.pos += 1
+        if self.at("("):
+            self.skip_group()
+
+    def skip_element(self) -> None:
+        """Consume the rest of a list element."""
+        while not self.at_boundary():
+            self.skip_term()
+
+    def text_from(self, start_pos: int) -> str:
+        """Source text of the tokens consumed since ``start_pos``, with whitespace collapsed."""
+        if start_pos >= self.pos:
+            return ""
+        text = self.sql[self.tokens[start_pos].start:self.tokens[self.pos - 1].end]
+        return " ".join(text.split())
+
+    def name_list(self) -> List[str]:
+        """Consume ``(a, b DESC, lower(c))``, returning each element's column name or expression."""
+        self.expect("(")
+        names = []
+        while True:
+            start = self.pos
+            token = self.peek()
+            if token is not None and token.kind in ("word", "quoted") and not (
+                self.peek(1) is not None and self.peek(1).text in ("(", ".")
+            ):
+                names.append(self._name_part())
+                self.skip_element()
+            else:
+                self.skip_element()
+                names.append(self.text_from(start))
+            if self.accept(")"):
+                return names
+            self.expect(",")
+
+    # Statements
+
+    def parse(self) -> None:
+        """Parse the statement into the schema."""
+        self.schema.statements += 1
+        if self.accept("CREATE"):
+            self.accept("OR", "REPLACE")
+            while self.peek() is not None and self.peek().text in (
+                "GLOBAL", "LOCAL", "TEMP", "TEMPORARY", "UNLOGGED", "VIRTUAL"
+            ):
+                self.pos += 1
+            if self.accept("TABLE"):
+                self.create_table()
+                return
+            unique = self.accept("UNIQUE")
+            while self.peek() is not None and self.peek().text in ("CLUSTERED", "NONCLUSTERED", "FULLTEXT", "SPATIAL"):
+                self.pos += 1
+            if self.accept("INDEX"):
+                self.create_index(unique)
+                return
+        elif self.accept("ALTER", "TABLE"):
+            self.alter_table()
+            return
+        self.schema.skipped.append(" ".join(token.text for token in self.tokens[:max(2, self.pos + 1)]))
+
+    def create_table(self) -> None:
+        self.accept("IF", "NOT", "EXISTS")
+        name = self.ident()
+        key = normalize_name(name)
+        if key in self.schema.tables:
+            raise _ParseError(f"table {name} is already defined")
+        table = Table(name)
+        if self.accept("("):
+            while True:
+                self.table_element(table)
+                if self.accept(")"):
+                    break
+                self.expect(",")
+        # Without a column list this is CREATE TABLE ... AS SELECT or LIKE, with no columns to read
+        self.schema.tables[key] = table
+
+    def table_element(self, table: Table) -> None:
+        token = self.peek()
+        if token is not None and token.kind == "word" and token.text in _TABLE_CONSTRAINTS and not (
+            token.text in ("KEY", "INDEX") and self.peek(1) is not None and self.peek(1).kind == "word"
+            and self.peek(2) is not None and self.peek(2).text not in ("(",)
+        ):
+            self.table_constraint(table)
+        else:
+            self.column_definition(table)
+
+    def column_definition(self, table: Table) -> None:
+        column = Column(self.ident())
+        start = self.pos
+        while not self.at_boundary():
+            token = self.peek()
+            if token.kind == "word" and token.text in _COLUMN_CONSTRAINTS:
+                break
+            self.skip_term()
+        column.type = self.text_from(start)
+
+        while not self.at_boundary():
+            if self.accept("CONSTRAINT"):
+                self.ident()
+            elif self.accept("PRIMARY", "KEY"):
+                column.primary_key = True
+                column.nullable = False
+                table.primary_key = [column.name]
+            elif self.accept("NOT", "NULL"):
+                column.nullable = False
+            elif self.accept("NULL"):
+                column.nullable = True
+            elif self.accept("UNIQUE"):
+                self.accept("KEY")
+                column.unique = True
+                table.unique.append([column.name])
+            elif self.accept("DEFAULT"):
+                start = self.pos
+                self.skip_term()
+                while not self.at_boundary() and not (
+                    self.peek().kind == "word" and self.peek().text in _COLUMN_CONSTRAINTS
+                ):
+                    self.skip_term()
+                column.default = self.text_from(start)
+            elif self.accept("REFERENCES"):
+                column.references = self.references([column.name])
+                table.foreign_keys.append(column.references)
+            else:
+                self.skip_term()
+        table.columns[normalize_name(column.name)] = column
+
+    def table_constraint(self, table: Table) -> None:
+        name = None
+        if self.accept("CONSTRAINT"):
+            name = self.ident()
+        if self.accept("PRIMARY", "KEY"):
+            table.primary_key = self.name_list()
+            for column_name in table.primary_key:
+                column = table.column(column_name)
+                if column is not None:
+                    column.primary_key = True
+                    column.nullable = False
+        elif self.accept("FOREIGN", "KEY"):
+            columns = self.name_list()
+            self.expect("REFERENCES")
+            foreign_key = self.references(columns, name)
+            table.foreign_keys.append(foreign_key)
+            if len(columns) == 1 and table.column(columns[0]) is not None:
+                table.column(columns[0]).references = foreign_key
+        elif self.accept("UNIQUE"):
+            self.accept("KEY") or self.accept("INDEX")
+            if not self.at("("):
+                name = self.ident()
+            columns = self.name_list()
+            table.unique.append(columns)
+            if len(columns) == 1 and table.column(columns[0]) is not None:
+                table.column(columns[0]).unique = True
+            if name:
+                self.add_index(Index(name, table.name, columns, unique=True), table)
+        elif self.peek() is not None and self.peek().text in ("KEY", "INDEX", "FULLTEXT", "SPATIAL"):
+            # MySQL inline index: KEY name (columns)
+            while self.peek() is not None and self.peek().text in ("KEY", "INDEX", "FULLTEXT", "SPATIAL"):
+                self.pos += 1
+            index_name = None if self.at("(") else self.ident()
+            columns = self.name_list()
+            self.add_index(Index(index_name or f"{table.name}_{'_'.join(columns)}_idx", table.name, columns), table)
+        self.skip_element()
+
+    def references(self, columns: List[str], name: Optional[str] = None) -> ForeignKey:
+        """Parse the target and actions of a foreign key after REFERENCES."""
+        foreign_key = ForeignKey(columns, self.ident(), [], name)
+        if self.at("("):
+            foreign_key.ref_columns = self.name_list()
+        while self.at("ON", "DELETE") or self.at("ON", "UPDATE"):
+            event = self.tokens[self.pos + 1].text
+            self.pos += 2
+            start = self.pos
+            if not any(self.accept(*words) for words in _FK_ACTIONS):
+                token = self.peek()
+                raise _ParseError(f"expected an ON {event} action, found {token.text if token else 'end of statement'}")
+            action = self.text_from(start).upper()
+            if event == "DELETE":
+                foreign_key.on_delete = action
+            else:
+                foreign_key.on_update = action
+        return foreign_key
+
+    def create_index(self, unique: bool) -> None:
+        self.accept("CONCURRENTLY")
+        self.accept("IF", "NOT", "EXISTS")
+        name = None if self.at("ON") else self.ident()
+        self.expect("ON")
+        self.accept("ONLY")
+        table = self.ident()
+        if self.accept("USING"):
+            self.pos += 1
+        columns = self.name_list()
+        self.add_index(Index(name or f"{table}_{'_'.join(columns)}_idx", table, columns, unique))
+
+    def add_index(self, index: Index, table: Optional[Table] = None) -> None:
+        """Register an index on ``table``, or on the already defined table it names."""
+        key = normalize_name(index.name)
+        if key in self.schema.indexes:
+            raise _ParseError(f"index {index.name} is already defined")
+        table = table or self.schema.table(index.table)
+        if table is None:
+            raise _ParseError(f"index {index.name} is on unknown table {index.table}")
+        self.schema.indexes[key] = index
+        table.indexes.append(index.name)
+        if index.unique and len(index.columns) == 1 and table.column(index.columns[0]) is not None:
+            table.column(index.columns[0]).unique = True
+
+    def alter_table(self) -> None:
+        self.accept("IF", "EXISTS")
+        self.accept("ONLY")
+        name = self.ident()
+        table = self.schema.table(name)
+        if table is None:
+            raise _ParseError(f"ALTER TABLE on unknown table {name}")
+        while self.peek() is not None:
+            if self.accept("ADD"):
+                if self.peek() is not None and self.peek().text in _TABLE_CONSTRAINTS:
+                    self.table_constraint(table)
+                else:
+                    self.accept("COLUMN")
+                    self.accept("IF", "NOT", "EXISTS")
+                    self.column_definition(table)
+            else:
+                self.skip_element()
+            if not self.accept(","):
+                break
+
+
+def parse_ddl(sql: str) -> Schema:
+    """
+    Parse the tables and indexes a DDL script defines.
+
+    CREATE TABLE, CREATE INDEX and ALTER TABLE ... ADD statements are read in
+    the common PostgreSQL, MySQL and SQLite dialects; other statements are
+    listed in ``skipped``. A statement that cannot be parsed is recorded in
+    ``errors`` and the rest of the script is still read. Parsing takes time
+    linear in the length of the script.
+
+    Args:
+        sql: SQL DDL script
+
+    Returns:
+        Schema: Tables, indexes and lookup maps
+    """
+    schema = Schema()
+    for number, tokens in enumerate(_tokenize(sql), start=1):
+        try:
+            _StatementParser(sql, tokens, schema).parse()
+        except _ParseError as e:
+            snippet = " ".join(sql[tokens[0].start:tokens[-1].end].split())[:80]
+            schema.errors.append(f"statement {number} ({snippet}): {e}")
+
+    for table in schema.tables.values():
+        for foreign_key in table.foreign_keys:
+            if not foreign_key.ref_columns:
+                # A reference without columns points at the target's primary key
+                target = schema.table(foreign_key.ref_table)
+                if target is not None:
+                    foreign_key.ref_columns = list(target.primary_key)
+            schema.referenced_by.setdefault(normalize_name(foreign_key.ref_table), []).append((table.name, foreign_key))
+    return schema
+
+
+@functools.lru_cache(maxsize=64)
+def cached_schema(sql: str) -> Schema:
+    """
+    ``parse_ddl`` memoized for scripts that are validated and reconciled repeatedly.
+
+    Args:
+        sql: SQL DDL script
+
+    Returns:
+        Schema: Shared parse result, which callers must not modify
+    """
+    return parse_ddl(sql)
+
+
+def reconcile_tables(schema: Schema, entries: Any) -> List[Dict[str, Any]]:
+    """
+    Fill in and correct ``database_schema`` entries from the parsed SQL.
+
+    Each table the script defines gets an entry whose columns, indexes and
+    relationships come from the SQL. Fields the SQL does not determine (extra
+    keys of an entry or of its columns) are kept. Entries for tables the
+    script does not define are kept unchanged after the others.
+
+    Args:
+        schema: Parsed ``database_schema_sql``
+        entries: Current ``database_schema`` section (anything; malformed
+            entries are dropped)
+
+    Returns:
+        List[Dict]: Reconciled section, or ``entries`` unchanged if the
+        script defines no table
+    """
+    if not schema.tables:
+        return entries
+    existing: Dict[str, Dict[str, Any]] = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and isinstance(entry.get("table_name"), str):
+            existing.setdefault(normalize_name(entry["table_name"]), entry)
+
+    reconciled = []
+    for key, table in schema.tables.items():
+        entry = existing.pop(key, {})
+        columns = entry.get("columns") if isinstance(entry.get("columns"), list) else []
+        old_columns = {
+            normalize_name(column["name"]): column
+            for column in columns
+            if isinstance(column, dict) and isinstance(column.get("name"), str)
+        }
+        reconciled.append({
+            **entry,
+            "table_name": entry.get("table_name", table.name),
+            "columns": [
+                {
+                    **old_columns.get(column_key, {}),
+                    "name": column.name,
+                    "type": column.type,
+                    "constraints": column.constraints(),
+                }
+                for column_key, column in table.columns.items()
+            ],
+            "indexes": list(table.indexes),
+            "relationships": [fk.describe() for fk in table.foreign_keys],
+        })
+    reconciled.extend(existing.values())
+    return reconciled
+
+
+class SQLiteError(NamedTuple):
+    """A statement SQLite rejected."""
+
+    statement: int
+    sql: str
+    error: str
+
+
+# Statements the SQLite check refuses to run: they could touch files or change the connection
+_SQLITE_DENIED = frozenset((
+    sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH, sqlite3.SQLITE_PRAGMA,
+))
+
+
+def check_sqlite(sql: str, timeout: float = 2.0) -> Tuple[int, List[SQLiteError]]:
+    """
+    Run a DDL script statement by statement on an empty in-memory SQLite database.
+
+    Statements that could reach outside the database (ATTACH, PRAGMA) are
+    denied, and the script is interrupted after ``timeout`` seconds. A failed
+    statement does not stop the ones after it, so one dialect-specific
+    statement does not hide problems in the rest.
+
+    Args:
+        sql: SQL DDL script
+        timeout: Seconds the whole script may run
+
+    Returns:
+        Tuple of the number of statements run and the statements that failed
+    """
+    deadline = time.monotonic() + timeout
+
+    def authorize(action, *args):
+        return sqlite3.SQLITE_DENY if action in _SQLITE_DENIED else sqlite3.SQLITE_OK
+
+    connection = sqlite3.connect(":memory:")
+    errors: List[SQLiteError] = []
+    statements = _tokenize(sql)
+    try:
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.set_authorizer(authorize)
+        connection.set_progress_handler(lambda: int(time.monotonic() > deadline), 10_000)
+        for number, tokens in enumerate(statements, start=1):
+            statement = sql[tokens[0].start:tokens[-1].end]
+            try:
+                connection.execute(statement)
+            except (sqlite3.Error, sqlite3.Warning) as e:
+                errors.append(SQLiteError(number, " ".join(statement.split())[:200], str(e)))
+                if time.monotonic() > deadline:
+                    break
+    finally:
+        connection.close()
+    return len(statements), errors
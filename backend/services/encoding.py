@@ -0,0 +1,288 @@
+"""
+Response encoding: JSON serialization, ETags and compression.
+Serializes response models straight to JSON bytes, tags them with a content
+hash for conditional requests, and compresses response bodies with the best
+encoding the client accepts.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+
+from services.metrics import COMPRESSION_SAVED_BYTES
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+# Bodies larger than this are compressed in a worker thread instead of on the event loop
+THREAD_COMPRESSION_SIZE = 256 * 1024
+
+
+def supported_encodings() -> List[str]:
+    """
+    Content encodings the server can produce, most preferred first.
+
+    Returns:
+        List[str]: ``br`` if the brotli module is installed, then ``gzip``
+    """
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Choose a content encoding from an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: Header value, e.g. ``gzip, deflate, br;q=0.9``
+
+    Returns:
+        Optional[str]: The supported encoding with the highest q-value
+        (ties go to the server's preference), or None to send the body as is
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best = None
+    best_q = 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """
+    Compress a body with a content encoding.
+
+    Args:
+        body: Uncompressed bytes
+        encoding: ``br`` or ``gzip``
+        gzip_level: gzip compression level (1-9)
+        brotli_quality: Brotli quality (0-11)
+
+    Returns:
+        bytes: Compressed body
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def etag_for(body: bytes) -> str:
+    """
+    Strong ETag of a response body.
+
+    Args:
+        body: Uncompressed response body
+
+    Returns:
+        str: Quoted content hash, identical for identical bodies
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an ``If-None-Match`` header matches an ETag, using weak comparison.
+
+    Args:
+        if_none_match: Header value: ``*`` or a comma-separated list of ETags
+        etag: Current ETag of the resource
+
+    Returns:
+        bool: True if the client already has this representation
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == opaque
+        for candidate in (part.strip() for part in if_none_match.split(","))
+    )
+
+
+def encode_json(model: BaseModel) -> bytes:
+    """
+    Serialize a response model to JSON bytes.
+
+    The model is serialized once by pydantic-core, skipping FastAPI's
+    re-validation of the returned model and its ``jsonable_encoder`` pass.
+
+    Args:
+        model: Response model
+
+    Returns:
+        bytes: Compact JSON
+    """
+    return model.model_dump_json().encode()
+
+
+def json_response(
+    body: Union[BaseModel, bytes],
+    request: Request,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Build a JSON response with an ETag.
+
+    A GET or HEAD whose ``If-None-Match`` matches the body's ETag gets an
+    empty 304 instead.
+
+    Args:
+        body: Response model, or JSON already produced by ``encode_json``
+        request: Incoming request, for its conditional headers
+        status_code: Status of a full response
+        headers: Extra response headers
+
+    Returns:
+        Response: JSON response, or 304 Not Modified
+    """
+    if isinstance(body, BaseModel):
+        body = encode_json(body)
+    etag = etag_for(body)
+    headers = {**(headers or {}), "ETag": etag}
+    if request.method in ("GET", "HEAD") and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+class EncodedCache:
+    """Bounded LRU map of encoded response bodies for resources that no longer change."""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Bodies kept before the least recently used is dropped
+        """
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Encoded body stored under a key, if any."""
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+            return body
+
+    def set(self, key: str, body: bytes) -> None:
+        """Store an encoded body, evicting the least recently used beyond the limit."""
+        with self._lock:
+            self._bodies[key] = body
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies with gzip or Brotli.
+
+    Only complete bodies are compressed. Streamed responses (NDJSON analysis
+    and batch results) are passed through unchanged so that every line still
+    reaches the client as soon as it is written.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application to wrap
+            minimum_size: Smallest body compressed, in bytes
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: Brotli quality (0-11)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) > THREAD_COMPRESSION_SIZE:
+                compressed = await asyncio.to_thread(compress, body, encoding, self.gzip_level, self.brotli_quality)
+            else:
+                compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) >= len(body):
+                await send(start)
+                await send(message)
+                return
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The compressed bytes differ from the ones the strong ETag names
+                headers["ETag"] = f"W/{etag}"
+            COMPRESSION_SAVED_BYTES.inc(len(body) - len(compressed), encoding=encoding)
+            await send(start)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
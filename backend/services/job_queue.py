@@ -0,0 +1,684 @@
+"""
+Asynchronous job queue for long-running analyses.
+Jobs are accepted immediately, run by a bounded pool of workers and tracked in
+a pluggable store so clients can poll for results instead of holding a request open.
+Jobs are claimed and finished atomically, so worker processes sharing a SQLite
+store never run a job twice or overwrite each other's outcome. With a shared
+store each process polls it, to stop jobs cancelled through another process,
+to keep the lease on its running jobs and to pick up queued jobs another
+process left behind, including the running jobs of a process that died. The queue calls its store
+in a worker thread, so a busy store never blocks the event loop.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Set
+
+from config import settings
+from models.schemas import AnalyzeResponse
+from services.llm_service import LLMService, get_llm_service
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of an analysis job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+# Polls a running job may miss before another process takes it over
+LEASE_POLLS = 5
+
+
+@dataclass
+class Job:
+    """An analysis job and its outcome."""
+
+    feature_description: str
+    mode: Optional[str] = None
+    tier: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot accept more work."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+class JobStore(ABC):
+    """Persistence interface for job state."""
+
+    @abstractmethod
+    def save(self, job: Job) -> None:
+        """Insert or update a job."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Fetch a job by id, or None if unknown."""
+
+    @abstractmethod
+    def list_unfinished(self) -> List[Job]:
+        """Jobs that were queued or running, oldest first."""
+
+    @abstractmethod
+    def claim(self, job_id: str, started_at: float, owner: Optional[str] = None) -> Optional[Job]:
+        """Mark a queued job as running by ``owner``. Returns the job, or None if it is not queued."""
+
+    @abstractmethod
+    def heartbeat(self, job_ids: List[str], owner: str, at: float) -> List[str]:
+        """Renew the lease of running jobs. Returns the ids ``owner`` still runs."""
+
+    @abstractmethod
+    def requeue(self, job_id: str, owner: str) -> bool:
+        """Put a job ``owner`` runs back in the queued state. Returns whether it was re-queued."""
+
+    @abstractmethod
+    def requeue_stale(self, before: float) -> int:
+        """Re-queue running jobs whose lease was last renewed before the given time. Returns the number re-queued."""
+
+    @abstractmethod
+    def finish(
+        self,
+        job_id: str,
+        status: JobStatus,
+        finished_at: float,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """Record a final state unless the job already has one. Returns whether it was recorded."""
+
+    @abstractmethod
+    def requeue_running(self) -> int:
+        """Put every running job back in the queued state. Returns the number re-queued."""
+
+    @abstractmethod
+    def prune(self, finished_before: float) -> int:
+        """Delete jobs that finished before the given time. Returns the number deleted."""
+
+
+class InMemoryJobStore(JobStore):
+    """Job store held in process memory; state is lost on restart."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        # Owner and last heartbeat of each running job
+        self._owners: Dict[str, Optional[str]] = {}
+        self._heartbeats: Dict[str, float] = {}
+
+    def save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list_unfinished(self) -> List[Job]:
+        jobs = [job for job in self._jobs.values() if job.status not in FINISHED_STATUSES]
+        return sorted(jobs, key=lambda job: job.created_at)
+
+    def claim(self, job_id: str, started_at: float, owner: Optional[str] = None) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status != JobStatus.QUEUED:
+            return None
+        job.status = JobStatus.RUNNING
+        job.started_at = started_at
+        self._owners[job_id] = owner
+        self._heartbeats[job_id] = started_at
+        return job
+
+    def heartbeat(self, job_ids: List[str], owner: str, at: float) -> List[str]:
+        held = []
+        for job_id in job_ids:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == JobStatus.RUNNING and self._owners.get(job_id) == owner:
+                self._heartbeats[job_id] = at
+                held.append(job_id)
+        return held
+
+    def requeue(self, job_id: str, owner: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.status != JobStatus.RUNNING or self._owners.get(job_id) != owner:
+            return False
+        job.status = JobStatus.QUEUED
+        job.started_at = None
+        return True
+
+    def requeue_stale(self, before: float) -> int:
+        stale = [
+            job for job in self._jobs.values()
+            if job.status == JobStatus.RUNNING and self._heartbeats.get(job.id, job.started_at) < before
+        ]
+        for job in stale:
+            job.status = JobStatus.QUEUED
+            job.started_at = None
+        return len(stale)
+
+    def finish(
+        self,
+        job_id: str,
+        status: JobStatus,
+        finished_at: float,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return False
+        job.status = status
+        job.finished_at = finished_at
+        job.result = result
+        job.error = error
+        return True
+
+    def requeue_running(self) -> int:
+        running = [job for job in self._jobs.values() if job.status == JobStatus.RUNNING]
+        for job in running:
+            job.status = JobStatus.QUEUED
+            job.started_at = None
+        return len(running)
+
+    def prune(self, finished_before: float) -> int:
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < finished_before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """Job store backed by SQLite so results outlive a restart and are visible to every worker process."""
+
+    _COLUMNS = "id, status, feature_description, mode, created_at, started_at, finished_at, result, error, tier"
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL lets other worker processes poll jobs while one of them writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, feature_description TEXT NOT NULL, "
+            "mode TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "result TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        # Stores created before jobs had a tier or a lease
+        existing = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("tier", "TEXT"), ("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in existing:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._db.commit()
+        logger.info(f"Job store persisted at {db_path}")
+
+    def save(self, job: Job) -> None:
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO jobs ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id, job.status.value, job.feature_description, job.mode,
+                    job.created_at, job.started_at, job.finished_at,
+                    json.dumps(job.result) if job.result is not None else None,
+                    job.error, job.tier,
+                ),
+            )
+            self._db.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def list_unfinished(self) -> List[Job]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def claim(self, job_id: str, started_at: float, owner: Optional[str] = None) -> Optional[Job]:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                (JobStatus.RUNNING.value, started_at, owner, started_at, job_id, JobStatus.QUEUED.value),
+            )
+            self._db.commit()
+            if cursor.rowcount == 0:
+                return None
+            row = self._db.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def finish(
+        self,
+        job_id: str,
+        status: JobStatus,
+        finished_at: float,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (
+                    status.value, finished_at,
+                    json.dumps(result) if result is not None else None,
+                    error, job_id, JobStatus.QUEUED.value, JobStatus.RUNNING.value,
+                ),
+            )
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    def requeue_running(self) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL WHERE status = ?",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            )
+            self._db.commit()
+        return cursor.rowcount
+
+    def heartbeat(self, job_ids: List[str], owner: str, at: float) -> List[str]:
+        held = []
+        with self._lock:
+            for job_id in job_ids:
+                cursor = self._db.execute(
+                    "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                    (at, job_id, JobStatus.RUNNING.value, owner),
+                )
+                if cursor.rowcount:
+                    held.append(job_id)
+            self._db.commit()
+        return held
+
+    def requeue(self, job_id: str, owner: str) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL WHERE id = ? AND status = ? AND owner = ?",
+                (JobStatus.QUEUED.value, job_id, JobStatus.RUNNING.value, owner),
+            )
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    def requeue_stale(self, before: float) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL "
+                "WHERE status = ? AND COALESCE(heartbeat_at, started_at) < ?",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value, before),
+            )
+            self._db.commit()
+        return cursor.rowcount
+
+    def prune(self, finished_before: float) -> int:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM jobs WHERE finished_at < ?", (finished_before,))
+            self._db.commit()
+        return cursor.rowcount
+
+    @staticmethod
+    def _to_job(row) -> Job:
+        return Job(
+            id=row[0],
+            status=JobStatus(row[1]),
+            feature_description=row[2],
+            mode=row[3],
+            created_at=row[4],
+            started_at=row[5],
+            finished_at=row[6],
+            result=json.loads(row[7]) if row[7] is not None else None,
+            error=row[8],
+            tier=row[9],
+        )
+
+
+class JobQueue:
+    """Bounded queue of analysis jobs served by a fixed pool of workers."""
+
+    def __init__(
+        self,
+        service: LLMService,
+        store: JobStore,
+        workers: int,
+        max_pending: int,
+        poll_interval: float = 0.0
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            service: LLM service that performs the analyses
+            store: Where job state is kept
+            workers: Number of jobs processed concurrently
+            max_pending: Maximum number of queued jobs before submissions are rejected
+            poll_interval: Seconds between checks of a store shared with other
+                processes, for cancelled and left-behind jobs; 0 disables polling
+        """
+        self.service = service
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        # Identifies this queue's running jobs in a store shared with other processes
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[str] = set()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._poller: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._avg_duration = 30.0
+        self._submissions = 0
+        self._saving = 0
+        self._busy = 0
+        self._draining = False
+
+    async def start(self, recover: bool = True) -> None:
+        """
+        Start the workers and pick up jobs left queued by a previous shutdown.
+
+        Args:
+            recover: Also re-queue jobs left running. Worker processes sharing
+                a store pass False, since running jobs may belong to another
+                live process; the server re-queues them once before the workers
+                start, and afterwards pollers take over jobs whose lease lapsed.
+        """
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._draining = False
+        if recover:
+            await asyncio.to_thread(self.store.requeue_running)
+        for job in await asyncio.to_thread(self.store.list_unfinished):
+            if job.status != JobStatus.QUEUED:
+                continue
+            if self._queue.full():
+                await self._finish(job, JobStatus.FAILED, error="Interrupted by restart")
+                continue
+            self._enqueue(job.id)
+            logger.info(f"Re-queued interrupted job {job.id}")
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(number)) for number in range(self.workers)
+        ]
+        if self.poll_interval > 0:
+            self._poller = asyncio.create_task(self._poll())
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self, grace: float = 0.0) -> None:
+        """
+        Stop the workers, letting running jobs finish first.
+
+        Jobs still running when the grace period ends are put back in the
+        queue. Queued jobs are picked up by another process polling a shared
+        store, or on the next start.
+
+        Args:
+            grace: Seconds to wait for running jobs to finish
+        """
+        self._draining = True
+        deadline = time.monotonic() + grace
+        if self._busy:
+            logger.info(f"Draining {self._busy} running jobs (up to {grace:.0f}s)")
+        while self._busy and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        # Stopped only now, so that the leases of draining jobs are renewed
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, feature_description: str, mode: Optional[str] = None, tier: Optional[str] = None) -> Job:
+        """
+        Accept a job for processing.
+
+        Args:
+            feature_description: Natural language description of the feature
+            mode: Analysis mode; defaults to ``settings.ANALYSIS_MODE``
+            tier: Model route; defaults to routing by description size
+
+        Raises:
+            ValueError: If the tier names no model route
+            QueueFullError: If the queue is at capacity
+        """
+        # Reject an unknown tier now rather than failing the job later
+        self.service.router.select(feature_description, tier)
+        if self._queue is None or self._draining or self._queue.qsize() + self._saving >= self.max_pending:
+            raise QueueFullError(self.retry_after())
+        job = Job(feature_description=feature_description, mode=mode, tier=tier)
+        # Holds a queue slot while the job is saved, so concurrent submissions cannot overfill the queue
+        self._saving += 1
+        try:
+            await asyncio.to_thread(self.store.save, job)
+        finally:
+            self._saving -= 1
+        self._enqueue(job.id)
+
+        self._submissions += 1
+        if self._submissions % 100 == 0:
+            await asyncio.to_thread(self.store.prune, time.time() - settings.JOB_RETENTION_SECONDS)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Fetch a job by id."""
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            Optional[Job]: The job after cancellation, or None if unknown
+        """
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        await self._finish(job, JobStatus.CANCELLED)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        logger.info(f"Cancelled job {job_id}")
+        return job
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up."""
+        # With every worker busy, one finishes roughly every avg_duration / workers seconds
+        return max(1, math.ceil(self._avg_duration / max(1, self.workers)))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report queue occupancy.
+
+        Returns:
+            dict: Queued and running job counts and capacity
+        """
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._running),
+            "max_pending": self.max_pending,
+            "draining": self._draining,
+            "avg_duration_s": round(self._avg_duration, 2),
+        }
+
+    async def _worker(self, number: int) -> None:
+        """Process jobs from the queue until cancelled."""
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            self._busy += 1
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Worker {number} failed on job {job_id}: {str(e)}")
+            finally:
+                self._busy -= 1
+                self._queue.task_done()
+
+    def _enqueue(self, job_id: str) -> None:
+        """Put a job on this process's queue."""
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def _poll(self) -> None:
+        """
+        Reconcile this process with a shared store every ``poll_interval`` seconds until cancelled.
+
+        The leases of this process's running jobs are renewed, and those it
+        no longer holds, because another process cancelled or took them over,
+        are stopped. Running jobs whose lease lapsed, such as those of a
+        process that was killed, are put back in the queue. Idle workers take
+        queued jobs that no worker here holds; the atomic claim keeps a job
+        from running twice if its own process gets to it as well.
+        """
+        lease = self.poll_interval * LEASE_POLLS
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            running = dict(self._running)
+            try:
+                now = time.time()
+                held = set(await asyncio.to_thread(self.store.heartbeat, list(running), self.owner, now))
+                requeued = await asyncio.to_thread(self.store.requeue_stale, now - lease)
+                unfinished = await asyncio.to_thread(self.store.list_unfinished)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not poll the job store: {str(e)}")
+                continue
+            if requeued:
+                logger.warning(f"Re-queued {requeued} jobs whose worker stopped renewing their lease")
+            for job_id, task in running.items():
+                if job_id not in held and self._running.get(job_id) is task:
+                    logger.info(f"Stopping job {job_id}, no longer held by this process")
+                    task.cancel()
+
+            idle = self.workers - self._busy - self._queue.qsize()
+            for job in unfinished:
+                if idle <= 0 or self._draining or self._queue.full():
+                    break
+                if job.status == JobStatus.QUEUED and job.id not in self._queued:
+                    self._enqueue(job.id)
+                    idle -= 1
+                    logger.info(f"Picked up queued job {job.id} from the shared store")
+
+    async def _run(self, job_id: str) -> None:
+        """Run a single job and record its outcome."""
+        if self._draining:
+            # Left queued for the next start
+            return
+        # Another worker process sharing the store may have claimed it already
+        job = await asyncio.to_thread(self.store.claim, job_id, time.time(), self.owner)
+        if job is None:
+            return
+        logger.info(f"Running job {job_id}")
+
+        task = asyncio.ensure_future(self._analyze(job))
+        self._running[job_id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not asyncio.current_task().cancelling():
+                # Only the job was cancelled, through the API or by the poller; the worker carries on
+                return
+            # The worker itself is being stopped; hand the job to another process or the next start
+            task.cancel()
+            await asyncio.to_thread(self.store.requeue, job_id, self.owner)
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            await self._finish(job, JobStatus.FAILED, error=str(e))
+            return
+        finally:
+            self._running.pop(job_id, None)
+
+        if not await self._finish(job, JobStatus.SUCCEEDED, result=result):
+            # Cancelled through another worker process while it ran
+            return
+        duration = job.finished_at - job.started_at
+        self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+        logger.info(f"Job {job_id} completed in {duration:.2f}s")
+
+    async def _analyze(self, job: Job) -> Dict[str, Any]:
+        """Analyze the job's description and return the validated response."""
+        result = await self.service.analyze_feature(job.feature_description, mode=job.mode, tier=job.tier)
+        self.service.validate_response(result)
+        return AnalyzeResponse(**result).model_dump()
+
+    async def _finish(
+        self,
+        job: Job,
+        status: JobStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """Record a job's final state unless it already has one. Returns whether it was recorded."""
+        finished_at = time.time()
+        if not await asyncio.to_thread(self.store.finish, job.id, status, finished_at, result, error):
+            return False
+        job.status = status
+        job.finished_at = finished_at
+        job.result = result
+        job.error = error
+        return True
+
+
+def create_job_store() -> JobStore:
+    """
+    Build the job store selected by ``settings.JOB_STORE``.
+
+    Returns:
+        JobStore: SQLite-backed store if configured, otherwise in-memory
+    """
+    if settings.JOB_STORE == "sqlite":
+        return SQLiteJobStore(settings.JOB_DB_PATH)
+    return InMemoryJobStore()
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """
+    The shared job queue, created on first use with the shared LLM service.
+
+    Returns:
+        JobQueue: The process-wide job queue
+    """
+    global _queue
+    if _queue is None:
+        _queue = JobQueue(
+            get_llm_service(),
+            create_job_store(),
+            workers=settings.JOB_WORKERS,
+            max_pending=settings.JOB_QUEUE_SIZE,
+            # Only a SQLite store can be shared with other processes
+            poll_interval=settings.JOB_POLL_INTERVAL_SECONDS if settings.JOB_STORE == "sqlite" else 0.0,
+        )
+    return _queue
@@ -0,0 +1,222 @@
+"""
+JSON extraction and tolerant parsing for LLM output.
+Locates the JSON object in a model response in a single scan and repairs the
+defects models commonly produce: surrounding prose or code fences, comments,
+trailing or missing commas, Python literals and truncated tails.
+"""
+
+import json
+import re
+from typing import Any, List, NamedTuple, Tuple
+
+# Non-strict so raw control characters inside strings (common in SQL) are accepted
+_DECODER = json.JSONDecoder(strict=False)
+
+# One token of (possibly malformed) JSON, with leading whitespace skipped:
+# comment | punctuation | string (closing quote captured separately) | bare literal
+_TOKEN = re.compile(
+    r'\s*(?:'
+    r'(//[^\n]*|/\*.*?(?:\*/|\Z))'
+    r'|([{}\[\],:])'
+    r'|("(?:[^"\\]|\\.)*)(")?'
+    r'|([^\s{}\[\],:"/]+)'
+    r')',
+    re.S,
+)
+_NON_SPACE = re.compile(r"\S")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?\Z")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_JSON_LITERALS = {"true", "false", "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Fallback cut points tried when a truncated document does not close cleanly
+_MAX_CUT_ATTEMPTS = 16
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON object can be recovered from a model output."""
+
+
+class ExtractionResult(NamedTuple):
+    """A JSON value recovered from model output and how it was recovered."""
+
+    value: Any
+    repairs: Tuple[str, ...]
+    """Human-readable descriptions of every repair applied, empty if none."""
+    truncated: bool
+    """True if the document ended before all brackets were closed."""
+    open_depth: int
+    """Number of containers still open where the text ended (0 if complete)."""
+
+
+def extract_json(text: str) -> ExtractionResult:
+    """
+    Find and parse the JSON object in a model output.
+
+    Well-formed documents are decoded in place with ``raw_decode`` without
+    copying the text; only malformed documents go through the repairing scan.
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        ExtractionResult: Parsed value with the repairs that were needed
+
+    Raises:
+        JSONExtractionError: If no JSON object can be recovered
+    """
+    start = text.find("{")
+    if start == -1:
+        raise JSONExtractionError("No JSON object found in model output")
+
+    try:
+        value, end = _DECODER.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return _repair(text, start)
+
+    repairs = []
+    if _NON_SPACE.search(text, 0, start):
+        repairs.append("ignored leading text")
+    if _NON_SPACE.search(text, end):
+        repairs.append("ignored trailing text")
+    return ExtractionResult(value, tuple(repairs), False, 0)
+
+
+def _repair(text: str, start: int) -> ExtractionResult:
+    """
+    Re-tokenize a malformed document, fixing defects as they are found.
+
+    Args:
+        text: Raw model output
+        start: Index of the opening brace
+
+    Returns:
+        ExtractionResult: Parsed value with the repairs that were needed
+
+    Raises:
+        JSONExtractionError: If the document cannot be repaired
+    """
+    repairs: List[str] = []
+    out: List[str] = []
+    stack: List[str] = []
+    # (number of output tokens, open containers) after every complete value
+    cut_points: List[Tuple[int, Tuple[str, ...]]] = []
+    value_ended = False
+    truncated = False
+    pos = start
+
+    def note(repair: str) -> None:
+        if repair not in repairs:
+            repairs.append(repair)
+
+    if _NON_SPACE.search(text, 0, start):
+        note("ignored leading text")
+
+    while True:
+        match = _TOKEN.match(text, pos)
+        if match is None or match.end() == pos:
+            if _NON_SPACE.search(text, pos) is None:
+                truncated = bool(stack)
+                break
+            note("dropped stray characters")
+            pos += 1
+            continue
+        pos = match.end()
+        comment, punct, string, closing_quote, literal = match.groups()
+
+        if comment is not None:
+            note("removed comments")
+            continue
+
+        if punct is not None:
+            if punct in "{[":
+                if value_ended:
+                    out.append(",")
+                    note("inserted missing commas")
+                out.append(punct)
+                stack.append(punct)
+                cut_points.append((len(out), tuple(stack)))
+                value_ended = False
+            elif punct in "}]":
+                if not stack:
+                    break
+                if out[-1] == ",":
+                    out.pop()
+                    note("removed trailing commas")
+                expected = _CLOSERS[stack.pop()]
+                if punct != expected:
+                    note("fixed mismatched brackets")
+                out.append(expected)
+                value_ended = True
+                if not stack:
+                    break
+                cut_points.append((len(out), tuple(stack)))
+            elif punct == ",":
+                if out[-1] in ",[{:":
+                    note("removed stray commas")
+                else:
+                    out.append(",")
+                value_ended = False
+            else:
+                out.append(":")
+                value_ended = False
+            continue
+
+        if string is not None:
+            if value_ended:
+                out.append(",")
+                note("inserted missing commas")
+            if closing_quote is None:
+                # The text ended inside this string
+                out.append(string + '"')
+                note("closed unterminated string")
+                truncated = True
+                break
+            is_key = stack[-1] == "{" and out[-1] in "{,"
+            out.append(string + closing_quote)
+            value_ended = True
+            if not is_key:
+                cut_points.append((len(out), tuple(stack)))
+            continue
+
+        if literal in _PYTHON_LITERALS:
+            note("converted Python literals")
+            literal = _PYTHON_LITERALS[literal]
+        elif literal not in _JSON_LITERALS and not _NUMBER.match(literal):
+            note("dropped stray characters")
+            continue
+        if value_ended:
+            out.append(",")
+            note("inserted missing commas")
+        out.append(literal)
+        value_ended = True
+        cut_points.append((len(out), tuple(stack)))
+
+    if not truncated and _NON_SPACE.search(text, pos):
+        note("ignored trailing text")
+
+    if not stack:
+        try:
+            value = _DECODER.decode("".join(out))
+        except json.JSONDecodeError as e:
+            raise JSONExtractionError(f"Unrepairable JSON in model output: {e}") from e
+        return ExtractionResult(value, tuple(repairs), False, 0)
+
+    open_depth = len(stack)
+    note("closed unclosed brackets")
+    candidates = [(len(out), tuple(stack))] + cut_points[::-1][:_MAX_CUT_ATTEMPTS]
+    for count, open_containers in candidates:
+        tokens = out[:count]
+        while tokens and tokens[-1] == ",":
+            tokens.pop()
+        closers = "".join(_CLOSERS[container] for container in reversed(open_containers))
+        try:
+            value = _DECODER.decode("".join(tokens) + closers)
+        except json.JSONDecodeError:
+            continue
+        if count < len(out):
+            note("dropped incomplete trailing value")
+        return ExtractionResult(value, tuple(repairs), True, open_depth)
+
+    raise JSONExtractionError("Unrepairable truncated JSON in model output")
+
@@ -0,0 +1,161 @@
+"""
+Incremental JSON parser for streamed specifications.
+Consumes the model output chunk by chunk and reports every item of a top-level
+array (and every top-level scalar) as soon as its closing token arrives.
+"""
+
+import json
+import re
+from typing import Any, List, NamedTuple, Optional
+
+# Non-strict so raw control characters inside strings (common in SQL) are accepted
+_DECODER = json.JSONDecoder(strict=False)
+# Characters that end a run of plain string content
+_STRING_SPECIAL = re.compile(r'["\\]')
+# Characters that change parser state outside strings
+_STRUCTURAL = re.compile(r'[{}\[\]":,]')
+
+
+class StreamEvent(NamedTuple):
+    """A piece of the specification completed by the stream."""
+
+    kind: str
+    """``item`` for an element of a top-level array, ``value`` for a top-level scalar,
+    ``section_end`` when a top-level array closes."""
+    section: str
+    """Top-level key the event belongs to."""
+    value: Any = None
+    """Parsed JSON value for ``item``/``value``; item count for ``section_end``."""
+
+
+class SpecStreamParser:
+    """
+    Incremental parser for a streamed top-level JSON object.
+
+    Only the text of the item currently being received is buffered; everything
+    before it is discarded as soon as it has been scanned, so memory stays
+    proportional to the largest single item rather than the whole document.
+    """
+
+    def __init__(self):
+        """Initialize the parser in its pre-document state."""
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._in_array = False
+        self._expect_value = False
+        self._section: Optional[str] = None
+        self._count = 0
+        self.done = False
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """
+        Consume the next chunk of model output.
+
+        Args:
+            chunk: Text received from the model
+
+        Returns:
+            List[StreamEvent]: Events completed by this chunk, in document order
+
+        Raises:
+            ValueError: If a completed item is not valid JSON
+        """
+        events: List[StreamEvent] = []
+        if self.done or not chunk:
+            return events
+
+        buf = self._buf + chunk
+        pos = self._pos
+        end = len(buf)
+
+        while pos < end and not self.done:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL.search(buf, pos)
+                if match is None:
+                    pos = end
+                    break
+                pos = match.start()
+                if buf[pos] == "\\":
+                    self._escape = True
+                    pos += 1
+                    continue
+                self._in_string = False
+                if self._depth == 1 and self._string_start is not None:
+                    raw = buf[self._string_start:pos + 1]
+                    self._string_start = None
+                    if self._expect_value:
+                        self._expect_value = False
+                        events.append(StreamEvent("value", self._section, _DECODER.decode(raw)))
+                    else:
+                        self._section = _DECODER.decode(raw)
+                pos += 1
+                continue
+
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                pos = end
+                break
+            pos = match.start()
+            char = buf[pos]
+
+            if self._depth == 0:
+                # Skip any prose or code fence before the document starts
+                if char == "{":
+                    self._depth = 1
+                pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._string_start = pos
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2:
+                    self._expect_value = False
+                    self._in_array = char == "["
+                    self._count = 0
+                elif self._depth == 3 and self._in_array and char == "{":
+                    self._item_start = pos
+            elif char in "}]":
+                if self._depth == 3 and self._item_start is not None:
+                    raw = buf[self._item_start:pos + 1]
+                    self._item_start = None
+                    events.append(StreamEvent("item", self._section, _DECODER.decode(raw)))
+                    self._count += 1
+                elif self._depth == 2 and self._in_array:
+                    events.append(StreamEvent("section_end", self._section, self._count))
+                    self._in_array = False
+                elif self._depth == 1:
+                    self.done = True
+                self._depth -= 1
+            elif char == ":" and self._depth == 1:
+                self._expect_value = True
+            elif char == "," and self._depth == 1:
+                self._expect_value = False
+            pos += 1
+
+        # Drop everything that no pending item or key still needs
+        keep_from = pos
+        for start in (self._item_start, self._string_start):
+            if start is not None and start < keep_from:
+                keep_from = start
+        if keep_from:
+            buf = buf[keep_from:]
+            pos -= keep_from
+            if self._item_start is not None:
+                self._item_start -= keep_from
+            if self._string_start is not None:
+                self._string_start -= keep_from
+        self._buf = buf
+        self._pos = pos
+        return events
@@ -3,46 +3,66 @@ LLM Service for generating structured requirements analysis.
 Integrates with Google Gemini API to transform natural language into technical specifications.
 """
 
+import asyncio
+import functools
 import json
 import logging
-from typing import Dict, Any
-import google.generativeai as genai
+import sqlite3
+import time
+from typing import AsyncIterator, Dict, Any, List, NamedTuple, Optional, Sequence, Tuple
 from config import settings
+from services.cache_service import ResponseCache, make_cache_key, normalize_description
+from services.json_extractor import JSONExtractionError, extract_json
+from services.json_stream import SpecStreamParser, StreamEvent
+from services.metrics import CACHE_LOOKUPS, LLM_TOKENS, SPEC_ISSUES, STAGE_DURATION, UPSTREAM_IN_FLIGHT
+from services.prompt_budget import (
+    Prompt,
+    PromptBudgetStats,
+    RequestCost,
+    current_request_cost,
+    output_budget,
+)
+from services.repair import (
+    RepairStats,
+    build_continuation_prompt,
+    count_issues,
+    estimate_tokens,
+    find_defective_sections,
+    group_defects,
+    salvage_sections,
+)
+from services.router import ModelRoute, create_router, current_route
+from services.similarity import SimilarMatch, SimilarityIndex
+from services.ddl_parser import cached_schema, reconcile_tables
+from services.spec_delta import LIST_SECTIONS, apply_delta, diff_specs
+from services.spec_store import SpecStore, StoredSpec
+from services.spec_validator import summarize_issues, validate_spec
+from services.singleflight import SingleFlight
+from services.upstream import create_governor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever the prompt templates change so cached analyses are not reused
+PROMPT_VERSION = "2"
 
-class LLMService:
-    """Service for interacting with Google Gemini API."""
-    
-    def __init__(self):
-        """Initialize the LLM service with Gemini client."""
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
-        
-    def _build_system_prompt(self) -> str:
-        """
-        Build the system prompt that instructs the LLM on output format.
-        
-        Returns:
-            str: Comprehensive system prompt for structured output generation
-        """
-        return """You are an expert software architect and technical analyst. Your task is to analyze natural language feature descriptions and generate comprehensive, structured technical specifications.
+SYSTEM_PREAMBLE = "You are an expert software architect and technical analyst. Your task is to analyze natural language feature descriptions and generate comprehensive, structured technical specifications."
 
-You must respond with ONLY a valid JSON object (no markdown, no code blocks, just raw JSON) following this exact structure:
+# Top-level sections of a specification, in prompt order
+SECTION_ORDER = ("requirements", "api_design", "database_schema", "database_schema_sql", "sprint_tasks")
 
-{
-  "requirements": [
+# JSON structure the model must follow for each section
+SECTION_SCHEMAS: Dict[str, str] = {
+    "requirements": """  "requirements": [
     {
       "id": "REQ-001",
       "category": "Functional|Non-functional|Security|Performance",
       "description": "Clear, specific requirement description",
       "priority": "High|Medium|Low"
     }
-  ],
-  "api_design": [
+  ]""",
+    "api_design": """  "api_design": [
     {
       "method": "GET|POST|PUT|DELETE|PATCH",
       "path": "/api/resource/endpoint",
@@ -51,8 +71,8 @@ You must respond with ONLY a valid JSON object (no markdown, no code blocks, jus
       "response": {"field": "type description"},
       "authentication": true|false
     }
-  ],
-  "database_schema": [
+  ]""",
+    "database_schema": """  "database_schema": [
     {
       "table_name": "table_name",
       "columns": [
@@ -65,9 +85,9 @@ You must respond with ONLY a valid JSON object (no markdown, no code blocks, jus
       "indexes": ["idx_table_column"],
       "relationships": ["FOREIGN KEY references"]
     }
-  ],
-  "database_schema_sql": "Complete SQL CREATE TABLE statements with all constraints, indexes, and relationships",
-  "sprint_tasks": [
+  ]""",
+    "database_schema_sql": '  "database_schema_sql": "Complete SQL CREATE TABLE statements with all constraints, indexes, and relationships"',
+    "sprint_tasks": """  "sprint_tasks": [
     {
       "task_id": "TASK-001",
       "title": "Task title",
@@ -76,21 +96,245 @@ You must respond with ONLY a valid JSON object (no markdown, no code blocks, jus
       "dependencies": ["TASK-XXX"],
       "sprint": 1|2|3
     }
-  ]
+  ]""",
+}
+
+# Fan-out stages of the parallel pipeline: (label, sections) groups generated
+# concurrently; each stage sees a summary of the stages before it
+PARALLEL_STAGES: Tuple[Tuple[Tuple[str, Tuple[str, ...]], ...], ...] = (
+    (
+        ("requirements", ("requirements",)),
+        ("api_design", ("api_design",)),
+        ("database", ("database_schema", "database_schema_sql")),
+    ),
+    (
+        ("sprint_tasks", ("sprint_tasks",)),
+    ),
+)
+
+ANALYSIS_MODES = ("single", "parallel")
+
+# Section-specific guidelines appended to the prompt
+SECTION_GUIDELINES: Dict[str, Tuple[str, ...]] = {
+    "requirements": ("Generate comprehensive requirements covering functional, non-functional, security, and performance aspects",),
+    "api_design": ("Design RESTful API endpoints following best practices",),
+    "database_schema": ("Create normalized database schemas with proper relationships and constraints",),
+    "database_schema_sql": ("Generate production-ready SQL with appropriate data types, indexes, and foreign keys",),
+    "sprint_tasks": (
+        "Break down work into logical sprint tasks (typically 2-3 sprints)",
+        "Ensure task dependencies are properly identified",
+        "Use realistic story point estimates (Fibonacci: 1, 2, 3, 5, 8, 13)",
+    ),
 }
 
+
+def analysis_variant(mode: str, route: ModelRoute) -> str:
+    """
+    Tag of how an analysis is generated, for the similarity index.
+
+    Analyses of near-duplicate descriptions are only interchangeable within
+    one mode and model route.
+
+    Args:
+        mode: Analysis mode
+        route: Model route
+
+    Returns:
+        str: ``mode|route|model``
+    """
+    return f"{mode}|{route.name}|{route.model_name}"
+
+
+class ModelOutput(NamedTuple):
+    """Text generated by the model and how the generation ended."""
+
+    text: str
+    finish_reason: Optional[str]
+    output_tokens: int
+
+
+def _finish_reason(response: Any) -> Optional[str]:
+    """Name of the finish reason of the first candidate, if reported."""
+    try:
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return None
+    return getattr(reason, "name", str(reason))
+
+
+def _output_tokens(response: Any, text: str) -> int:
+    """Output token count from the response usage metadata, estimated if absent."""
+    usage = getattr(response, "usage_metadata", None)
+    count = getattr(usage, "candidates_token_count", None)
+    return count if isinstance(count, int) and count > 0 else estimate_tokens(text)
+
+
+def _prompt_tokens(response: Any, prompt: str) -> int:
+    """Prompt token count from the response usage metadata, estimated if absent."""
+    usage = getattr(response, "usage_metadata", None)
+    count = getattr(usage, "prompt_token_count", None)
+    return count if isinstance(count, int) and count > 0 else estimate_tokens(prompt)
+
+
+def _cached_tokens(response: Any) -> int:
+    """Prompt tokens the provider served from its cache, or 0 if not reported."""
+    usage = getattr(response, "usage_metadata", None)
+    count = getattr(usage, "cached_content_token_count", None)
+    return count if isinstance(count, int) else 0
+
+
+def _usable_output(output: ModelOutput, json_mode: bool) -> bool:
+    """
+    Whether a model output can win a hedged race.
+
+    Args:
+        output: Model output
+        json_mode: Whether the output must be a JSON document
+
+    Returns:
+        bool: True if the output was not cut off and, in JSON mode, parses completely
+    """
+    if output.finish_reason == "MAX_TOKENS":
+        return False
+    if not json_mode:
+        return True
+    try:
+        return not extract_json(output.text).truncated
+    except JSONExtractionError:
+        return False
+
+
+def _strip_code_fences(content: str) -> str:
+    """Remove a surrounding markdown code block from a continuation before it is appended."""
+    content = content.strip()
+    fence = content.find("```")
+    if fence != -1:
+        newline = content.find("\n", fence)
+        body = content[newline + 1:] if newline != -1 else ""
+        end = body.find("```")
+        content = body[:end] if end != -1 else body
+    return content.strip()
+
+
+@functools.lru_cache(maxsize=None)
+def _system_prompt(sections: Tuple[str, ...]) -> str:
+    """Build the static instructions for a set of sections (memoized)."""
+    structure = ",\n".join(SECTION_SCHEMAS[section] for section in sections)
+    guidelines = [
+        guideline
+        for section in sections
+        for guideline in SECTION_GUIDELINES[section]
+    ]
+    guidelines.append("Be thorough and production-ready in your analysis")
+    numbered = "\n".join(f"{number}. {guideline}" for number, guideline in enumerate(guidelines, 1))
+    return f"""{SYSTEM_PREAMBLE}
+
+You must respond with ONLY a valid JSON object (no markdown, no code blocks, just raw JSON) following this exact structure:
+
+{{
+{structure}
+}}
+
 Guidelines:
-1. Generate comprehensive requirements covering functional, non-functional, security, and performance aspects
-2. Design RESTful API endpoints following best practices
-3. Create normalized database schemas with proper relationships and constraints
-4. Generate production-ready SQL with appropriate data types, indexes, and foreign keys
-5. Break down work into logical sprint tasks (typically 2-3 sprints)
-6. Ensure task dependencies are properly identified
-7. Use realistic story point estimates (Fibonacci: 1, 2, 3, 5, 8, 13)
-8. Be thorough and production-ready in your analysis
+{numbered}
 
 Remember: Output ONLY the JSON object, nothing else."""
 
+
+@functools.lru_cache(maxsize=None)
+def _delta_system_prompt() -> str:
+    """Build the static instructions of a re-analysis delta prompt (memoized)."""
+    items = "\n".join(SECTION_SCHEMAS[section] for section in LIST_SECTIONS)
+    return f"""{SYSTEM_PREAMBLE}
+
+A feature description has been edited after its specification was generated. You are given the previous specification and must describe only the changes the edit requires.
+
+You must respond with ONLY a valid JSON object (no markdown, no code blocks, just raw JSON) following this exact structure:
+
+{{
+  "requirements": {{"added": [], "changed": [], "removed": ["REQ-003"]}},
+  "api_design": {{"added": [], "changed": [], "removed": ["DELETE /api/resource/{{id}}"]}},
+  "database_schema": {{"added": [], "changed": [], "removed": ["table_name"]}},
+  "database_schema_sql": "Complete updated SQL schema, or null if the schema is unchanged",
+  "sprint_tasks": {{"added": [], "changed": [], "removed": ["TASK-004"]}}
+}}
+
+Added and changed items have the same fields as the items of the previous specification:
+
+{items}
+
+Guidelines:
+1. Include only items the edit adds, changes or removes; leave everything else out
+2. Give changed items in full, keeping their identifier (requirement id, endpoint method and path, table name, task id)
+3. Give new items identifiers that the previous specification does not use
+4. Remove items by identifier, and keep sprint task dependencies consistent
+5. Use realistic story point estimates (Fibonacci: 1, 2, 3, 5, 8, 13)
+
+Remember: Output ONLY the JSON object, nothing else."""
+
+
+class LLMService:
+    """Service for interacting with Google Gemini API."""
+    
+    def __init__(self):
+        """Initialize the LLM service with the configured model routes."""
+        self.router = create_router()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.cache: Optional[ResponseCache] = None
+        if settings.CACHE_ENABLED:
+            self.cache = ResponseCache(
+                max_entries=settings.CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.CACHE_TTL_SECONDS,
+                db_path=settings.CACHE_DB_PATH or settings.SHARED_STATE_DB_PATH or None,
+            )
+        # Near duplicates are served from the cache, so the index needs it
+        self.similarity: Optional[SimilarityIndex] = None
+        if self.cache is not None and settings.SIMILARITY_ENABLED:
+            self.similarity = SimilarityIndex(settings.SIMILARITY_MAX_ENTRIES)
+        self.spec_store: Optional[SpecStore] = None
+        if settings.SPEC_STORE_ENABLED:
+            try:
+                self.spec_store = SpecStore(
+                    settings.SPEC_STORE_DB_PATH,
+                    batch_size=settings.SPEC_STORE_BATCH_SIZE,
+                    flush_interval=settings.SPEC_STORE_FLUSH_INTERVAL_SECONDS,
+                    max_pending=settings.SPEC_STORE_MAX_PENDING,
+                    retention_seconds=settings.SPEC_STORE_RETENTION_SECONDS,
+                )
+            except sqlite3.Error as e:
+                # e.g. a read-only filesystem on serverless hosts
+                logger.error(f"Spec store disabled, cannot open {settings.SPEC_STORE_DB_PATH}: {str(e)}")
+        self.singleflight = SingleFlight()
+        self.repair_stats = RepairStats()
+        self.upstream = create_governor()
+        self.prompt_budget = PromptBudgetStats()
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """
+        Semaphore bounding the number of concurrent upstream Gemini calls.
+
+        Created lazily so that it binds to the running event loop.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
+        return self._semaphore
+        
+    def _build_system_prompt(self, sections: Sequence[str] = SECTION_ORDER) -> str:
+        """
+        Build the system prompt that instructs the LLM on output format.
+
+        The instructions depend only on the requested sections, so each variant
+        is built once and reused for every request.
+        
+        Args:
+            sections: Top-level sections the response must contain
+            
+        Returns:
+            str: Comprehensive system prompt for structured output generation
+        """
+        return _system_prompt(tuple(sections))
+
     def _build_user_prompt(self, feature_description: str) -> str:
         """
         Build the user prompt with the feature description.
@@ -108,9 +352,488 @@ Feature Description:
 
 Provide a complete analysis including requirements, API design, database schema with SQL, and sprint tasks."""
 
-    def analyze_feature(self, feature_description: str) -> Dict[str, Any]:
+    def _build_prompt(self, feature_description: str) -> Prompt:
+        """
+        Pair the static system prompt with the user prompt for a feature.
+        
+        Args:
+            feature_description: Natural language feature description
+            
+        Returns:
+            Prompt: System and user parts of the request
+        """
+        return Prompt(self._build_system_prompt(), self._build_user_prompt(feature_description))
+
+    def _build_full_prompt(self, feature_description: str) -> str:
+        """
+        Combine the system and user prompts into a single request.
+        
+        Args:
+            feature_description: Natural language feature description
+            
+        Returns:
+            str: Prompt sent to Gemini
+        """
+        return self._build_prompt(feature_description).text
+
+    def _build_section_prompt(
+        self,
+        feature_description: str,
+        sections: Sequence[str],
+        context: Optional[str] = None,
+        issues: Optional[Sequence[str]] = None
+    ) -> Prompt:
+        """
+        Build a prompt that asks for only some sections of the specification.
+        
+        Args:
+            feature_description: Natural language feature description
+            sections: Top-level sections to generate
+            context: Compact summary of already generated sections, if any
+            issues: Problems found in a previous attempt at these sections, if any
+            
+        Returns:
+            Prompt: System and user parts of the request
+        """
+        names = ", ".join(section.replace("_", " ") for section in sections)
+        prompt = f"""Analyze this feature and generate the {names} of its technical specification:
+
+Feature Description:
+{feature_description}"""
+        if context:
+            prompt += f"""
+
+Already specified (stay consistent with these and reference them where relevant):
+{context}"""
+        if issues:
+            prompt += "\n\nA previous attempt at these sections had these problems, which must not recur:\n"
+            prompt += "\n".join(f"- {issue}" for issue in issues)
+        return Prompt(self._build_system_prompt(sections), prompt)
+
+    def _build_delta_prompt(
+        self,
+        feature_description: str,
+        previous: Dict[str, Any],
+        previous_description: Optional[str] = None
+    ) -> Prompt:
         """
-        Analyze a feature description and generate structured specifications.
+        Build a prompt that asks for the changes an edit makes to a specification.
+        
+        Args:
+            feature_description: Edited feature description
+            previous: Specification generated for the previous description
+            previous_description: Previous description, if known
+            
+        Returns:
+            Prompt: System and user parts of the request
+        """
+        prompt = ""
+        if previous_description:
+            prompt += f"""Previous Feature Description:
+{previous_description}
+
+"""
+        prompt += f"""Edited Feature Description:
+{feature_description}
+
+Previous Specification:
+{json.dumps({section: previous.get(section) for section in SECTION_ORDER}, separators=(",", ":"))}"""
+        return Prompt(_delta_system_prompt(), prompt)
+
+    def _reconcile_schema(self, spec: Dict[str, Any]) -> None:
+        """
+        Fill in and correct ``database_schema`` from ``database_schema_sql`` in place.
+        
+        Args:
+            spec: Parsed specification, possibly partial
+        """
+        sql = spec.get("database_schema_sql")
+        if not settings.SCHEMA_RECONCILE_ENABLED or not isinstance(sql, str) or not sql.strip():
+            return
+        schema = cached_schema(sql)
+        if schema.tables:
+            spec["database_schema"] = reconcile_tables(schema, spec.get("database_schema"))
+
+    def _summarize_spec(self, spec: Dict[str, Any]) -> str:
+        """
+        Summarize generated sections compactly for use as context in later prompts.
+        
+        Args:
+            spec: Partial specification
+            
+        Returns:
+            str: One line per requirement, endpoint and table
+        """
+        lines = []
+        for requirement in spec.get("requirements") or []:
+            lines.append(f"- {requirement.get('id')} [{requirement.get('priority')}]: {str(requirement.get('description', ''))[:120]}")
+        for endpoint in spec.get("api_design") or []:
+            lines.append(f"- {endpoint.get('method')} {endpoint.get('path')}")
+        for table in spec.get("database_schema") or []:
+            columns = ", ".join(str(column.get("name")) for column in table.get("columns") or [] if isinstance(column, dict))
+            lines.append(f"- table {table.get('table_name')}({columns})")
+        return "\n".join(lines)
+
+    def _generation_config(self, max_output_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Build the Gemini generation parameters.
+        
+        Args:
+            max_output_tokens: Output budget; defaults to ``settings.MAX_TOKENS``
+            
+        Returns:
+            dict: Generation config requesting JSON output
+        """
+        return {
+            "temperature": settings.TEMPERATURE,
+            "max_output_tokens": max_output_tokens or settings.MAX_TOKENS,
+            "response_mime_type": "application/json"
+        }
+
+    def cache_key(self, feature_description: str, mode: str = "single", route: Optional[ModelRoute] = None) -> str:
+        """
+        Content address of an analysis for the current model and prompt configuration.
+
+        Args:
+            feature_description: Natural language feature description
+            mode: Analysis mode, since each mode prompts differently
+            route: Model route generating the analysis; defaults to the route
+                chosen for the description by size
+
+        Returns:
+            str: Cache key
+        """
+        route = route or self.router.select(feature_description)
+        return make_cache_key(
+            feature_description,
+            route.model_name,
+            settings.TEMPERATURE,
+            f"{PROMPT_VERSION}/{mode}",
+        )
+
+    async def analyze_feature(
+        self,
+        feature_description: str,
+        use_cache: bool = True,
+        store_in_cache: bool = True,
+        mode: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+        tier: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Analyze a feature description, serving repeats from the response cache.
+
+        Only results that pass ``validate_response`` are stored. On a miss, a
+        cached analysis of a near-identical description (at least
+        ``settings.SIMILARITY_SERVE_THRESHOLD`` similar) is served instead.
+        Concurrent calls for the same description are merged onto one generation.
+
+        Args:
+            feature_description: Natural language description of the feature
+            use_cache: Whether a cached result may be returned
+            store_in_cache: Whether a freshly generated result may be stored
+            mode: ``single`` for one prompt, ``parallel`` for concurrent
+                per-section prompts; defaults to ``settings.ANALYSIS_MODE``
+            timings: Optional dict that receives the seconds spent per stage
+            tier: Model route to use; defaults to routing by description size
+
+        Returns:
+            Dict containing requirements, API design, database schema, and sprint tasks
+
+        Raises:
+            ValueError: If the mode or tier is unknown
+        """
+        mode = mode or settings.ANALYSIS_MODE
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        route = self.router.select(feature_description, tier)
+        key = self.cache_key(feature_description, mode, route)
+        stage_timings: Dict[str, float] = {}
+
+        if self.cache is not None and use_cache:
+            start = time.perf_counter()
+            cached = await self.cache.get_async(key)
+            CACHE_LOOKUPS.inc(result="hit" if cached is not None else "miss")
+            if cached is not None:
+                logger.info("Serving analysis from cache")
+                if self.similarity is not None:
+                    # Entries from the persistent tier join the index as they are read
+                    self.similarity.add(key, feature_description, analysis_variant(mode, route))
+                if timings is not None:
+                    timings["cache"] = time.perf_counter() - start
+                return cached
+            similar = await self._cached_near_duplicate(feature_description, mode, route)
+            if similar is not None:
+                CACHE_LOOKUPS.inc(result="similar")
+                if store_in_cache:
+                    # Keep it under this description's key too, so its spec id resolves;
+                    # the match was generated with the same mode and route
+                    await self._keep(key, feature_description, similar, mode, route)
+                if timings is not None:
+                    timings["similar"] = time.perf_counter() - start
+                return similar
+
+        async def generate_and_store() -> Tuple[Dict[str, Any], Dict[str, float]]:
+            # Runs in its own task, so the usage collected here is this analysis' alone
+            cost = RequestCost()
+            current_request_cost.set(cost)
+            current_route.set(route)
+            if mode == "parallel":
+                result = await self._generate_parallel(feature_description, stage_timings)
+            else:
+                start = time.perf_counter()
+                result = await self._generate(feature_description)
+                stage_timings["generate"] = time.perf_counter() - start
+            logger.info(f"Analysis usage: {cost.summary()}")
+            if self.keeps_specs and store_in_cache:
+                try:
+                    self.validate_response(result)
+                except ValueError:
+                    logger.warning("Not caching analysis that failed validation")
+                else:
+                    await self._keep(key, feature_description, result, mode, route, stage_timings)
+            return result, stage_timings
+
+        # Concurrent identical requests share one upstream generation
+        result, shared_timings = await self.singleflight.do(key, generate_and_store)
+        if timings is not None:
+            timings.update(shared_timings)
+        return result
+
+    async def _cached_near_duplicate(
+        self,
+        feature_description: str,
+        mode: str,
+        route: ModelRoute
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis of a near-identical description.
+
+        Only analyses generated in the same mode by the same model route are
+        considered, as the cache key would for an exact repeat.
+
+        Args:
+            feature_description: Natural language description of the feature
+            mode: Analysis mode of the request
+            route: Model route selected for the request
+
+        Returns:
+            Optional[Dict]: The cached analysis, or None if no indexed description
+            is similar enough or its analysis has left the cache
+        """
+        if self.similarity is None or settings.SIMILARITY_SERVE_THRESHOLD > 1:
+            return None
+        for match in self.similarity.query(
+            feature_description,
+            limit=3,
+            threshold=settings.SIMILARITY_SERVE_THRESHOLD,
+            variant=analysis_variant(mode, route)
+        ):
+            cached = await self.cache.get_async(match.key)
+            if cached is not None:
+                logger.info(f"Serving analysis of a near-duplicate description (similarity {match.score})")
+                return cached
+        return None
+
+    def similar_specs(self, feature_description: str) -> List[SimilarMatch]:
+        """
+        Previously analyzed descriptions similar to a description.
+
+        The description itself and repeats of the same description (analyzed
+        in several modes) are left out.
+
+        Args:
+            feature_description: Natural language description of the feature
+
+        Returns:
+            List[SimilarMatch]: Up to ``settings.SIMILAR_SPECS_LIMIT`` matches,
+            most similar first
+        """
+        if self.similarity is None or settings.SIMILAR_SPECS_LIMIT <= 0:
+            return []
+        seen = {normalize_description(feature_description)}
+        matches = []
+        candidates = self.similarity.query(
+            feature_description,
+            limit=2 * settings.SIMILAR_SPECS_LIMIT + 1,
+            threshold=settings.SIMILAR_SPECS_THRESHOLD
+        )
+        for match in candidates:
+            normalized = normalize_description(match.description)
+            if normalized not in seen:
+                seen.add(normalized)
+                matches.append(match)
+        return matches[:settings.SIMILAR_SPECS_LIMIT]
+
+    def spec_id(self, feature_description: str, mode: Optional[str] = None, tier: Optional[str] = None) -> str:
+        """
+        Identifier of the analysis of a description, usable while it is cached or stored.
+
+        Args:
+            feature_description: Natural language description of the feature
+            mode: Analysis mode; defaults to ``settings.ANALYSIS_MODE``
+            tier: Model route; defaults to routing by description size
+
+        Returns:
+            str: The analysis' cache key
+        """
+        route = self.router.select(feature_description, tier)
+        return self.cache_key(feature_description, mode or settings.ANALYSIS_MODE, route)
+
+    async def warm_up(self) -> None:
+        """
+        Prepare the model clients and prompts before the first analysis.
+
+        Each route's backend creates its client and opens its upstream
+        connection. Failures are logged, not raised: the first request simply
+        pays for whatever warm-up could not do.
+        """
+        start = time.perf_counter()
+        self._build_system_prompt()
+        routes = self.router.routes
+        results = await asyncio.gather(*(route.backend.warm_up() for route in routes), return_exceptions=True)
+        for route, result in zip(routes, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Warm-up of route {route.name} failed: {str(result)}")
+        logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+    @property
+    def keeps_specs(self) -> bool:
+        """Whether generated analyses are kept, in the cache or the spec store, and resolvable by spec id."""
+        return self.cache is not None or self.spec_store is not None
+
+    async def _keep(
+        self,
+        key: str,
+        feature_description: str,
+        spec: Dict[str, Any],
+        mode: str,
+        route: ModelRoute,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        Cache, index and persist a freshly generated, validated analysis.
+
+        Args:
+            key: Spec id of the analysis
+            feature_description: Description it was generated for
+            spec: The analysis
+            mode: Analysis mode it was generated in
+            route: Model route that generated it
+            timings: Seconds spent per generation stage
+        """
+        if self.cache is not None:
+            await self.cache.set_async(key, spec)
+            if self.similarity is not None:
+                self.similarity.add(key, feature_description, analysis_variant(mode, route))
+        if self.spec_store is not None:
+            self.spec_store.save(StoredSpec(
+                id=key,
+                description=feature_description,
+                spec=spec,
+                mode=mode,
+                tier=route.name,
+                model=route.model_name,
+                timings={stage: round(seconds, 4) for stage, seconds in (timings or {}).items()},
+            ))
+
+    async def get_spec(self, spec_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an analysis by its spec id, in the cache and then the spec store.
+
+        Args:
+            spec_id: Identifier returned with the analysis
+
+        Returns:
+            Optional[Dict]: The analysis, or None if it is neither cached nor stored
+        """
+        if self.cache is not None:
+            spec = await self.cache.get_async(spec_id)
+            if spec is not None:
+                return spec
+        if self.spec_store is not None:
+            stored = await asyncio.to_thread(self.spec_store.get, spec_id)
+            if stored is not None:
+                return stored.spec
+        return None
+
+    async def reanalyze(
+        self,
+        feature_description: str,
+        previous: Dict[str, Any],
+        previous_description: Optional[str] = None,
+        tier: Optional[str] = None,
+        store_in_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Update a specification for an edited feature description.
+
+        The model is asked only for the added, changed and removed items, which
+        are applied to the previous specification. If the delta cannot be
+        parsed or yields an invalid specification, the description is analyzed
+        in full instead.
+
+        Args:
+            feature_description: Edited feature description
+            previous: Specification of the previous description
+            previous_description: Previous description, if known
+            tier: Model route; defaults to routing by description size
+            store_in_cache: Whether the new specification may be cached
+
+        Returns:
+            Dict with the new ``spec``, its ``diff`` against ``previous``, the
+            ``strategy`` used (``delta`` or ``full``), the ``output_tokens``
+            spent, the ``estimated_full_output_tokens`` of the whole
+            specification and its ``spec_id`` if cached
+
+        Raises:
+            ValueError: If the tier is unknown or no valid specification could be generated
+        """
+        route = self.router.select(feature_description, tier)
+        key = self.cache_key(feature_description, "single", route)
+        cost = RequestCost()
+        cost_token = current_request_cost.set(cost)
+        route_token = current_route.set(route)
+        strategy = "delta"
+        try:
+            try:
+                delta, _ = await self._generate_json(
+                    self._build_delta_prompt(feature_description, previous, previous_description),
+                    "delta",
+                    output_budget(feature_description, SECTION_ORDER)
+                )
+                spec = apply_delta(previous, delta)
+                self._reconcile_schema(spec)
+                self.validate_response(spec)
+            except ValueError as e:
+                logger.warning(f"Delta re-analysis failed, regenerating in full: {str(e)}")
+                strategy = "full"
+                spec = await self._generate(feature_description)
+                self.validate_response(spec)
+        finally:
+            current_request_cost.reset(cost_token)
+            current_route.reset(route_token)
+        logger.info(f"Re-analysis ({strategy}) usage: {cost.summary()}")
+
+        stored = self.keeps_specs and store_in_cache
+        if stored:
+            await self._keep(key, feature_description, spec, "single", route)
+        return {
+            "spec": spec,
+            "diff": diff_specs(previous, spec),
+            "strategy": strategy,
+            "output_tokens": cost.output_tokens,
+            "estimated_full_output_tokens": estimate_tokens(json.dumps(spec, separators=(",", ":"))),
+            "spec_id": key if stored else None,
+        }
+
+    async def _generate(self, feature_description: str) -> Dict[str, Any]:
+        """
+        Generate the full specification for a feature description with a single prompt.
+
+        Truncated output is continued rather than regenerated, and sections that
+        are missing, empty or malformed are re-requested on their own. The whole
+        prompt is retried only when nothing could be salvaged.
         
         Args:
             feature_description: Natural language description of the feature
@@ -119,95 +842,453 @@ Provide a complete analysis including requirements, API design, database schema
             Dict containing requirements, API design, database schema, and sprint tasks
             
         Raises:
-            ValueError: If the LLM response cannot be parsed
+            ValueError: If no usable JSON was produced
             Exception: If the API call fails
         """
+        logger.info(f"Analyzing feature: {feature_description[:100]}...")
+        prompt = self._build_prompt(feature_description)
+        budget = output_budget(feature_description, SECTION_ORDER)
         max_retries = 3
-        last_error = None
+
+        for attempt in range(max_retries):
+            output = await self._call_model(prompt, max_output_tokens=budget)
+            spec, text = await self._parse_or_continue(prompt, output, budget)
+            if spec is None:
+                spec = salvage_sections(text)
+                if spec:
+                    logger.info(f"Salvaged sections from malformed response: {sorted(spec)}")
+            if spec:
+                return await self._repair_sections(feature_description, spec, output.output_tokens)
+
+            logger.error(f"Nothing salvageable in LLM response (Attempt {attempt + 1})")
+            if attempt < max_retries - 1:
+                self.repair_stats.record_full_retry()
+
+        raise ValueError(f"Invalid JSON response from LLM after {max_retries} attempts")
+
+    async def _repair_sections(
+        self,
+        feature_description: str,
+        spec: Dict[str, Any],
+        full_cost: int
+    ) -> Dict[str, Any]:
+        """
+        Regenerate only the defective sections of a specification.
+
+        ``database_schema`` is first reconciled with the parsed
+        ``database_schema_sql``, so tables the script defines are described
+        without a model call.
         
+        Args:
+            feature_description: Natural language description of the feature
+            spec: Parsed specification, possibly partial
+            full_cost: Output tokens a full regeneration would cost
+            
+        Returns:
+            Dict: Specification with repaired sections merged in
+        """
+        for round_number in range(settings.MAX_REPAIR_ROUNDS + 1):
+            # Tables the SQL defines need no model call to be described
+            self._reconcile_schema(spec)
+            defects = find_defective_sections(spec, include_warnings=settings.REPAIR_WARNINGS)
+            if not defects or round_number == settings.MAX_REPAIR_ROUNDS:
+                break
+            groups = group_defects(defects)
+            logger.info(f"Repairing sections (round {round_number + 1}/{settings.MAX_REPAIR_ROUNDS}): {defects}")
+
+            context = self._summarize_spec({
+                section: value for section, value in spec.items() if section not in defects
+            })
+            tasks = [
+                asyncio.ensure_future(self._generate_json(
+                    self._build_section_prompt(
+                        feature_description,
+                        sections,
+                        context,
+                        [defects[section] for section in sections if section in defects]
+                    ),
+                    f"{label} repair",
+                    output_budget(feature_description, sections)
+                ))
+                for label, sections in groups
+            ]
+            try:
+                parts = await asyncio.gather(*tasks)
+            except asyncio.CancelledError:
+                for task in tasks:
+                    task.cancel()
+                raise
+            except Exception as e:
+                for task in tasks:
+                    task.cancel()
+                logger.error(f"Section repair failed: {str(e)}")
+                break
+
+            repaired = 0
+            output_tokens = 0
+            for (label, sections), (part, tokens) in zip(groups, parts):
+                output_tokens += tokens
+                candidate = {**spec, **{section: part[section] for section in sections if section in part}}
+                before = count_issues(spec, sections)
+                after = count_issues(candidate, sections)
+                # Warnings only decide between equally valid sections when they are being repaired
+                better = after < before if settings.REPAIR_WARNINGS else after[0] < before[0]
+                if better:
+                    repaired += sum(1 for section in sections if section in part)
+                    spec.update(candidate)
+                else:
+                    logger.warning(
+                        f"Kept the original {label}: the regenerated one has {after[0]} errors and "
+                        f"{after[1]} warnings against {before[0]} and {before[1]}"
+                    )
+            self.repair_stats.record_section_repair(repaired, output_tokens, full_cost)
+            logger.info(
+                f"Repaired {repaired} section(s) with ~{output_tokens} output tokens "
+                f"instead of ~{full_cost} for a full retry"
+            )
+
+        for issue in validate_spec(spec):
+            SPEC_ISSUES.inc(check=issue.check, severity=issue.severity)
+            if issue.severity == "warning":
+                logger.warning(f"Unrepaired specification issue: {issue}")
+        return spec
+
+    async def _generate_parallel(self, feature_description: str, timings: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Generate the specification as concurrent per-section prompts and merge the results.
+
+        Sections within a stage of ``PARALLEL_STAGES`` are generated concurrently;
+        later stages receive a compact summary of what earlier stages produced.
+        
+        Args:
+            feature_description: Natural language description of the feature
+            timings: Dict that receives the seconds spent per section
+            
+        Returns:
+            Dict containing requirements, API design, database schema, and sprint tasks
+        """
+        logger.info(f"Analyzing feature in parallel mode: {feature_description[:100]}...")
+        spec: Dict[str, Any] = {}
+
+        async def run(label: str, sections: Tuple[str, ...], context: Optional[str]) -> Dict[str, Any]:
+            start = time.perf_counter()
+            prompt = self._build_section_prompt(feature_description, sections, context)
+            result, _ = await self._generate_json(prompt, label, output_budget(feature_description, sections))
+            timings[label] = time.perf_counter() - start
+            logger.info(f"Generated {label} in {timings[label]:.2f}s")
+            return {section: result[section] for section in sections if section in result}
+
+        for stage in PARALLEL_STAGES:
+            context = self._summarize_spec(spec) if spec else None
+            tasks = [asyncio.ensure_future(run(label, sections, context)) for label, sections in stage]
+            try:
+                parts = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+            for part in parts:
+                spec.update(part)
+
+        return await self._repair_sections(feature_description, spec, settings.MAX_TOKENS)
+
+    async def _generate_json(
+        self,
+        prompt: Prompt,
+        label: str,
+        max_output_tokens: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Send a prompt to Gemini and parse the JSON object it returns.
+
+        Truncated output is continued; other unparseable output triggers a retry.
+        
+        Args:
+            prompt: Prompt to send
+            label: Name of what is being generated, for logging
+            max_output_tokens: Output budget of each call
+            
+        Returns:
+            Tuple of the parsed JSON object and the output tokens spent on it
+            
+        Raises:
+            ValueError: If the LLM response cannot be parsed
+            Exception: If the API call fails
+        """
+        max_retries = 3
+        output_tokens = 0
+
         for attempt in range(max_retries):
+            logger.info(f"Generating {label} (Attempt {attempt + 1}/{max_retries})")
+            output = await self._call_model(prompt, max_output_tokens=max_output_tokens)
+            output_tokens += output.output_tokens
+            result, _ = await self._parse_or_continue(prompt, output, max_output_tokens)
+            if result is not None:
+                return result, output_tokens
+            if attempt < max_retries - 1:
+                self.repair_stats.record_full_retry()
+
+        raise ValueError(f"Invalid JSON response from LLM for {label} after {max_retries} attempts")
+
+    def _request_parts(self, prompt: Prompt) -> Tuple[str, Optional[str]]:
+        """
+        Split a prompt into the contents and system instruction sent to the backend.
+
+        With ``settings.SYSTEM_INSTRUCTION_ENABLED`` the static instructions go
+        in the system instruction, where the provider can cache them across
+        requests; otherwise the whole prompt is sent as contents.
+        
+        Args:
+            prompt: Prompt to send
+            
+        Returns:
+            Tuple of the contents and the system instruction (None if inlined)
+        """
+        if settings.SYSTEM_INSTRUCTION_ENABLED:
+            return prompt.user, prompt.system
+        return prompt.text, None
+
+    async def _call_model(
+        self,
+        prompt: Prompt,
+        json_mode: bool = True,
+        max_output_tokens: Optional[int] = None
+    ) -> ModelOutput:
+        """
+        Call Gemini through the upstream governor.
+
+        The upstream call is awaited via ``generate_content_async`` so the event
+        loop stays free while Gemini is generating; at most
+        ``settings.MAX_CONCURRENT_REQUESTS`` calls are in flight at once. Rate
+        limits, retries with backoff and the circuit breaker are applied by
+        ``self.upstream``. Each attempt goes to the model route of the current
+        analysis and may be hedged by ``self.router``.
+        
+        Args:
+            prompt: Prompt to send
+            json_mode: Whether to request a JSON response
+            max_output_tokens: Output budget; defaults to ``settings.MAX_TOKENS``
+            
+        Returns:
+            ModelOutput: Generated text, finish reason and output token count
+            
+        Raises:
+            UpstreamError: If the API call fails for good or the circuit is open
+        """
+        generation_config = self._generation_config(max_output_tokens)
+        if not json_mode:
+            generation_config.pop("response_mime_type")
+        contents, system_instruction = self._request_parts(prompt)
+        # Count before sending: charged to the token budget and logged
+        estimated_tokens = estimate_tokens(prompt.text)
+        logger.info(
+            f"Sending ~{estimated_tokens} prompt tokens "
+            f"(~{estimate_tokens(prompt.system)} static), max_output_tokens={generation_config['max_output_tokens']}"
+        )
+
+        route = current_route.get() or self.router.default
+        # Full, per-section and continuation prompts have their own latency profiles
+        if not json_mode:
+            kind = "continuation"
+        elif prompt.system == self._build_system_prompt():
+            kind = "full"
+        else:
+            kind = "section"
+
+        async def attempt(route: ModelRoute) -> ModelOutput:
+            # Call Gemini API without blocking the event loop
+            async with self.semaphore:
+                with UPSTREAM_IN_FLIGHT.track_in_progress(), STAGE_DURATION.time(stage="upstream_call"):
+                    response = await route.backend.generate_content_async(
+                        contents,
+                        generation_config=generation_config,
+                        system_instruction=system_instruction
+                    )
+            text = response.text
+            output = ModelOutput(text, _finish_reason(response), _output_tokens(response, text))
+            prompt_tokens = _prompt_tokens(response, prompt.text)
+            LLM_TOKENS.inc(prompt_tokens, type="prompt")
+            # Every response is charged, including a hedge that loses the race
+            await self.upstream.record_usage(output.output_tokens)
+            LLM_TOKENS.inc(output.output_tokens, type="output")
+            self.prompt_budget.record(
+                prompt_tokens, _cached_tokens(response), output.output_tokens, generation_config["max_output_tokens"]
+            )
+            return output
+
+        output = await self.upstream.call(
+            functools.partial(
+                self.router.call, route, kind, attempt,
+                charge=functools.partial(self.upstream.charge, estimated_tokens),
+                usable=functools.partial(_usable_output, json_mode=json_mode),
+            ),
+            estimated_tokens
+        )
+        logger.info("Successfully received LLM response")
+        return output
+
+    async def _parse_or_continue(
+        self,
+        prompt: Prompt,
+        output: ModelOutput,
+        max_output_tokens: Optional[int] = None
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Parse a model output, asking for continuations while it is truncated.
+        
+        Args:
+            prompt: Prompt that produced the output
+            output: Model output to parse
+            max_output_tokens: Output budget of each continuation
+            
+        Returns:
+            Tuple of the parsed object (None if unparseable) and the full text received
+        """
+        text = output.text
+        finish_reason = output.finish_reason
+
+        for continuation in range(settings.MAX_CONTINUATIONS + 1):
             try:
-                logger.info(f"Analyzing feature (Attempt {attempt + 1}/{max_retries}): {feature_description[:100]}...")
-                
-                # Combine system and user prompts
-                full_prompt = f"{self._build_system_prompt()}\n\n{self._build_user_prompt(feature_description)}"
-                
-                # Configure generation parameters
-                generation_config = {
-                    "temperature": settings.TEMPERATURE,
-                    "max_output_tokens": settings.MAX_TOKENS,
-                    "response_mime_type": "application/json"
-                }
-                
-                # Call Gemini API
-                response = self.model.generate_content(
-                    full_prompt,
-                    generation_config=generation_config
-                )
-                
-                # Extract and parse the response
-                content = response.text
-                logger.info("Successfully received LLM response")
-                
-                # Clean up the response (remove markdown code blocks if present)
-                content = content.strip()
-                
-                # Remove markdown code blocks
-                if "```json" in content:
-                    content = content.split("```json")[1]
-                    if "```" in content:
-                        content = content.split("```")[0]
-                elif "```" in content:
-                    content = content.split("```")[1]
-                    if "```" in content:
-                        content = content.split("```")[0]
-                
-                content = content.strip()
-                
-                # Parse JSON response
-                try:
-                    result = json.loads(content)
+                with STAGE_DURATION.time(stage="parse"):
+                    extraction = extract_json(text)
+            except JSONExtractionError as e:
+                logger.error(f"Failed to parse JSON response: {e}")
+                extraction = None
+
+            if extraction is not None and not extraction.truncated:
+                if extraction.repairs:
+                    logger.info(f"Parsed JSON response after repair: {', '.join(extraction.repairs)}")
+                else:
                     logger.info("Successfully parsed JSON response")
-                    return result
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse JSON response (Attempt {attempt + 1}): {e}")
-                    # logger.error(f"RAW RESPONSE START:\n{content}\nRAW RESPONSE END")
-                    
-                    # Attempt to repair common JSON issues
-                    try:
-                        # Sometimes Gemini adds text before or after JSON
-                        start_idx = content.find('{')
-                        end_idx = content.rfind('}')
-                        
-                        if start_idx != -1 and end_idx != -1:
-                            json_str = content[start_idx:end_idx+1]
-                            result = json.loads(json_str)
-                            logger.info("Successfully parsed JSON after repair")
-                            return result
-                    except Exception as repair_error:
-                        logger.error(f"Failed to repair JSON: {repair_error}")
-                    
-                    last_error = ValueError(f"Invalid JSON response from LLM: {str(e)}")
-                    # If this was the last attempt, raise the error
-                    if attempt == max_retries - 1:
-                        raise last_error
-                    
-            except Exception as e:
-                logger.error(f"Error calling LLM API (Attempt {attempt + 1}): {str(e)}")
-                last_error = e
-                # Provide more helpful error message
-                if "400" in str(e) and "API key" in str(e):
-                    raise Exception("Invalid API Key. Please check your Google Gemini API key in backend/.env")
-                
-                if attempt == max_retries - 1:
-                    raise Exception(f"Failed to analyze feature after {max_retries} attempts: {str(e)}")
-        
-        if last_error:
-            raise last_error
-    
+                return extraction.value, text
+
+            # Trust the model's finish reason; fall back to whether the brackets closed
+            if finish_reason is not None:
+                truncated = finish_reason == "MAX_TOKENS"
+            else:
+                truncated = extraction is not None and extraction.truncated
+            if continuation == settings.MAX_CONTINUATIONS or not truncated:
+                break
+
+            logger.info(f"Response truncated, requesting continuation {continuation + 1}/{settings.MAX_CONTINUATIONS}")
+            extra = await self._call_model(
+                Prompt(prompt.system, build_continuation_prompt(prompt.user, text)),
+                json_mode=False,
+                max_output_tokens=max_output_tokens
+            )
+            # A full retry would have regenerated everything received so far as well
+            self.repair_stats.record_continuation(extra.output_tokens, output.output_tokens + extra.output_tokens)
+            text += _strip_code_fences(extra.text)
+            finish_reason = extra.finish_reason
+
+        return None, text
+
+    async def stream_analysis(
+        self,
+        feature_description: str,
+        use_cache: bool = True,
+        store_in_cache: bool = True,
+        tier: Optional[str] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        Stream an analysis, yielding each item of the specification as soon as it is complete.
+
+        A cached analysis is replayed immediately. A streamed result is stored in
+        the cache once complete if it passes ``validate_response``.
+        
+        Args:
+            feature_description: Natural language description of the feature
+            use_cache: Whether a cached result may be replayed
+            store_in_cache: Whether the streamed result may be stored
+            tier: Model route to use; defaults to routing by description size
+            
+        Yields:
+            StreamEvent: Completed items, top-level values and section ends
+            
+        Raises:
+            ValueError: If the tier is unknown, or the stream contains malformed
+                JSON or ends early
+        """
+        route = self.router.select(feature_description, tier)
+        key = self.cache_key(feature_description, route=route)
+
+        if self.cache is not None and use_cache:
+            cached = await self.cache.get_async(key)
+            CACHE_LOOKUPS.inc(result="hit" if cached is not None else "miss")
+            if cached is not None:
+                logger.info("Replaying analysis from cache")
+                for section, value in cached.items():
+                    if isinstance(value, list):
+                        for item in value:
+                            yield StreamEvent("item", section, item)
+                        yield StreamEvent("section_end", section, len(value))
+                    else:
+                        yield StreamEvent("value", section, value)
+                return
+
+        logger.info(f"Streaming analysis: {feature_description[:100]}...")
+        parser = SpecStreamParser()
+        result: Dict[str, Any] = {}
+
+        prompt = self._build_prompt(feature_description)
+        budget = output_budget(feature_description, SECTION_ORDER)
+        contents, system_instruction = self._request_parts(prompt)
+        prompt_tokens = estimate_tokens(prompt.text)
+
+        async def start_stream():
+            return await route.backend.generate_content_async(
+                contents,
+                generation_config=self._generation_config(budget),
+                stream=True,
+                system_instruction=system_instruction
+            )
+
+        async with self.semaphore:
+            response = await self.upstream.call(start_stream, prompt_tokens)
+            streamed_chars = 0
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks carrying only finish metadata have no text parts
+                    continue
+                streamed_chars += len(text)
+                for event in parser.feed(text):
+                    if event.kind == "item":
+                        result.setdefault(event.section, []).append(event.value)
+                    elif event.kind == "section_end":
+                        result.setdefault(event.section, [])
+                    else:
+                        result[event.section] = event.value
+                    yield event
+
+        output_tokens = max(1, streamed_chars // 4)
+        await self.upstream.record_usage(output_tokens)
+        LLM_TOKENS.inc(prompt_tokens, type="prompt")
+        LLM_TOKENS.inc(output_tokens, type="output")
+        # Streamed chunks carry no reliable usage totals; account from estimates
+        self.prompt_budget.record(prompt_tokens, 0, output_tokens, budget)
+        cost = RequestCost()
+        cost.add(prompt_tokens, 0, output_tokens, budget)
+        logger.info(f"Streamed analysis usage: {cost.summary()}")
+
+        if not parser.done:
+            raise ValueError("Stream ended before the specification was complete")
+
+        if self.keeps_specs and store_in_cache:
+            try:
+                self.validate_response(result)
+            except ValueError:
+                logger.warning("Not caching streamed analysis that failed validation")
+            else:
+                await self._keep(key, feature_description, result, "single", route)
+
     def validate_response(self, response: Dict[str, Any]) -> bool:
         """
-        Validate that the LLM response contains all required fields.
+        Validate that the LLM response fits the response models.
+
+        Runs ``validate_spec``. Only its errors fail validation; warnings such
+        as a dependency on an unknown task are targeted by section repair.
         
         Args:
             response: Parsed JSON response from LLM
@@ -215,23 +1296,27 @@ Provide a complete analysis including requirements, API design, database schema
         Returns:
             bool: True if valid, raises ValueError otherwise
         """
-        required_fields = ["requirements", "api_design", "database_schema", 
-                          "database_schema_sql", "sprint_tasks"]
-        
-        for field in required_fields:
-            if field not in response:
-                raise ValueError(f"Missing required field: {field}")
-        
-        # Validate that lists are not empty
-        if not response["requirements"]:
-            raise ValueError("Requirements list cannot be empty")
-        if not response["api_design"]:
-            raise ValueError("API design list cannot be empty")
-        if not response["sprint_tasks"]:
-            raise ValueError("Sprint tasks list cannot be empty")
-            
+        errors = [issue for issue in validate_spec(response) if issue.severity == "error"]
+        if errors:
+            raise ValueError(f"Invalid specification: {summarize_issues(errors)}")
         return True
 
 
-# Global service instance
-llm_service = LLMService()
+_service: Optional[LLMService] = None
+
+
+def get_llm_service() -> LLMService:
+    """
+    The shared LLM service, created on first use.
+
+    Nothing is built when this module is imported, so importing it needs
+    neither an API key nor the Gemini client; the application lifespan
+    creates the service at startup.
+
+    Returns:
+        LLMService: The process-wide service instance
+    """
+    global _service
+    if _service is None:
+        _service = LLMService()
+    return _service
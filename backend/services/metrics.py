@@ -0,0 +1,376 @@
+"""
+Prometheus-style metrics for the analysis pipeline.
+A small dependency-free registry of counters, gauges and histograms rendered in
+the Prometheus text exposition format, plus an ASGI middleware that times every
+HTTP request. Registries of several worker processes can be combined through
+snapshots.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds; extends the usual web buckets to cover LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value the way Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render a label set, or an empty string if there are no labels."""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    """Base class for a named metric family with a fixed set of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self, values: Dict[Tuple[str, ...], Any]) -> List[str]:
+        raise NotImplementedError
+
+    @staticmethod
+    def _add(a: Any, b: Any) -> Any:
+        """Combine the values of one label set from two processes."""
+        return a + b
+
+    def snapshot(self) -> List[list]:
+        """Current samples as JSON-serializable ``[label values, value]`` pairs."""
+        with self._lock:
+            return [[list(key), list(value) if isinstance(value, list) else value] for key, value in self._values.items()]
+
+    def merge(self, snapshots: Sequence[List[list]]) -> Dict[Tuple[str, ...], Any]:
+        """
+        Sum snapshots of this family taken in several processes.
+
+        Args:
+            snapshots: Results of ``snapshot()``
+
+        Returns:
+            dict: Combined value per label set
+        """
+        merged: Dict[Tuple[str, ...], Any] = {}
+        for samples in snapshots:
+            for key, value in samples:
+                key = tuple(key)
+                merged[key] = self._add(merged[key], value) if key in merged else value
+        return merged
+
+    def render(self, values: Optional[Dict[Tuple[str, ...], Any]] = None) -> str:
+        """
+        Render the family with its HELP and TYPE lines.
+
+        Args:
+            values: Values to render, e.g. from ``merge()``; defaults to this process's
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if values is None:
+            with self._lock:
+                values = {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+        lines.extend(self._samples(values))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Add ``amount`` to the counter for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value for the given labels."""
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self, values: Dict[Tuple[str, ...], Any]) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the gauge for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrease the gauge for the given labels."""
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_in_progress(self, **labels) -> Iterator[None]:
+        """Increment the gauge for the duration of a block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self, values: Dict[Tuple[str, ...], Any]) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of a block in seconds, whether or not it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        """Number of observations for the given labels."""
+        state = self._values.get(self._key(labels))
+        return int(state[-1]) if state else 0
+
+    @staticmethod
+    def _add(a: List[float], b: List[float]) -> List[float]:
+        return [x + y for x, y in zip(a, b)]
+
+    def _samples(self, values: Dict[Tuple[str, ...], Any]) -> List[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Create and register a gauge."""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self, gauges: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Capture every metric for combining with other processes' registries.
+
+        Args:
+            gauges: Include gauges; a process that is exiting leaves them out,
+                since its in-flight counts no longer exist
+
+        Returns:
+            dict: JSON-serializable kind and samples per metric name
+        """
+        return {
+            name: {"kind": metric.kind, "samples": metric.snapshot()}
+            for name, metric in self._metrics.items()
+            if gauges or metric.kind != "gauge"
+        }
+
+    def render(self, snapshots: Optional[Sequence[Dict[str, Dict[str, Any]]]] = None) -> str:
+        """
+        Render every registered metric.
+
+        Args:
+            snapshots: Results of ``snapshot()`` from every worker process, summed
+                per label set; defaults to this process's own values
+
+        Returns:
+            str: Metrics in the Prometheus text exposition format
+        """
+        if snapshots is None:
+            return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+        return "\n".join(
+            metric.render(metric.merge([snapshot[name]["samples"] for snapshot in snapshots if name in snapshot]))
+            for name, metric in self._metrics.items()
+        ) + "\n"
+
+
+# Global registry and the metrics recorded by the application
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "analyzer_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+HTTP_DURATION = registry.histogram(
+    "analyzer_http_request_duration_seconds", "HTTP request duration including the streamed body", ("method", "route"))
+HTTP_IN_FLIGHT = registry.gauge(
+    "analyzer_http_requests_in_flight", "HTTP requests currently being handled")
+STAGE_DURATION = registry.histogram(
+    "analyzer_stage_duration_seconds",
+    "Duration of analysis pipeline stages (upstream_call, parse, validate, response_model)",
+    ("stage",))
+UPSTREAM_ATTEMPTS = registry.counter(
+    "analyzer_upstream_attempts_total", "Gemini calls attempted, including retries")
+UPSTREAM_RETRIES = registry.counter(
+    "analyzer_upstream_retries_total", "Gemini calls retried after a transient failure")
+UPSTREAM_ERRORS = registry.counter(
+    "analyzer_upstream_errors_total", "Failed Gemini calls by error class", ("kind",))
+UPSTREAM_IN_FLIGHT = registry.gauge(
+    "analyzer_upstream_requests_in_flight", "Gemini calls currently awaiting a response")
+LLM_TOKENS = registry.counter(
+    "analyzer_llm_tokens_total", "Tokens reported by Gemini usage metadata (estimated if absent)", ("type",))
+ROUTE_CALLS = registry.counter(
+    "analyzer_route_calls_total", "Model calls per route by outcome (ok, error)", ("route", "outcome"))
+ROUTE_DURATION = registry.histogram(
+    "analyzer_route_call_duration_seconds", "Successful model call duration per route and call kind", ("route", "kind"))
+HEDGED_REQUESTS = registry.counter(
+    "analyzer_hedged_requests_total", "Hedged model calls per route (launched, won)", ("route", "outcome"))
+SPEC_ISSUES = registry.counter(
+    "analyzer_spec_issues_total", "Issues left in generated specifications after repair", ("check", "severity"))
+SPEC_STORE_WRITES = registry.counter(
+    "analyzer_spec_store_writes_total", "Specifications written to or dropped by the spec store", ("result",))
+COMPRESSION_SAVED_BYTES = registry.counter(
+    "analyzer_compression_saved_bytes_total", "Response bytes saved by compression per content encoding", ("encoding",))
+CACHE_LOOKUPS = registry.counter(
+    "analyzer_cache_lookups_total", "Response cache lookups by result", ("result",))
+SINGLEFLIGHT_CALLS = registry.counter(
+    "analyzer_singleflight_calls_total", "Analyses run (executed) or merged onto an identical one in flight (merged)",
+    ("outcome",))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, durations and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Label by route template so ids in paths do not create new series
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_DURATION.observe(time.perf_counter() - start, method=method, route=path)
+            HTTP_REQUESTS.inc(method=method, route=path, status=status_code)
@@ -0,0 +1,185 @@
+"""
+Prompt token budgeting and cost accounting.
+Sizes the output budget of each model call to the feature description, counts
+prompt tokens before they are sent and estimates what prompt caching of the
+static instructions saves per request.
+"""
+
+import logging
+import math
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+from config import settings
+from services.repair import estimate_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Share of a full specification's output taken by each section
+SECTION_OUTPUT_WEIGHTS: Dict[str, float] = {
+    "requirements": 0.2,
+    "api_design": 0.25,
+    "database_schema": 0.2,
+    "database_schema_sql": 0.15,
+    "sprint_tasks": 0.2,
+}
+
+# Smallest output budget given to a partial (per-section) prompt
+MIN_SECTION_OUTPUT_TOKENS = 1024
+
+
+class Prompt(NamedTuple):
+    """A prompt split into its static instructions and the request-specific part."""
+
+    system: str
+    """Instructions shared by every request for the same sections."""
+    user: str
+    """Feature description, context and any continuation request."""
+
+    @property
+    def text(self) -> str:
+        """The prompt as a single string, for backends without system instructions."""
+        return f"{self.system}\n\n{self.user}"
+
+
+def output_budget(feature_description: str, sections: Sequence[str]) -> int:
+    """
+    Output token budget for generating some sections of a specification.
+
+    Grows with the size of the description, since longer descriptions yield
+    more requirements, endpoints and tasks, and is capped at ``settings.MAX_TOKENS``.
+    Truncated output is continued, so a budget that turns out too small costs a
+    continuation rather than a failed request.
+
+    Args:
+        feature_description: Natural language description of the feature
+        sections: Sections the prompt asks for
+
+    Returns:
+        int: ``max_output_tokens`` for the call
+    """
+    if not settings.ADAPTIVE_OUTPUT_BUDGET:
+        return settings.MAX_TOKENS
+    full = settings.OUTPUT_TOKENS_MIN + settings.OUTPUT_TOKENS_PER_INPUT_TOKEN * estimate_tokens(feature_description)
+    share = sum(SECTION_OUTPUT_WEIGHTS.get(section, 0.0) for section in sections)
+    budget = math.ceil(full * min(1.0, share))
+    if share < 1.0:
+        budget = max(budget, MIN_SECTION_OUTPUT_TOKENS)
+    return min(settings.MAX_TOKENS, budget)
+
+
+def token_cost(prompt_tokens: int, cached_tokens: int, output_tokens: int) -> float:
+    """
+    Estimated price of one model call in USD.
+
+    Args:
+        prompt_tokens: Prompt tokens, including cached ones
+        cached_tokens: Prompt tokens served from the provider's cache
+        output_tokens: Generated tokens
+
+    Returns:
+        float: Estimated cost
+    """
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (
+        uncached * settings.INPUT_TOKEN_PRICE
+        + cached_tokens * settings.CACHED_INPUT_TOKEN_PRICE
+        + output_tokens * settings.OUTPUT_TOKEN_PRICE
+    ) / 1_000_000
+
+
+class RequestCost:
+    """Token usage and estimated cost of the model calls made for one analysis."""
+
+    def __init__(self):
+        """Initialize empty usage."""
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.output_budget = 0
+
+    def add(self, prompt_tokens: int, cached_tokens: int, output_tokens: int, budget: int) -> None:
+        """Record one model call."""
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        self.output_tokens += output_tokens
+        self.output_budget += budget
+
+    @property
+    def cost(self) -> float:
+        """Estimated cost of the calls in USD."""
+        return token_cost(self.prompt_tokens, self.cached_tokens, self.output_tokens)
+
+    @property
+    def saved(self) -> float:
+        """Estimated USD saved by cached prompt tokens."""
+        return self.cached_tokens * (settings.INPUT_TOKEN_PRICE - settings.CACHED_INPUT_TOKEN_PRICE) / 1_000_000
+
+    def summary(self) -> str:
+        """One-line description for the request log."""
+        return (
+            f"{self.calls} call(s), ~{self.prompt_tokens} prompt tokens ({self.cached_tokens} cached), "
+            f"{self.output_tokens} output tokens within a {self.output_budget} token budget; "
+            f"est. cost ${self.cost:.5f}, saved ${self.saved:.5f} by prompt caching"
+        )
+
+
+# Usage of the analysis being generated in the current task, if any
+current_request_cost: ContextVar[Optional[RequestCost]] = ContextVar("current_request_cost", default=None)
+
+
+class PromptBudgetStats:
+    """Service-wide totals of prompt tokens, caching and estimated cost."""
+
+    def __init__(self):
+        """Initialize all counters to zero."""
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.output_budget_saved = 0
+
+    def record(self, prompt_tokens: int, cached_tokens: int, output_tokens: int, budget: int) -> None:
+        """
+        Record one model call, globally and for the current request.
+
+        Args:
+            prompt_tokens: Prompt tokens sent, including cached ones
+            cached_tokens: Prompt tokens served from the provider's cache
+            output_tokens: Generated tokens
+            budget: ``max_output_tokens`` the call was made with
+        """
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            self.output_tokens += output_tokens
+            self.output_budget_saved += max(0, settings.MAX_TOKENS - budget)
+        request = current_request_cost.get()
+        if request is not None:
+            request.add(prompt_tokens, cached_tokens, output_tokens, budget)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report token totals.
+
+        Returns:
+            dict: Calls, prompt, cached and output tokens, and estimated cost and savings
+        """
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_tokens,
+            "output_tokens": self.output_tokens,
+            "output_budget_saved_tokens": self.output_budget_saved,
+            "estimated_cost_usd": round(token_cost(self.prompt_tokens, self.cached_tokens, self.output_tokens), 6),
+            "estimated_saved_usd": round(
+                self.cached_tokens * (settings.INPUT_TOKEN_PRICE - settings.CACHED_INPUT_TOKEN_PRICE) / 1_000_000, 6
+            ),
+        }
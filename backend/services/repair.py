@@ -0,0 +1,197 @@
+"""
+Section-level repair of generated specifications.
+Identifies which sections of a specification are missing, empty, malformed or
+inconsistent with the others so that only those are regenerated, and keeps
+counters for every repair step.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+
+from services.json_extractor import JSONExtractionError, extract_json
+from services.spec_validator import SpecIssue, summarize_issues, validate_spec
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sections regenerated together because one is derived from the other
+REPAIR_GROUPS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("requirements", ("requirements",)),
+    ("api_design", ("api_design",)),
+    ("database", ("database_schema", "database_schema_sql")),
+    ("sprint_tasks", ("sprint_tasks",)),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the token count of a piece of text.
+
+    Args:
+        text: Prompt or model output
+
+    Returns:
+        int: Estimated tokens (about four characters per token)
+    """
+    return max(1, len(text) // 4)
+
+
+def build_continuation_prompt(prompt: str, partial: str) -> str:
+    """
+    Build a prompt asking the model to continue a truncated JSON document.
+
+    Args:
+        prompt: Prompt that produced the truncated output
+        partial: Output received so far
+
+    Returns:
+        str: Continuation prompt
+    """
+    return f"""{prompt}
+
+Your previous response was cut off before the JSON object was complete. This is what you produced so far:
+
+{partial}
+
+Continue the JSON EXACTLY from the last character above. Do not repeat anything already written and do not start a new object. Output only the remaining characters."""
+
+
+def salvage_sections(text: str) -> Dict[str, Any]:
+    """
+    Recover the sections that were completed before a JSON document broke off.
+
+    The section that was still open when the text ended is dropped, so a
+    section cut off half-way is treated as missing rather than silently shortened.
+
+    Args:
+        text: Raw, possibly truncated model output
+
+    Returns:
+        Dict: Completed top-level sections
+    """
+    try:
+        extraction = extract_json(text)
+    except JSONExtractionError as e:
+        logger.warning(f"Nothing to salvage: {e}")
+        return {}
+
+    salvaged = extraction.value
+    if not isinstance(salvaged, dict):
+        return {}
+    if extraction.truncated and extraction.open_depth > 1 and salvaged:
+        dropped = next(reversed(salvaged))
+        del salvaged[dropped]
+        logger.info(f"Dropped incomplete section: {dropped}")
+    return salvaged
+
+
+def find_defective_sections(spec: Dict[str, Any], include_warnings: bool = False) -> Dict[str, str]:
+    """
+    List the sections of a specification that need to be regenerated.
+
+    A section is defective if ``validate_spec`` reports an error in it, one
+    that keeps the specification from being returned. Warnings, such as
+    non-Fibonacci story points or dangling foreign keys, only count if asked for.
+
+    Args:
+        spec: Parsed (possibly partial) specification
+        include_warnings: Also regenerate sections whose only issues are warnings
+
+    Returns:
+        Dict[str, str]: Defective section names mapped to their issues
+    """
+    by_section: Dict[str, List[SpecIssue]] = {}
+    for issue in validate_spec(spec):
+        if include_warnings or issue.severity == "error":
+            by_section.setdefault(issue.section, []).append(issue)
+    return {section: summarize_issues(issues) for section, issues in by_section.items()}
+
+
+def count_issues(spec: Dict[str, Any], sections: Tuple[str, ...]) -> Tuple[int, int]:
+    """
+    Count the issues ``validate_spec`` reports in some sections of a specification.
+
+    Args:
+        spec: Parsed (possibly partial) specification
+        sections: Sections whose issues are counted
+
+    Returns:
+        Tuple[int, int]: Errors and warnings in those sections
+    """
+    errors = warnings = 0
+    for issue in validate_spec(spec):
+        if issue.section in sections:
+            if issue.severity == "error":
+                errors += 1
+            else:
+                warnings += 1
+    return errors, warnings
+
+
+def group_defects(defects: Dict[str, str]) -> List[Tuple[str, Tuple[str, ...]]]:
+    """
+    Map defective sections to the prompt groups that regenerate them.
+
+    Args:
+        defects: Output of ``find_defective_sections``
+
+    Returns:
+        List of (label, sections) groups to regenerate
+    """
+    return [
+        (label, sections)
+        for label, sections in REPAIR_GROUPS
+        if any(section in defects for section in sections)
+    ]
+
+
+class RepairStats:
+    """Counters for repair steps and the output tokens they saved."""
+
+    def __init__(self):
+        """Initialize all counters to zero."""
+        self._lock = threading.Lock()
+        self.continuations = 0
+        self.section_repairs = 0
+        self.sections_repaired = 0
+        self.full_retries = 0
+        self.repair_output_tokens = 0
+        self.tokens_saved = 0
+
+    def record_continuation(self, output_tokens: int, full_cost: int) -> None:
+        """Record a continuation request and the tokens it used versus a full retry."""
+        with self._lock:
+            self.continuations += 1
+            self.repair_output_tokens += output_tokens
+            self.tokens_saved += max(0, full_cost - output_tokens)
+
+    def record_section_repair(self, sections: int, output_tokens: int, full_cost: int) -> None:
+        """Record a section repair round and the tokens it used versus a full retry."""
+        with self._lock:
+            self.section_repairs += 1
+            self.sections_repaired += sections
+            self.repair_output_tokens += output_tokens
+            self.tokens_saved += max(0, full_cost - output_tokens)
+
+    def record_full_retry(self) -> None:
+        """Record a retry of the whole prompt."""
+        with self._lock:
+            self.full_retries += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report repair counters.
+
+        Returns:
+            dict: Repair step counts and estimated output tokens saved
+        """
+        return {
+            "continuations": self.continuations,
+            "section_repairs": self.section_repairs,
+            "sections_repaired": self.sections_repaired,
+            "full_retries": self.full_retries,
+            "repair_output_tokens": self.repair_output_tokens,
+            "estimated_tokens_saved": self.tokens_saved,
+        }
@@ -0,0 +1,361 @@
+"""
+Model routing and hedged requests.
+Holds one backend per configured model route, picks a route by request tier or
+description size, and optionally hedges a slow call with a second identical
+request, keeping whichever succeeds first. Every route records its latency and
+success rate.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from config import settings
+from services.backends import ModelBackend, create_backend
+from services.metrics import HEDGED_REQUESTS, ROUTE_CALLS, ROUTE_DURATION
+from services.repair import estimate_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Successful call latencies kept per route and call kind for the hedge percentile
+LATENCY_WINDOW = 200
+
+T = TypeVar("T")
+
+
+def parse_routes(spec: str) -> List[Tuple[str, str, int]]:
+    """
+    Parse a ``MODEL_ROUTES`` setting.
+
+    The setting is a comma-separated list of ``name=model`` or
+    ``name=model:max_input_tokens`` entries, from the lightest model to the
+    heaviest, e.g. ``fast=gemini-2.5-flash:2000,heavy=gemini-2.5-pro``.
+
+    Args:
+        spec: Setting value; empty for a single route using ``settings.GEMINI_MODEL``
+
+    Returns:
+        List of (name, model, max_input_tokens) tuples, 0 meaning no limit
+
+    Raises:
+        ValueError: If an entry is malformed or a name repeats
+    """
+    if not spec.strip():
+        return [("default", settings.GEMINI_MODEL, 0)]
+    routes = []
+    for entry in spec.split(","):
+        name, sep, target = entry.strip().partition("=")
+        model, _, limit = target.partition(":")
+        if not sep or not name.strip() or not model.strip():
+            raise ValueError(f"Invalid MODEL_ROUTES entry: {entry!r} (expected name=model[:max_input_tokens])")
+        try:
+            max_input_tokens = int(limit) if limit else 0
+        except ValueError:
+            raise ValueError(f"Invalid max_input_tokens in MODEL_ROUTES entry: {entry!r}")
+        routes.append((name.strip(), model.strip(), max_input_tokens))
+    names = [name for name, _, _ in routes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate route names in MODEL_ROUTES: {spec}")
+    return routes
+
+
+class RouteStats:
+    """Call outcomes and recent latencies of one route."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, kind: str, seconds: float, ok: bool) -> None:
+        """Record a finished call of the given kind."""
+        with self._lock:
+            self.calls += 1
+            if ok:
+                self.successes += 1
+                self._latencies.setdefault(kind, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+            else:
+                self.failures += 1
+
+    def percentile(self, kind: str, fraction: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Latency percentile of recent successful calls of a kind.
+
+        Returns:
+            Optional[float]: Seconds, or None with fewer than ``min_samples`` calls
+        """
+        with self._lock:
+            window = sorted(self._latencies.get(kind, ()))
+        if not window or len(window) < min_samples:
+            return None
+        return window[min(len(window) - 1, int(fraction * len(window)))]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report outcomes and latency percentiles per call kind.
+
+        Returns:
+            dict: Calls, success rate, hedges and p50/p95/p99 latency in seconds
+        """
+        latency = {}
+        for kind in list(self._latencies):
+            latency[kind] = {
+                f"p{int(fraction * 100)}_s": round(self.percentile(kind, fraction), 3)
+                for fraction in (0.5, 0.95, 0.99)
+            }
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "success_rate": round(self.successes / self.calls, 4) if self.calls else None,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency": latency,
+        }
+
+
+class ModelRoute:
+    """A named model configuration with its own backend and statistics."""
+
+    def __init__(self, name: str, model_name: str, backend: ModelBackend, max_input_tokens: int = 0):
+        """
+        Initialize the route.
+
+        Args:
+            name: Route name, also the request tier that selects it
+            model_name: Model the backend calls
+            backend: Backend serving the route
+            max_input_tokens: Largest description routed here by size (0 for no limit)
+        """
+        self.name = name
+        self.model_name = model_name
+        self.backend = backend
+        self.max_input_tokens = max_input_tokens
+        self.stats = RouteStats()
+
+
+# Route chosen for the analysis being generated in the current task, if any
+current_route: ContextVar[Optional[ModelRoute]] = ContextVar("current_route", default=None)
+
+
+class ModelRouter:
+    """Chooses model routes and runs calls on them with optional hedging."""
+
+    def __init__(
+        self,
+        routes: List[ModelRoute],
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 1.0
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            routes: Routes from the lightest model to the heaviest; the first is the default
+            hedge_enabled: Whether slow calls are hedged
+            hedge_percentile: Latency percentile after which a call is hedged
+            hedge_min_samples: Successful calls of a kind needed before hedging it
+            hedge_min_delay: Shortest wait before hedging, in seconds
+        """
+        if not routes:
+            raise ValueError("At least one model route is required")
+        self.routes = routes
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+
+    @property
+    def default(self) -> ModelRoute:
+        """The first configured route."""
+        return self.routes[0]
+
+    def select(self, feature_description: str, tier: Optional[str] = None) -> ModelRoute:
+        """
+        Pick the route for an analysis.
+
+        A tier names its route explicitly. Otherwise the description goes to
+        the first route whose ``max_input_tokens`` fits it, or to the last
+        route if none does.
+
+        Args:
+            feature_description: Natural language description of the feature
+            tier: Optional route name requested by the client
+
+        Returns:
+            ModelRoute: Selected route
+
+        Raises:
+            ValueError: If the tier names no route
+        """
+        if tier:
+            for route in self.routes:
+                if route.name == tier:
+                    return route
+            raise ValueError(f"Unknown model tier: {tier} (available: {', '.join(r.name for r in self.routes)})")
+        tokens = estimate_tokens(feature_description)
+        for route in self.routes:
+            if not route.max_input_tokens or tokens <= route.max_input_tokens:
+                return route
+        return self.routes[-1]
+
+    def hedge_delay(self, route: ModelRoute, kind: str) -> Optional[float]:
+        """
+        Seconds to wait for a call before hedging it.
+
+        Returns:
+            Optional[float]: The route's latency percentile for the call kind,
+            or None if hedging is off or the route has too few samples
+        """
+        if not self.hedge_enabled:
+            return None
+        delay = route.stats.percentile(kind, self.hedge_percentile, self.hedge_min_samples)
+        if delay is None:
+            return None
+        return max(self.hedge_min_delay, delay)
+
+    async def _timed(self, route: ModelRoute, kind: str, fn: Callable[[ModelRoute], Awaitable[T]]) -> T:
+        """Run a call, recording its latency and outcome unless it is cancelled."""
+        start = time.perf_counter()
+        try:
+            result = await fn(route)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            route.stats.record(kind, time.perf_counter() - start, ok=False)
+            ROUTE_CALLS.inc(route=route.name, outcome="error")
+            raise
+        elapsed = time.perf_counter() - start
+        route.stats.record(kind, elapsed, ok=True)
+        ROUTE_CALLS.inc(route=route.name, outcome="ok")
+        ROUTE_DURATION.observe(elapsed, route=route.name, kind=kind)
+        return result
+
+    async def _hedge(
+        self,
+        route: ModelRoute,
+        kind: str,
+        fn: Callable[[ModelRoute], Awaitable[T]],
+        charge: Optional[Callable[[], Awaitable[None]]]
+    ) -> T:
+        """Run the second call of a hedge once it has been charged to the rate limits."""
+        if charge is not None:
+            await charge()
+        return await self._timed(route, kind, fn)
+
+    async def call(
+        self,
+        route: ModelRoute,
+        kind: str,
+        fn: Callable[[ModelRoute], Awaitable[T]],
+        charge: Optional[Callable[[], Awaitable[None]]] = None,
+        usable: Optional[Callable[[T], bool]] = None
+    ) -> T:
+        """
+        Run a model call on a route, hedging it if it is slow.
+
+        Once the call has taken longer than the route's latency percentile for
+        this kind of call, an identical second call is started. The first
+        usable result is returned and the other call is cancelled; a call
+        that fails or returns an unusable result leaves the race to the other.
+
+        Args:
+            route: Route to call
+            kind: Kind of call (e.g. ``full``, ``section``), since each has its own latency profile
+            fn: Makes the call on the route's backend
+            charge: Takes the second call from the upstream rate limits before it is sent
+            usable: Whether a result may win the race, e.g. not truncated;
+                defaults to any result
+
+        Returns:
+            The first usable result, else the first result of either call
+
+        Raises:
+            Exception: The last error if every call fails
+        """
+        delay = self.hedge_delay(route, kind)
+        if delay is None:
+            return await self._timed(route, kind, fn)
+
+        primary = asyncio.ensure_future(self._timed(route, kind, fn))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            logger.info(f"Hedging {kind} call on route {route.name} after {delay:.2f}s")
+            route.stats.hedges += 1
+            HEDGED_REQUESTS.inc(route=route.name, outcome="launched")
+            hedge = asyncio.ensure_future(self._hedge(route, kind, fn, charge))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            fallback: List[T] = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    result = task.result()
+                    if usable is not None and not usable(result):
+                        fallback.append(result)
+                        continue
+                    if task is hedge:
+                        route.stats.hedge_wins += 1
+                        HEDGED_REQUESTS.inc(route=route.name, outcome="won")
+                    return result
+            if fallback:
+                # Neither result is usable; the caller repairs the first one
+                return fallback[0]
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report every route's configuration and statistics.
+
+        Returns:
+            dict: Per route name, its model, size limit and ``RouteStats.stats``
+        """
+        return {
+            route.name: {"model": route.model_name, "max_input_tokens": route.max_input_tokens, **route.stats.stats()}
+            for route in self.routes
+        }
+
+
+def create_router() -> ModelRouter:
+    """
+    Build the router configured by ``settings.MODEL_ROUTES`` and the hedge settings.
+
+    Returns:
+        ModelRouter: Router with one backend per route
+    """
+    routes = [
+        ModelRoute(name, model, create_backend(model), max_input_tokens)
+        for name, model, max_input_tokens in parse_routes(settings.MODEL_ROUTES)
+    ]
+    if len(routes) > 1:
+        logger.info(f"Model routes: {', '.join(f'{r.name}={r.model_name}' for r in routes)}")
+    return ModelRouter(
+        routes,
+        hedge_enabled=settings.HEDGE_ENABLED,
+        hedge_percentile=settings.HEDGE_PERCENTILE,
+        hedge_min_samples=settings.HEDGE_MIN_SAMPLES,
+        hedge_min_delay=settings.HEDGE_MIN_DELAY_SECONDS,
+    )
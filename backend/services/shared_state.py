@@ -0,0 +1,226 @@
+"""
+State shared by the worker processes of one server.
+Upstream rate limit budgets and metrics snapshots live in a SQLite file in WAL
+mode, so that several uvicorn workers on one machine draw on a single request
+and token budget and /metrics reports the whole server, without an external
+service.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from services.metrics import registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS buckets ("
+    "name TEXT PRIMARY KEY, tokens REAL NOT NULL, rate REAL NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS worker_metrics ("
+    "worker TEXT PRIMARY KEY, updated_at REAL NOT NULL, snapshot TEXT NOT NULL)",
+)
+
+
+class SharedState:
+    """Token buckets and metrics snapshots in a SQLite file opened by every worker process."""
+
+    def __init__(self, db_path: str, busy_timeout: float = 5.0):
+        """
+        Open the shared state, creating its tables if needed.
+
+        Args:
+            db_path: SQLite file shared by the worker processes
+            busy_timeout: Seconds to wait for another process's write to finish
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened
+        """
+        self.db_path = db_path
+        self.worker = str(os.getpid())
+        # Refreshed whenever metrics are published or collected, so stats() reads no file
+        self.workers_reporting = 0
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        logger.info(f"Shared state at {db_path} (worker {self.worker})")
+
+    def _refilled(self, name: str, capacity: float, rate: float, now: float) -> Tuple[float, float]:
+        """Balance and rate of a bucket at ``now``; a bucket not seen before starts full. Caller holds the lock."""
+        row = self._db.execute("SELECT tokens, rate, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return capacity, rate
+        tokens, current_rate, updated_at = row
+        # A lower configured rate applies at once; a higher one is reached through set_rate()
+        current_rate = min(current_rate, rate)
+        return min(capacity, tokens + max(0.0, now - updated_at) * current_rate), current_rate
+
+    def take(self, name: str, amount: float, capacity: float, rate: float) -> Tuple[float, float, float]:
+        """
+        Reserve tokens from a shared bucket.
+
+        The tokens are taken at once, leaving the balance negative if there
+        were not enough; the caller then waits until the bucket has refilled
+        the shortfall. Reservations are ordered by the database lock, so
+        waiters in every process are served in arrival order.
+
+        Args:
+            name: Bucket name
+            amount: Tokens needed
+            capacity: Bucket capacity
+            rate: Configured refill rate, in tokens per second
+
+        Returns:
+            Tuple[float, float, float]: Seconds to wait before using the tokens,
+            the balance left and the current refill rate
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                tokens, current_rate = self._refilled(name, capacity, rate, now)
+                tokens -= amount
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, rate, updated_at) VALUES (?, ?, ?, ?)",
+                    (name, tokens, current_rate, now),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return max(0.0, -tokens / current_rate), tokens, current_rate
+
+    def set_rate(self, name: str, capacity: float, rate: float, configured_rate: float) -> None:
+        """
+        Change the refill rate of a shared bucket for every process.
+
+        Args:
+            name: Bucket name
+            capacity: Bucket capacity
+            rate: New refill rate, in tokens per second
+            configured_rate: Configured refill rate, the most ``rate`` may be
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                tokens, _ = self._refilled(name, capacity, configured_rate, now)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, rate, updated_at) VALUES (?, ?, ?, ?)",
+                    (name, tokens, min(rate, configured_rate), now),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def publish_metrics(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Store this worker's metrics for the workers serving /metrics.
+
+        Args:
+            snapshot: Result of ``MetricsRegistry.snapshot()``
+        """
+        payload = json.dumps(snapshot, separators=(",", ":"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO worker_metrics (worker, updated_at, snapshot) VALUES (?, ?, ?)",
+                (self.worker, time.time(), payload),
+            )
+            self.workers_reporting = self._db.execute("SELECT COUNT(*) FROM worker_metrics").fetchone()[0]
+
+    def collect_metrics(
+        self,
+        current: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_age: float = 15.0
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Metrics snapshots of every worker of the server.
+
+        Workers that exited keep their counters and histograms, so that totals
+        never go backwards; the gauges of a worker that stopped publishing are
+        left out.
+
+        Args:
+            current: This worker's snapshot, published first so that it is up to date
+            max_age: Seconds after which a worker's gauges are considered stale
+
+        Returns:
+            List[dict]: One ``MetricsRegistry.snapshot()`` per worker
+        """
+        if current is not None:
+            self.publish_metrics(current)
+        with self._lock:
+            rows = self._db.execute("SELECT updated_at, snapshot FROM worker_metrics").fetchall()
+        self.workers_reporting = len(rows)
+        cutoff = time.time() - max_age
+        snapshots = []
+        for updated_at, payload in rows:
+            snapshot = json.loads(payload)
+            if updated_at < cutoff:
+                snapshot = {name: family for name, family in snapshot.items() if family["kind"] != "gauge"}
+            snapshots.append(snapshot)
+        return snapshots
+
+    def reset(self) -> None:
+        """Forget rate limit balances and metrics of a previous run; called before the workers start."""
+        with self._lock:
+            self._db.execute("DELETE FROM buckets")
+            self._db.execute("DELETE FROM worker_metrics")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the shared state seen by this worker.
+
+        Reads no file, so it is safe to call on the event loop.
+
+        Returns:
+            dict: Database path, this worker's id and the workers that had
+            published metrics when this worker last published or collected them
+        """
+        return {"path": self.db_path, "worker": self.worker, "workers_reporting": self.workers_reporting}
+
+
+async def publish_metrics(state: SharedState, interval: float) -> None:
+    """
+    Publish this worker's metrics every ``interval`` seconds until cancelled.
+
+    Args:
+        state: Shared state
+        interval: Seconds between publications
+    """
+    while True:
+        try:
+            await asyncio.to_thread(state.publish_metrics, registry.snapshot())
+        except sqlite3.Error as e:
+            logger.warning(f"Could not publish metrics to shared state: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+_state: Optional[SharedState] = None
+
+
+def get_shared_state() -> Optional[SharedState]:
+    """
+    The shared state of this server, opened on first use.
+
+    Returns:
+        Optional[SharedState]: Shared state at ``SHARED_STATE_DB_PATH``, or None
+        if it is not set and this process keeps its state to itself
+    """
+    global _state
+    if _state is None and settings.SHARED_STATE_DB_PATH:
+        _state = SharedState(settings.SHARED_STATE_DB_PATH)
+    return _state
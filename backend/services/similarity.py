@@ -0,0 +1,253 @@
+"""
+Near-duplicate lookup over previously generated specifications.
+Descriptions are reduced to word and word-pair shingles and indexed by MinHash
+signatures with locality-sensitive hashing (LSH) banding, so paraphrases of an
+analyzed feature are found in well under a millisecond without an external
+service.
+"""
+
+import logging
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+
+from services.cache_service import normalize_description
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Signature length and LSH banding; 32 bands of 4 rows find pairs above ~0.42 Jaccard similarity
+NUM_PERMUTATIONS = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+_SHIFT = np.uint64(32)
+
+# Words that carry no meaning about the feature being described
+STOP_WORDS = frozenset(
+    "a allow an and are as at be build by can create feature for from have i in implement into is it "
+    "let me need of on or our should so support that the their them then this to us use using via we "
+    "where which will with would you".split()
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class SimilarMatch(NamedTuple):
+    """A previously analyzed description similar to a query."""
+
+    key: str
+    """Cache key of the stored analysis."""
+    description: str
+    """Description the analysis was generated for."""
+    score: float
+    """Estimated Jaccard similarity of the two descriptions' shingles."""
+    variant: str = ""
+    """How the analysis was generated (mode and model route); analyses of other variants are not interchangeable."""
+
+
+def shingles(feature_description: str) -> Set[str]:
+    """
+    Reduce a description to the set of features compared by the index.
+
+    Words are case-folded, stop words dropped and plural ``s`` stripped, then
+    every word and every adjacent pair of words becomes a shingle.
+
+    Args:
+        feature_description: Natural language description of the feature
+
+    Returns:
+        Set[str]: Shingles of the description (empty if it has no content words)
+    """
+    words = []
+    for word in _WORD.findall(normalize_description(feature_description)):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    result = set(words)
+    result.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return result
+
+
+class SimilarityIndex:
+    """
+    Incremental MinHash LSH index of analyzed descriptions.
+
+    Signatures are kept in one NumPy array that grows by doubling up to
+    ``max_entries``; beyond that the oldest entries are overwritten. Each of
+    the ``BANDS`` bands maps its slice of a signature to the rows sharing it,
+    so a query only scores the rows that collide with it in at least one band.
+    """
+
+    def __init__(self, max_entries: int, seed: int = 1):
+        """
+        Initialize an empty index.
+
+        Args:
+            max_entries: Entries kept before the oldest are replaced
+            seed: Seed of the hash family; fixed so signatures are reproducible
+        """
+        self.max_entries = max_entries
+        # Multiply-add-shift hash family over 32-bit shingle hashes: (a * x + b) mod 2**64 >> 32
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 1 << 64, size=(NUM_PERMUTATIONS, 1), dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 64, size=(NUM_PERMUTATIONS, 1), dtype=np.uint64, endpoint=False)
+        self._signatures = np.zeros((min(1024, max_entries), NUM_PERMUTATIONS), dtype=np.uint32)
+        self._keys: List[str] = []
+        self._descriptions: List[str] = []
+        self._variants: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(BANDS)]
+        self._next_row = 0
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.query_seconds = 0.0
+
+    def signature(self, feature_description: str) -> Optional[np.ndarray]:
+        """
+        MinHash signature of a description.
+
+        Args:
+            feature_description: Natural language description of the feature
+
+        Returns:
+            Optional[np.ndarray]: ``NUM_PERMUTATIONS`` minimum hashes, or None
+            if the description has no content words
+        """
+        features = shingles(feature_description)
+        if not features:
+            return None
+        hashes = np.fromiter(
+            (zlib.crc32(feature.encode("utf-8")) for feature in features),
+            dtype=np.uint64,
+            count=len(features),
+        )
+        permuted = (self._a * hashes + self._b) >> _SHIFT
+        return permuted.min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def _band_keys(signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(BANDS, ROWS_PER_BAND)]
+
+    def add(self, key: str, feature_description: str, variant: str = "") -> bool:
+        """
+        Index an analyzed description.
+
+        Args:
+            key: Cache key of the stored analysis
+            feature_description: Description it was generated for
+            variant: How the analysis was generated, matched by ``query``
+
+        Returns:
+            bool: Whether the entry was added (False for known keys and
+            descriptions without content words)
+        """
+        if key in self._rows:
+            return False
+        signature = self.signature(feature_description)
+        if signature is None:
+            return False
+        with self._lock:
+            if key in self._rows:
+                return False
+            row = self._next_row
+            self._next_row = (self._next_row + 1) % self.max_entries
+            if row < len(self._keys):
+                self._evict(row)
+                self._keys[row] = key
+                self._descriptions[row] = feature_description
+                self._variants[row] = variant
+            else:
+                if row >= len(self._signatures):
+                    grown = np.zeros((min(2 * len(self._signatures), self.max_entries), NUM_PERMUTATIONS), np.uint32)
+                    grown[:len(self._signatures)] = self._signatures
+                    self._signatures = grown
+                self._keys.append(key)
+                self._descriptions.append(feature_description)
+                self._variants.append(variant)
+            self._signatures[row] = signature
+            self._rows[key] = row
+            for buckets, band in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(band, set()).add(row)
+        return True
+
+    def _evict(self, row: int) -> None:
+        """Remove a row from the band buckets. Caller holds the lock."""
+        del self._rows[self._keys[row]]
+        for buckets, band in zip(self._buckets, self._band_keys(self._signatures[row])):
+            members = buckets.get(band)
+            if members is not None:
+                members.discard(row)
+                if not members:
+                    del buckets[band]
+
+    def query(
+        self,
+        feature_description: str,
+        limit: int = 5,
+        threshold: float = 0.0,
+        variant: Optional[str] = None
+    ) -> List[SimilarMatch]:
+        """
+        Find indexed descriptions similar to a description.
+
+        Args:
+            feature_description: Natural language description of the feature
+            limit: Maximum matches returned
+            threshold: Minimum estimated similarity of a match
+            variant: Only match analyses generated this way; None matches any
+
+        Returns:
+            List[SimilarMatch]: Matches, most similar first
+        """
+        start = time.perf_counter()
+        signature = self.signature(feature_description)
+        matches: List[SimilarMatch] = []
+        if signature is not None:
+            with self._lock:
+                candidates: Set[int] = set()
+                for buckets, band in zip(self._buckets, self._band_keys(signature)):
+                    members = buckets.get(band)
+                    if members:
+                        candidates.update(members)
+                if variant is not None:
+                    candidates = {row for row in candidates if self._variants[row] == variant}
+                if candidates:
+                    rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+                    scores = np.count_nonzero(self._signatures[rows] == signature, axis=1) / NUM_PERMUTATIONS
+                    order = np.argsort(-scores, kind="stable")
+                    for index in order[:limit]:
+                        score = float(scores[index])
+                        if score < threshold:
+                            break
+                        row = int(rows[index])
+                        matches.append(SimilarMatch(
+                            self._keys[row], self._descriptions[row], round(score, 4), self._variants[row]
+                        ))
+        self.queries += 1
+        self.query_seconds += time.perf_counter() - start
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report index size and query latency.
+
+        Returns:
+            dict: Entries, capacity, queries and mean query time in microseconds
+        """
+        return {
+            "entries": len(self._rows),
+            "max_entries": self.max_entries,
+            "queries": self.queries,
+            "mean_query_us": round(self.query_seconds / self.queries * 1e6, 1) if self.queries else 0.0,
+        }
@@ -0,0 +1,100 @@
+"""
+Single-flight deduplication of concurrent identical calls.
+Concurrent callers that share a key are merged onto one in-flight coroutine and
+all receive its result or its exception.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from services.metrics import SINGLEFLIGHT_CALLS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """A shared in-flight call and the number of callers awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Merge concurrent calls that share a key onto a single execution."""
+
+    def __init__(self):
+        """Initialize an empty call table and counters."""
+        self._calls: Dict[str, _Call] = {}
+        self.executions = 0
+        self.merged = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``fn`` unless a call for ``key`` is already in flight, then await the shared result.
+
+        The shared call runs in its own task, so cancelling one waiter never
+        affects the others. It is cancelled only once every waiter has gone,
+        and callers arriving after that start a new call.
+
+        Args:
+            key: Deduplication key
+            fn: Zero-argument coroutine function performing the call
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, task))
+            self.executions += 1
+            SINGLEFLIGHT_CALLS.inc(outcome="executed")
+        else:
+            self.merged += 1
+            SINGLEFLIGHT_CALLS.inc(outcome="merged")
+            logger.info(f"Merged request onto in-flight call ({call.waiters} already waiting)")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                logger.info("Last waiter cancelled, cancelling in-flight call")
+                # Unregistered first, so a caller arriving while the task winds down starts a fresh call
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        """Remove a finished call from the table and mark its exception as retrieved."""
+        call = self._calls.get(key)
+        if call is not None and call.task is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report deduplication counters.
+
+        Returns:
+            dict: Upstream executions, merged requests and calls currently in flight
+        """
+        return {
+            "executions": self.executions,
+            "merged": self.merged,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,146 @@
+"""
+Incremental re-analysis support.
+Applies a model-generated delta (added, changed and removed items per section)
+to a previous specification and computes the structured difference between two
+specifications.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fields identifying an item of each list section
+ITEM_KEY_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "requirements": ("id",),
+    "api_design": ("method", "path"),
+    "database_schema": ("table_name",),
+    "sprint_tasks": ("task_id",),
+}
+
+LIST_SECTIONS = tuple(ITEM_KEY_FIELDS)
+
+
+def item_key(section: str, item: Dict[str, Any]) -> Optional[str]:
+    """
+    Identifier of a specification item within its section.
+
+    Args:
+        section: List section the item belongs to
+        item: Requirement, endpoint, table or task
+
+    Returns:
+        Optional[str]: e.g. ``REQ-001``, ``POST /api/login`` or ``users``;
+        None if the item lacks its identifying fields
+    """
+    parts = []
+    for field in ITEM_KEY_FIELDS[section]:
+        value = item.get(field)
+        if value is None or value == "":
+            return None
+        parts.append(str(value).upper() if field == "method" else str(value))
+    return " ".join(parts)
+
+
+def _keyed(section: str, items: Any) -> Dict[str, Dict[str, Any]]:
+    """Items of a section by key, in order, skipping malformed ones."""
+    keyed: Dict[str, Dict[str, Any]] = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict):
+            key = item_key(section, item)
+            if key is not None:
+                keyed[key] = item
+    return keyed
+
+
+def apply_delta(spec: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a delta to a specification.
+
+    For each list section the delta may hold ``added`` and ``changed`` items
+    and ``removed`` keys. Changed items replace the item with the same key in
+    place; added items are appended (or replace an item whose key they reuse).
+    A section given as a plain list replaces the previous section.
+    A non-empty ``database_schema_sql`` replaces the previous script. Sprint
+    task dependencies on removed tasks are dropped.
+
+    Args:
+        spec: Previous specification
+        delta: Changes generated for the edited description
+
+    Returns:
+        Dict: New specification; ``spec`` is not modified
+    """
+    result = dict(spec)
+    removed_tasks = set()
+    for section in LIST_SECTIONS:
+        changes = delta.get(section)
+        items = _keyed(section, spec.get(section))
+        if isinstance(changes, list):
+            # The model restated the whole section instead of its changes
+            items = _keyed(section, changes)
+            if section == "sprint_tasks":
+                removed_tasks.update(key for key in _keyed(section, spec.get(section)) if key not in items)
+            result[section] = list(items.values())
+            continue
+        if not isinstance(changes, dict):
+            if changes is not None:
+                logger.warning(f"Ignoring malformed delta for {section}")
+            result[section] = list(items.values())
+            continue
+        removed = changes.get("removed") or []
+        for key in removed if isinstance(removed, list) else []:
+            if items.pop(str(key), None) is not None and section == "sprint_tasks":
+                removed_tasks.add(str(key))
+        for kind in ("changed", "added"):
+            for key, item in _keyed(section, changes.get(kind)).items():
+                items[key] = item
+        result[section] = list(items.values())
+
+    sql = delta.get("database_schema_sql")
+    if isinstance(sql, str) and sql.strip():
+        result["database_schema_sql"] = sql
+
+    if removed_tasks:
+        result["sprint_tasks"] = [
+            {**task, "dependencies": [d for d in task.get("dependencies") or [] if d not in removed_tasks]}
+            if isinstance(task.get("dependencies"), list) else task
+            for task in result["sprint_tasks"]
+        ]
+    return result
+
+
+def diff_specs(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Structured difference between two specifications.
+
+    Args:
+        before: Previous specification
+        after: New specification
+
+    Returns:
+        Dict: Per list section the ``added`` and ``removed`` items and the
+        ``changed`` items with their changed fields, plus
+        ``database_schema_sql_changed``
+    """
+    diff: Dict[str, Any] = {}
+    for section in LIST_SECTIONS:
+        old = _keyed(section, before.get(section))
+        new = _keyed(section, after.get(section))
+        changed: List[Dict[str, Any]] = []
+        for key, item in new.items():
+            previous = old.get(key)
+            if previous is not None and previous != item:
+                fields = sorted(
+                    field for field in set(previous) | set(item) if previous.get(field) != item.get(field)
+                )
+                changed.append({"key": key, "fields": fields, "before": previous, "after": item})
+        diff[section] = {
+            "added": [item for key, item in new.items() if key not in old],
+            "changed": changed,
+            "removed": [item for key, item in old.items() if key not in new],
+        }
+    diff["database_schema_sql_changed"] = before.get("database_schema_sql") != after.get("database_schema_sql")
+    return diff
@@ -0,0 +1,486 @@
+"""
+Persistent store of generated specifications.
+Keeps every analysis with its description, model and timings in SQLite, with
+an FTS5 index over the description, requirements and sprint tasks. Writes are
+queued and committed in batches by a background task so that persisting a
+specification never holds up the request that produced it. The same task
+deletes specifications older than the retention period.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.metrics import SPEC_STORE_WRITES, STAGE_DURATION
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Columns of a listing; the specification itself is only read by get()
+_SUMMARY_COLUMNS = "seq, id, description, mode, tier, model, created_at, timings, requirements, endpoints, tables, tasks"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS specs ("
+    "seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, description TEXT NOT NULL, "
+    "mode TEXT, tier TEXT, model TEXT, created_at REAL NOT NULL, timings TEXT, spec TEXT NOT NULL, "
+    "requirements_text TEXT NOT NULL, tasks_text TEXT NOT NULL, "
+    "requirements INTEGER NOT NULL, endpoints INTEGER NOT NULL, tables INTEGER NOT NULL, tasks INTEGER NOT NULL)"
+)
+
+# External-content FTS5 index kept in step with the specs table by triggers
+_FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS specs_fts USING fts5("
+    "description, requirements_text, tasks_text, content='specs', content_rowid='seq', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS specs_fts_insert AFTER INSERT ON specs BEGIN "
+    "INSERT INTO specs_fts(rowid, description, requirements_text, tasks_text) "
+    "VALUES (new.seq, new.description, new.requirements_text, new.tasks_text); END",
+    "CREATE TRIGGER IF NOT EXISTS specs_fts_delete AFTER DELETE ON specs BEGIN "
+    "INSERT INTO specs_fts(specs_fts, rowid, description, requirements_text, tasks_text) "
+    "VALUES ('delete', old.seq, old.description, old.requirements_text, old.tasks_text); END",
+)
+
+_INDEX_SCHEMA = "CREATE INDEX IF NOT EXISTS idx_specs_created_at ON specs(created_at)"
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Seconds between deletions of specifications past the retention period
+PRUNE_INTERVAL = 300.0
+
+
+@dataclass
+class StoredSpec:
+    """A persisted analysis and what produced it."""
+
+    id: str
+    description: str
+    spec: Dict[str, Any]
+    mode: Optional[str] = None
+    tier: Optional[str] = None
+    model: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+
+def _section_text(spec: Dict[str, Any], section: str, fields: Tuple[str, ...]) -> str:
+    """Searchable text of the given fields of every item in a section."""
+    lines = []
+    for item in spec.get(section) or []:
+        if isinstance(item, dict):
+            lines.append(" ".join(str(item[name]) for name in fields if item.get(name)))
+    return "\n".join(lines)
+
+
+def _count(spec: Dict[str, Any], section: str) -> int:
+    value = spec.get(section)
+    return len(value) if isinstance(value, list) else 0
+
+
+def _row(record: StoredSpec) -> tuple:
+    """Column values of a record in specs table order, after seq."""
+    spec = record.spec
+    return (
+        record.id, record.description, record.mode, record.tier, record.model, record.created_at,
+        json.dumps(record.timings, separators=(",", ":")),
+        json.dumps(spec, separators=(",", ":")),
+        _section_text(spec, "requirements", ("id", "category", "description")),
+        _section_text(spec, "sprint_tasks", ("task_id", "title", "description")),
+        _count(spec, "requirements"), _count(spec, "api_design"),
+        _count(spec, "database_schema"), _count(spec, "sprint_tasks"),
+    )
+
+
+def _summary(row: tuple, snippet: Optional[str] = None) -> Dict[str, Any]:
+    """Listing entry for a summary row."""
+    return {
+        "id": row[1],
+        "description": row[2],
+        "mode": row[3],
+        "tier": row[4],
+        "model": row[5],
+        "created_at": row[6],
+        "timings": json.loads(row[7]) if row[7] else {},
+        "counts": {"requirements": row[8], "api_design": row[9], "database_schema": row[10], "sprint_tasks": row[11]},
+        "snippet": snippet,
+    }
+
+
+def search_terms(query: str) -> List[str]:
+    """
+    Split a search query into lower-cased word tokens.
+
+    Args:
+        query: Free text typed by the user
+
+    Returns:
+        List[str]: Words to match; punctuation and FTS5 operators are dropped
+    """
+    return [token.lower() for token in _TOKEN.findall(query)]
+
+
+def encode_cursor(seq: int) -> str:
+    """Opaque pagination cursor pointing after the entry with this sequence number."""
+    return f"{seq:x}"
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Sequence number named by a pagination cursor.
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    try:
+        seq = int(cursor, 16)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if seq < 0:
+        raise ValueError("Invalid cursor")
+    return seq
+
+
+class SpecStore:
+    """SQLite store of analyses with full-text search and batched writes."""
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_pending: int = 1000,
+        retention_seconds: float = 0.0
+    ):
+        """
+        Initialize the store, creating its tables if needed.
+
+        Args:
+            db_path: SQLite file holding the specifications
+            batch_size: Pending writes that trigger a flush before the interval ends
+            flush_interval: Seconds between flushes of pending writes
+            max_pending: Pending writes held before the oldest are dropped
+            retention_seconds: Age after which specifications are deleted; 0 keeps them forever
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._pruned_at: Optional[float] = None
+        self._pending: "OrderedDict[str, StoredSpec]" = OrderedDict()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.pruned = 0
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.execute(_INDEX_SCHEMA)
+        try:
+            for statement in _FTS_SCHEMA:
+                self._db.execute(statement)
+            self.full_text = True
+        except sqlite3.OperationalError as e:
+            # SQLite builds without FTS5 fall back to substring search
+            logger.warning(f"FTS5 unavailable, spec search falls back to LIKE: {str(e)}")
+            self.full_text = False
+        # Kept up to date by flush() and prune(), so that stats() reads no file
+        self.stored = self._db.execute("SELECT COUNT(*) FROM specs").fetchone()[0]
+        self._db.commit()
+        # In WAL mode readers do not wait for a flush in progress, so they get their own connection
+        self._reader = self._db if db_path == ":memory:" else sqlite3.connect(db_path, check_same_thread=False)
+        self._read_lock = self._flush_lock if self._reader is self._db else threading.Lock()
+        logger.info(f"Spec store persisted at {db_path} ({'FTS5' if self.full_text else 'LIKE'} search)")
+
+    async def start(self) -> None:
+        """Start the background writer."""
+        if self._writer is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        """Stop the background writer and flush every pending write."""
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+            self._loop = None
+        await asyncio.to_thread(self.flush)
+
+    def save(self, record: StoredSpec) -> None:
+        """
+        Queue a specification for writing.
+
+        Returns at once while the background writer is running; otherwise the
+        record is written before returning. A later record with the same id
+        replaces an earlier one still pending.
+
+        Args:
+            record: Specification to persist
+        """
+        if self._writer is None:
+            self._pending_put(record)
+            self.flush()
+            return
+        if self._pending_put(record) >= self.batch_size:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is self._loop:
+                self._wake.set()
+            else:
+                self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _pending_put(self, record: StoredSpec) -> int:
+        """Add a record to the pending writes, dropping the oldest beyond the limit."""
+        with self._pending_lock:
+            self._pending[record.id] = record
+            self._pending.move_to_end(record.id)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+                SPEC_STORE_WRITES.inc(result="dropped")
+                if self.dropped % 100 == 1:
+                    logger.warning(f"Spec store falling behind, {self.dropped} pending writes dropped so far")
+            return len(self._pending)
+
+    async def _write_loop(self) -> None:
+        """Flush pending writes every interval, or sooner once a batch has built up."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Spec store flush failed: {str(e)}")
+            if self.retention_seconds > 0 and (
+                self._pruned_at is None or time.monotonic() - self._pruned_at >= PRUNE_INTERVAL
+            ):
+                self._pruned_at = time.monotonic()
+                try:
+                    await asyncio.to_thread(self.prune, time.time() - self.retention_seconds)
+                except sqlite3.Error as e:
+                    logger.error(f"Spec store prune failed: {str(e)}")
+
+    def flush(self) -> int:
+        """
+        Write every pending record in one transaction.
+
+        Returns:
+            int: Number of records written
+        """
+        with self._flush_lock:
+            # Left pending until committed, so get() finds them in one place or the other throughout
+            with self._pending_lock:
+                records = list(self._pending.values())
+            if not records:
+                return 0
+            with STAGE_DURATION.time(stage="spec_store_flush"):
+                # On an error the batch is still pending and is retried by the next flush
+                with self._db:
+                    # Delete then insert, so a re-analysis moves to the front of the listing
+                    replaced = self._db.executemany(
+                        "DELETE FROM specs WHERE id = ?", [(record.id,) for record in records]
+                    ).rowcount
+                    self._db.executemany(
+                        "INSERT INTO specs (id, description, mode, tier, model, created_at, timings, spec, "
+                        "requirements_text, tasks_text, requirements, endpoints, tables, tasks) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [_row(record) for record in records],
+                    )
+            with self._pending_lock:
+                for record in records:
+                    # A newer version saved during the flush stays pending
+                    if self._pending.get(record.id) is record:
+                        del self._pending[record.id]
+            self.written += len(records)
+            self.stored += len(records) - replaced
+            self.flushes += 1
+            SPEC_STORE_WRITES.inc(len(records), result="written")
+            return len(records)
+
+    def prune(self, created_before: float) -> int:
+        """
+        Delete specifications created before a point in time.
+
+        Also recounts the stored specifications, which other processes
+        sharing the file may have added to.
+
+        Args:
+            created_before: Unix time; older specifications are deleted
+
+        Returns:
+            int: Number of specifications deleted
+        """
+        with self._flush_lock:
+            with self._db:
+                deleted = self._db.execute("DELETE FROM specs WHERE created_at < ?", (created_before,)).rowcount
+            self.stored = self._db.execute("SELECT COUNT(*) FROM specs").fetchone()[0]
+        self.pruned += deleted
+        if deleted:
+            logger.info(f"Deleted {deleted} specifications past the retention period")
+        return deleted
+
+    def get(self, spec_id: str) -> Optional[StoredSpec]:
+        """
+        Look up a specification by id, including writes not yet flushed.
+
+        Reads the database, so the event loop calls it through ``asyncio.to_thread``.
+
+        Args:
+            spec_id: Identifier the specification was saved under
+
+        Returns:
+            Optional[StoredSpec]: The specification, or None if unknown
+        """
+        with self._pending_lock:
+            pending = self._pending.get(spec_id)
+        if pending is not None:
+            return pending
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT id, description, spec, mode, tier, model, timings, created_at FROM specs WHERE id = ?",
+                (spec_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return StoredSpec(
+            id=row[0], description=row[1], spec=json.loads(row[2]), mode=row[3], tier=row[4],
+            model=row[5], timings=json.loads(row[6]) if row[6] else {}, created_at=row[7],
+        )
+
+    def list(self, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List specifications, newest first.
+
+        Args:
+            limit: Maximum entries returned
+            cursor: ``next_cursor`` of the previous page, or None for the first
+
+        Returns:
+            Tuple[List[Dict], Optional[str]]: Summaries, and the cursor of the
+            next page or None if this is the last
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        before = decode_cursor(cursor) if cursor else None
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM specs"
+        params: List[Any] = []
+        if before is not None:
+            sql += " WHERE seq < ?"
+            params.append(before)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit + 1)
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return self._page(rows, limit)
+
+    def search(
+        self, query: str, limit: int = 20, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Full-text search over descriptions, requirements and sprint tasks, newest first.
+
+        Every word of the query must match, as a word prefix, so ``auth``
+        finds "authentication". Results are ordered by recency rather than
+        rank, which keeps keyset pagination stable while new specs arrive.
+
+        Args:
+            query: Words to search for
+            limit: Maximum entries returned
+            cursor: ``next_cursor`` of the previous page, or None for the first
+
+        Returns:
+            Tuple[List[Dict], Optional[str]]: Summaries with a highlighted
+            snippet, and the cursor of the next page or None if this is the last
+
+        Raises:
+            ValueError: If the query has no words or the cursor is invalid
+        """
+        terms = search_terms(query)
+        if not terms:
+            raise ValueError("Search query has no words")
+        before = decode_cursor(cursor) if cursor else None
+        params: List[Any] = []
+        if self.full_text:
+            columns = ", ".join(f"specs.{column.strip()}" for column in _SUMMARY_COLUMNS.split(","))
+            sql = (
+                f"SELECT {columns}, snippet(specs_fts, -1, '[', ']', '...', 12) "
+                "FROM specs_fts JOIN specs ON specs.seq = specs_fts.rowid WHERE specs_fts MATCH ?"
+            )
+            params.append(" ".join(f'"{term}"*' for term in terms))
+        else:
+            sql = f"SELECT {_SUMMARY_COLUMNS}, NULL FROM specs WHERE 1 = 1"
+            for term in terms:
+                sql += (" AND (description LIKE ? ESCAPE '\\' OR requirements_text LIKE ? ESCAPE '\\'"
+                        " OR tasks_text LIKE ? ESCAPE '\\')")
+                pattern = "%" + re.sub(r"([\\%_])", r"\\\1", term) + "%"
+                params.extend([pattern] * 3)
+        # Constraining and ordering by the FTS rowid lets FTS5 walk its index
+        # newest first and stop after one page
+        seq = "specs_fts.rowid" if self.full_text else "seq"
+        if before is not None:
+            sql += f" AND {seq} < ?"
+            params.append(before)
+        sql += f" ORDER BY {seq} DESC LIMIT ?"
+        params.append(limit + 1)
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return self._page(rows, limit)
+
+    @staticmethod
+    def _page(rows: List[tuple], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Summaries of the first ``limit`` rows, and a cursor if more rows follow."""
+        page = rows[:limit]
+        items = [_summary(row[:12], row[12] if len(row) > 12 else None) for row in page]
+        next_cursor = encode_cursor(page[-1][0]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report store counters.
+
+        Reads no file, so it is safe to call on the event loop. ``stored`` is
+        recounted from the file at each prune and follows this process's
+        writes in between.
+
+        Returns:
+            dict: Stored, pending, written, dropped and pruned counts
+        """
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "stored": self.stored,
+            "pending": pending,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pruned": self.pruned,
+            "retention_seconds": self.retention_seconds,
+            "flushes": self.flushes,
+            "full_text": self.full_text,
+            "writer_running": self._writer is not None,
+        }
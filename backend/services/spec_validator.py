@@ -0,0 +1,347 @@
+"""
+Structural and cross-reference validation of generated specifications.
+A single pass over a specification that checks every item's field types and
+the references between sections, reporting each problem with the path of the
+offending value so repair can target it.
+"""
+
+import logging
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from services.ddl_parser import cached_schema, normalize_name
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sections that must contain at least one item
+NON_EMPTY_SECTIONS = ("requirements", "api_design", "sprint_tasks")
+
+FIBONACCI_POINTS = frozenset((1, 2, 3, 5, 8, 13))
+
+_MISSING = object()
+
+# Values pydantic accepts for a boolean field in lax mode
+_BOOL_STRINGS = frozenset(("0", "1", "f", "t", "false", "true", "n", "y", "no", "yes", "off", "on"))
+
+
+def _is_any(value: Any) -> bool:
+    return True
+
+
+def _is_str(value: Any) -> bool:
+    return isinstance(value, str)
+
+
+def _is_int(value: Any) -> bool:
+    if isinstance(value, int):
+        return True
+    if isinstance(value, float):
+        return value.is_integer()
+    if isinstance(value, str):
+        try:
+            int(value.strip())
+        except ValueError:
+            return False
+        return True
+    return False
+
+
+def _is_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return True
+    if isinstance(value, int):
+        return value in (0, 1)
+    return isinstance(value, str) and value.strip().lower() in _BOOL_STRINGS
+
+
+def _list_of(item_type: type) -> Callable[[Any], bool]:
+    def is_list(value: Any) -> bool:
+        return isinstance(value, list) and (
+            set(map(type, value)) <= {item_type} or all(isinstance(item, item_type) for item in value)
+        )
+    return is_list
+
+
+# Per list section: (field, type check, expected type, required, nullable), mirroring models.schemas.
+# Values of exactly the expected type skip the (lax, slower) check.
+_FieldSpec = Tuple[str, Callable[[Any], bool], str, bool, bool]
+_EXACT_TYPES = {"string": str, "integer": int, "boolean": bool}
+ITEM_FIELDS: Dict[str, Tuple[_FieldSpec, ...]] = {
+    "requirements": (
+        ("id", _is_str, "string", True, False),
+        ("category", _is_str, "string", True, False),
+        ("description", _is_str, "string", True, False),
+        ("priority", _is_str, "string", True, False),
+    ),
+    "api_design": (
+        ("method", _is_str, "string", True, False),
+        ("path", _is_str, "string", True, False),
+        ("description", _is_str, "string", True, False),
+        ("request_body", _is_any, "any", False, True),
+        ("response", _is_any, "any", False, True),
+        ("authentication", _is_bool, "boolean", False, False),
+    ),
+    "database_schema": (
+        ("table_name", _is_str, "string", True, False),
+        ("columns", _list_of(dict), "list of objects", True, False),
+        ("indexes", _list_of(str), "list of strings", False, True),
+        ("relationships", _list_of(str), "list of strings", False, True),
+    ),
+    "sprint_tasks": (
+        ("task_id", _is_str, "string", True, False),
+        ("title", _is_str, "string", True, False),
+        ("description", _is_str, "string", True, False),
+        ("story_points", _is_int, "integer", True, False),
+        ("dependencies", _list_of(str), "list of strings", False, True),
+        ("sprint", _is_int, "integer", True, False),
+    ),
+}
+
+class SpecIssue(NamedTuple):
+    """A problem found in a specification."""
+
+    path: str
+    """Location of the offending value, e.g. ``sprint_tasks[3].dependencies[0]``."""
+    check: str
+    """Kind of problem: missing, type, empty, range, duplicate, dependency, cycle, fibonacci or schema_sql."""
+    message: str
+    severity: str
+    """``error`` if the specification cannot be returned as is, ``warning`` if it is inconsistent."""
+
+    @property
+    def section(self) -> str:
+        """Top-level section the issue is in."""
+        return re.split(r"[\[.]", self.path, maxsplit=1)[0]
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+def _check_items(section: str, items: List[Any], issues: List[SpecIssue]) -> List[Optional[Dict[str, Any]]]:
+    """Check the field types of every item; return the items that are objects (None otherwise)."""
+    fields = [
+        (name, check, expected, required, nullable, _EXACT_TYPES.get(expected))
+        for name, check, expected, required, nullable in ITEM_FIELDS[section]
+    ]
+    checked: List[Optional[Dict[str, Any]]] = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            issues.append(SpecIssue(f"{section}[{index}]", "type", "expected an object", "error"))
+            checked.append(None)
+            continue
+        for name, check, expected, required, nullable, exact in fields:
+            value = item.get(name, _MISSING)
+            if type(value) is exact:
+                continue
+            if value is _MISSING:
+                if required:
+                    issues.append(SpecIssue(f"{section}[{index}].{name}", "missing", "field is required", "error"))
+            elif value is None:
+                if not nullable:
+                    issues.append(SpecIssue(f"{section}[{index}].{name}", "type", f"expected {expected}, got null", "error"))
+            elif not check(value):
+                issues.append(SpecIssue(
+                    f"{section}[{index}].{name}", "type", f"expected {expected}, got {type(value).__name__}", "error"
+                ))
+        checked.append(item)
+    return checked
+
+
+def _check_unique(
+    section: str,
+    items: Sequence[Optional[Dict[str, Any]]],
+    key: Callable[[Dict[str, Any]], Any],
+    field: str,
+    label: str,
+    issues: List[SpecIssue]
+) -> Dict[Any, int]:
+    """Report repeated keys; return the index of each key's first item."""
+    first: Dict[Any, int] = {}
+    for index, item in enumerate(items):
+        if item is None:
+            continue
+        value = key(item)
+        if value is None:
+            continue
+        if value in first:
+            issues.append(SpecIssue(
+                f"{section}[{index}].{field}", "duplicate",
+                f"{label} {value} is already used by {section}[{first[value]}]", "warning"
+            ))
+        else:
+            first[value] = index
+    return first
+
+
+def _check_tasks(tasks: Sequence[Optional[Dict[str, Any]]], issues: List[SpecIssue]) -> None:
+    """Check story points, dependency references and dependency cycles."""
+    ids = _check_unique(
+        "sprint_tasks", tasks, lambda task: task.get("task_id") if isinstance(task.get("task_id"), str) else None,
+        "task_id", "task id", issues
+    )
+    # Task id -> (dependency, position in the dependencies list) for known dependencies
+    graph: Dict[str, List[Tuple[str, int]]] = {}
+    for index, task in enumerate(tasks):
+        if task is None:
+            continue
+        points = task.get("story_points")
+        if _is_int(points):
+            value = int(points.strip()) if isinstance(points, str) else int(points)
+            if not 1 <= value <= 13:
+                issues.append(SpecIssue(
+                    f"sprint_tasks[{index}].story_points", "range", f"{value} is outside 1-13", "error"
+                ))
+            elif value not in FIBONACCI_POINTS:
+                issues.append(SpecIssue(
+                    f"sprint_tasks[{index}].story_points", "fibonacci", f"{value} is not a Fibonacci value", "warning"
+                ))
+
+        task_id = task.get("task_id")
+        dependencies = task.get("dependencies")
+        if not isinstance(dependencies, list):
+            continue
+        edges = []
+        for position, dependency in enumerate(dependencies):
+            if not isinstance(dependency, str):
+                continue
+            if dependency in ids and dependency != task_id:
+                edges.append((dependency, position))
+            elif dependency == task_id:
+                issues.append(SpecIssue(
+                    f"sprint_tasks[{index}].dependencies[{position}]", "cycle", "task depends on itself", "warning"
+                ))
+            else:
+                issues.append(SpecIssue(
+                    f"sprint_tasks[{index}].dependencies[{position}]", "dependency",
+                    f"unknown task {dependency}", "warning"
+                ))
+        if isinstance(task_id, str) and ids.get(task_id) == index:
+            graph[task_id] = edges
+
+    # Iterative depth-first search; each back edge closes a cycle, reported at the task it starts from
+    depth: Dict[str, int] = {}  # position on the search stack of tasks being visited
+    done: Set[str] = set()
+    for root in graph:
+        if root in done:
+            continue
+        depth[root] = 0
+        stack = [(root, iter(graph[root]))]
+        while stack:
+            node, children = stack[-1]
+            edge = next(children, None)
+            if edge is None:
+                del depth[node]
+                done.add(node)
+                stack.pop()
+                continue
+            child, position = edge
+            if child in depth:
+                cycle = [name for name, _ in stack[depth[child]:]] + [child]
+                issues.append(SpecIssue(
+                    f"sprint_tasks[{ids[node]}].dependencies[{position}]", "cycle",
+                    f"dependency cycle {' -> '.join(cycle)}", "warning"
+                ))
+            elif child not in done:
+                depth[child] = len(stack)
+                stack.append((child, iter(graph.get(child, ()))))
+
+
+def validate_spec(spec: Dict[str, Any]) -> List[SpecIssue]:
+    """
+    Check a specification's structure and cross-references in one pass.
+
+    Errors are values that do not fit the response models (missing fields,
+    wrong types, empty sections, story points outside 1-13). Warnings are
+    inconsistencies: repeated ids, endpoints or tables, dependencies on
+    unknown tasks, dependency cycles, non-Fibonacci story points, tables
+    that appear only in ``database_schema`` or only in ``database_schema_sql``,
+    and foreign keys to tables or columns the SQL does not define.
+
+    Args:
+        spec: Parsed specification
+
+    Returns:
+        List[SpecIssue]: Every problem found, type errors first
+    """
+    issues: List[SpecIssue] = []
+    items: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+    for section in ITEM_FIELDS:
+        value = spec.get(section)
+        if value is None:
+            issues.append(SpecIssue(section, "missing", "section is required", "error"))
+        elif not isinstance(value, list):
+            issues.append(SpecIssue(section, "type", f"expected a list, got {type(value).__name__}", "error"))
+        elif not value and section in NON_EMPTY_SECTIONS:
+            issues.append(SpecIssue(section, "empty", "section cannot be empty", "error"))
+        else:
+            items[section] = _check_items(section, value, issues)
+
+    sql = spec.get("database_schema_sql")
+    if sql is None:
+        issues.append(SpecIssue("database_schema_sql", "missing", "section is required", "error"))
+    elif not isinstance(sql, str):
+        issues.append(SpecIssue("database_schema_sql", "type", f"expected a string, got {type(sql).__name__}", "error"))
+    elif not sql.strip():
+        issues.append(SpecIssue("database_schema_sql", "empty", "section cannot be empty", "error"))
+
+    def string_field(name: str) -> Callable[[Dict[str, Any]], Optional[str]]:
+        return lambda item: item.get(name) if isinstance(item.get(name), str) else None
+
+    if "requirements" in items:
+        _check_unique("requirements", items["requirements"], string_field("id"), "id", "requirement id", issues)
+    if "api_design" in items:
+        _check_unique(
+            "api_design", items["api_design"],
+            lambda item: f"{item['method'].upper()} {item['path']}"
+            if isinstance(item.get("method"), str) and isinstance(item.get("path"), str) else None,
+            "path", "endpoint", issues
+        )
+    if "sprint_tasks" in items:
+        _check_tasks(items["sprint_tasks"], issues)
+    schema = cached_schema(sql) if isinstance(sql, str) and sql.strip() else None
+    if schema is not None:
+        for table, foreign_key in schema.dangling_foreign_keys():
+            issues.append(SpecIssue(
+                "database_schema_sql", "schema_sql",
+                f"foreign key {table}.{foreign_key.describe()} references an undefined table or column", "warning"
+            ))
+    if "database_schema" in items:
+        tables = _check_unique(
+            "database_schema", items["database_schema"],
+            lambda item: normalize_name(item["table_name"]) if isinstance(item.get("table_name"), str) else None,
+            "table_name", "table", issues
+        )
+        if schema is not None:
+            created: Set[str] = set(schema.tables)
+            for name, index in tables.items():
+                if name not in created:
+                    issues.append(SpecIssue(
+                        f"database_schema[{index}].table_name", "schema_sql",
+                        f"table {name} is not created in database_schema_sql", "warning"
+                    ))
+            missing = sorted(created - set(tables))
+            if missing:
+                issues.append(SpecIssue(
+                    "database_schema_sql", "schema_sql",
+                    f"creates tables missing from database_schema: {', '.join(missing)}", "warning"
+                ))
+    return issues
+
+
+def summarize_issues(issues: Sequence[SpecIssue], limit: int = 5) -> str:
+    """
+    Describe issues in one line for logs and error messages.
+
+    Args:
+        issues: Issues to describe
+        limit: Issues listed before the rest are counted
+
+    Returns:
+        str: ``path: message`` entries separated by semicolons
+    """
+    text = "; ".join(str(issue) for issue in issues[:limit])
+    if len(issues) > limit:
+        text += f"; and {len(issues) - limit} more"
+    return text
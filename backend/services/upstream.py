@@ -0,0 +1,525 @@
+"""
+Governance of calls to the upstream model API.
+Every Gemini call passes through a shared governor that enforces request and
+token budgets, classifies failures by exception type, retries transient ones
+with jittered exponential backoff and fails fast while a circuit breaker is open.
+With shared state configured, the budgets are shared by every worker process.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import sys
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar, Union
+
+from config import settings
+from services.metrics import UPSTREAM_ATTEMPTS, UPSTREAM_ERRORS, UPSTREAM_RETRIES
+from services.shared_state import SharedState, get_shared_state
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Lowest fraction of the configured request rate the adaptive limiter backs off to
+MIN_RATE_FRACTION = 0.1
+# Fraction of the configured request rate restored after each successful call
+RATE_RECOVERY_STEP = 0.05
+
+
+class ErrorKind(str, Enum):
+    """Classes of upstream failure, which decide whether a call is retried."""
+
+    RATE_LIMITED = "rate_limited"
+    UNAVAILABLE = "unavailable"
+    AUTH = "auth"
+    INVALID_REQUEST = "invalid_request"
+    UNKNOWN = "unknown"
+    CIRCUIT_OPEN = "circuit_open"
+
+
+# Failures worth retrying; they also count towards tripping the circuit breaker
+RETRYABLE_KINDS = (ErrorKind.RATE_LIMITED, ErrorKind.UNAVAILABLE, ErrorKind.UNKNOWN)
+
+
+class UpstreamError(Exception):
+    """Raised when the upstream API call fails for good."""
+
+    def __init__(self, kind: ErrorKind, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            ErrorKind.CIRCUIT_OPEN,
+            f"Upstream model API is unavailable; retry in {retry_after}s",
+            retry_after=retry_after,
+        )
+
+
+def classify_error(error: BaseException) -> ErrorKind:
+    """
+    Classify an exception raised by the Gemini client.
+
+    Args:
+        error: Exception raised by an upstream call
+
+    Returns:
+        ErrorKind: Failure class of the exception
+    """
+    if isinstance(error, UpstreamError):
+        return error.kind
+    # Looked up rather than imported: the module is heavy, and an error can
+    # only be one of its exceptions once the Gemini client has loaded it
+    google_exceptions = sys.modules.get("google.api_core.exceptions")
+    if google_exceptions is not None:
+        if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+            return ErrorKind.RATE_LIMITED
+        if isinstance(error, (google_exceptions.Unauthenticated, google_exceptions.PermissionDenied)):
+            return ErrorKind.AUTH
+        if isinstance(error, google_exceptions.InvalidArgument):
+            # An invalid key is reported as a 400 INVALID_ARGUMENT with reason API_KEY_INVALID
+            if "API_KEY_INVALID" in str(error) or "API key" in str(error):
+                return ErrorKind.AUTH
+            return ErrorKind.INVALID_REQUEST
+        if isinstance(error, google_exceptions.ClientError):
+            return ErrorKind.INVALID_REQUEST
+        if isinstance(error, (google_exceptions.ServerError, google_exceptions.RetryError)):
+            return ErrorKind.UNAVAILABLE
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return ErrorKind.UNAVAILABLE
+    return ErrorKind.UNKNOWN
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: int):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Tokens added per minute, also the bucket capacity;
+                0 disables the limit
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def unlimited(self) -> bool:
+        """Whether the bucket never blocks."""
+        return self.capacity <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Take tokens from the bucket, waiting until enough are available.
+
+        Waiters are served in arrival order. Requests larger than the capacity
+        wait for a full bucket rather than forever.
+
+        Args:
+            amount: Tokens needed
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if self.unlimited:
+            return 0.0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= amount
+        return waited
+
+    async def debit(self, amount: float) -> None:
+        """Charge tokens used after the fact; the balance may go negative."""
+        if self.unlimited:
+            return
+        self._refill()
+        self.tokens -= amount
+
+    async def set_rate(self, rate: float) -> None:
+        """Change the refill rate, in tokens per second."""
+        self._refill()
+        self.rate = rate
+
+
+class SharedTokenBucket:
+    """
+    Token bucket kept in shared state, so that every worker process draws on one budget.
+
+    Has the interface of ``TokenBucket``; the balance and the (adaptive) rate
+    are read from and written to the shared state in a worker thread, never on
+    the event loop. ``tokens`` and ``rate`` are the values last read, so
+    reporting them costs nothing.
+    """
+
+    def __init__(self, state: SharedState, name: str, per_minute: int):
+        """
+        Initialize the bucket; it starts full the first time any process uses it.
+
+        Args:
+            state: Shared state holding the bucket
+            name: Bucket name, the same in every process
+            per_minute: Tokens added per minute, also the bucket capacity;
+                0 disables the limit
+        """
+        self.state = state
+        self.name = name
+        self.capacity = float(per_minute)
+        self.configured_rate = per_minute / 60.0
+        self.rate = self.configured_rate
+        self.tokens = self.capacity
+
+    @property
+    def unlimited(self) -> bool:
+        """Whether the bucket never blocks."""
+        return self.capacity <= 0
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Take tokens from the bucket, waiting until enough are available.
+
+        Args:
+            amount: Tokens needed
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        delay, self.tokens, self.rate = await asyncio.to_thread(
+            self.state.take, self.name, amount, self.capacity, self.configured_rate
+        )
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    async def debit(self, amount: float) -> None:
+        """Charge tokens used after the fact; the balance may go negative."""
+        if self.unlimited:
+            return
+        _, self.tokens, self.rate = await asyncio.to_thread(
+            self.state.take, self.name, amount, self.capacity, self.configured_rate
+        )
+
+    async def set_rate(self, rate: float) -> None:
+        """Change the refill rate for every process, in tokens per second."""
+        await asyncio.to_thread(self.state.set_rate, self.name, self.capacity, rate, self.configured_rate)
+        self.rate = min(rate, self.configured_rate)
+
+
+class CircuitBreaker:
+    """Stops calls to a failing upstream and lets a single probe test recovery."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: How long the circuit stays open before a probe is allowed
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def retry_after(self) -> int:
+        """Seconds until the open circuit lets a probe through."""
+        remaining = self._opened_at + self.reset_seconds - time.monotonic()
+        return max(1, math.ceil(remaining))
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a probe already running
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                self.rejected += 1
+                raise CircuitOpenError(self.retry_after())
+            self.state = self.HALF_OPEN
+            logger.info("Circuit half-open, probing upstream")
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(1)
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        if self.state != self.CLOSED:
+            logger.info("Circuit closed, upstream recovered")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count an upstream failure, opening the circuit at the threshold."""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+                logger.warning(
+                    f"Circuit opened after {self.consecutive_failures} consecutive failures; "
+                    f"failing fast for {self.reset_seconds}s"
+                )
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """End a call that says nothing about upstream health (e.g. a bad request)."""
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            # Probe was inconclusive; let the next call probe again
+            self.state = self.OPEN
+            self._opened_at = time.monotonic() - self.reset_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report breaker state.
+
+        Returns:
+            dict: State, consecutive failures, trips and rejected calls
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_after_s": self.retry_after() if self.state == self.OPEN else None,
+        }
+
+
+class UpstreamGovernor:
+    """Rate limiting, retry and circuit breaking shared by all upstream calls."""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        failure_threshold: int,
+        reset_seconds: float,
+        state: Optional[SharedState] = None
+    ):
+        """
+        Initialize the governor.
+
+        Args:
+            requests_per_minute: Request budget; 0 disables the limit
+            tokens_per_minute: Token budget (prompt plus output); 0 disables the limit
+            max_attempts: Attempts per call for retryable failures
+            backoff_base: Backoff ceiling of the first retry, in seconds
+            backoff_max: Largest backoff ceiling, in seconds
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: How long the circuit stays open
+            state: Shared state holding the request and token budgets of every
+                worker process, or None to keep them in this process
+        """
+        self.requests: Union[TokenBucket, SharedTokenBucket]
+        self.tokens: Union[TokenBucket, SharedTokenBucket]
+        if state is None:
+            self.requests = TokenBucket(requests_per_minute)
+            self.tokens = TokenBucket(tokens_per_minute)
+        else:
+            self.requests = SharedTokenBucket(state, "upstream_requests", requests_per_minute)
+            self.tokens = SharedTokenBucket(state, "upstream_tokens", tokens_per_minute)
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._configured_rate = requests_per_minute / 60.0
+        self.calls = 0
+        self.retries = 0
+        self.throttled_s = 0.0
+        self.errors: Dict[str, int] = {}
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before retrying, using full jitter.
+
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+
+        Returns:
+            float: Seconds to wait
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def call(self, fn: Callable[[], Awaitable[T]], estimated_tokens: int) -> T:
+        """
+        Run an upstream call under the rate limits, retrying transient failures.
+
+        Args:
+            fn: Coroutine function performing one upstream call
+            estimated_tokens: Prompt tokens charged to the token budget up front
+
+        Returns:
+            The value returned by ``fn``
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            UpstreamError: If the call fails with a non-retryable error, or on every attempt
+        """
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            try:
+                await self.charge(estimated_tokens)
+            except BaseException:
+                # Cancelled or failed while waiting for the budget; upstream was never called,
+                # and a half-open probe must not be left marked in flight
+                self.breaker.release()
+                raise
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                self.errors[kind.value] = self.errors.get(kind.value, 0) + 1
+                UPSTREAM_ERRORS.inc(kind=kind.value)
+                logger.error(f"Upstream call failed ({kind.value}, attempt {attempt + 1}/{self.max_attempts}): {str(e)}")
+
+                if kind not in RETRYABLE_KINDS:
+                    self.breaker.release()
+                    if kind == ErrorKind.AUTH:
+                        raise UpstreamError(kind, "Invalid API Key. Please check your Google Gemini API key in backend/.env") from e
+                    raise UpstreamError(kind, f"Upstream rejected the request: {str(e)}") from e
+
+                self.breaker.record_failure()
+                if kind == ErrorKind.RATE_LIMITED:
+                    await self._slow_down()
+                if attempt == self.max_attempts - 1:
+                    raise UpstreamError(
+                        kind,
+                        f"Failed to analyze feature after {self.max_attempts} attempts: {str(e)}",
+                        retry_after=math.ceil(self.backoff_max) if kind == ErrorKind.RATE_LIMITED else None,
+                    ) from e
+                self.retries += 1
+                UPSTREAM_RETRIES.inc()
+                await asyncio.sleep(self.backoff(attempt))
+            else:
+                self.breaker.record_success()
+                await self._speed_up()
+                return result
+
+    async def charge(self, estimated_tokens: int) -> None:
+        """
+        Take one request and the prompt tokens of an upstream call from the budgets.
+
+        ``call`` charges each attempt; calls made within an attempt, such as a
+        hedge, are charged separately.
+
+        Args:
+            estimated_tokens: Prompt tokens charged to the token budget
+        """
+        self.throttled_s += await self.requests.acquire(1)
+        self.throttled_s += await self.tokens.acquire(estimated_tokens)
+        self.calls += 1
+        UPSTREAM_ATTEMPTS.inc()
+
+    async def record_usage(self, output_tokens: int) -> None:
+        """Charge output tokens, known only after the call, to the token budget."""
+        await self.tokens.debit(output_tokens)
+
+    async def _slow_down(self) -> None:
+        """Halve the request rate after the provider reports throttling."""
+        if self.requests.unlimited:
+            return
+        floor = self._configured_rate * MIN_RATE_FRACTION
+        await self.requests.set_rate(max(floor, self.requests.rate / 2))
+        logger.warning(f"Upstream throttling; request rate reduced to {self.requests.rate * 60:.0f}/min")
+
+    async def _speed_up(self) -> None:
+        """Restore the request rate gradually after successful calls."""
+        if self.requests.rate < self._configured_rate:
+            await self.requests.set_rate(min(
+                self._configured_rate,
+                self.requests.rate + self._configured_rate * RATE_RECOVERY_STEP
+            ))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report limiter and breaker state.
+
+        Shared budgets are reported as this process last saw them, so the
+        report reads no file.
+
+        Returns:
+            dict: Current limits, available budget, retry and error counts
+        """
+        return {
+            "shared": isinstance(self.requests, SharedTokenBucket),
+            "circuit": self.breaker.stats(),
+            "requests_per_minute": None if self.requests.unlimited else round(self.requests.rate * 60),
+            "configured_requests_per_minute": None if self.requests.unlimited else round(self._configured_rate * 60),
+            "tokens_available": None if self.tokens.unlimited else int(self.tokens.tokens),
+            "calls": self.calls,
+            "retries": self.retries,
+            "throttled_s": round(self.throttled_s, 3),
+            "errors": dict(self.errors),
+        }
+
+
+def create_governor() -> UpstreamGovernor:
+    """
+    Build a governor from the ``UPSTREAM_*`` and ``CIRCUIT_*`` settings.
+
+    The budgets are shared by every worker process when ``SHARED_STATE_DB_PATH``
+    is set; each process keeps its own circuit breaker.
+
+    Returns:
+        UpstreamGovernor: Configured governor
+    """
+    return UpstreamGovernor(
+        requests_per_minute=settings.UPSTREAM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.UPSTREAM_TOKENS_PER_MINUTE,
+        max_attempts=settings.UPSTREAM_MAX_ATTEMPTS,
+        backoff_base=settings.UPSTREAM_BACKOFF_BASE,
+        backoff_max=settings.UPSTREAM_BACKOFF_MAX,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+        state=get_shared_state(),
+    )